@@ -3,10 +3,27 @@
 Comprehensive analysis of the grammar database
 """
 
-from sqlalchemy.orm import joinedload
+from collections import Counter
+
 from config.database import SessionLocal
-from models.language_models import GrammarRule, RuleExample, Language
-from sqlalchemy import func
+from models.language_models import GrammarRule, GrammarConcept, Language, LanguageStats, NO_VALUE
+
+LEVEL_NAMES = {
+    1: "Beginner",
+    2: "Elementary",
+    3: "Intermediate",
+    4: "Advanced",
+    5: "Expert"
+}
+
+def merge_histograms(stats, name):
+    """
+    Sum one histogram of the language_stats rows across languages
+    """
+    total = Counter()
+    for row in stats:
+        total.update(getattr(row, name))
+    return total
 
 def analyze_database():
     """
@@ -17,10 +34,17 @@ def analyze_database():
     print("📊 GRAMMAR DATABASE ANALYSIS")
     print("=" * 60)
     
+    # Every count below comes from the materialized statistics, read in one query
+    stats = db.query(LanguageStats, Language.language_name).join(
+        Language, Language.language_id == LanguageStats.language_id
+    ).all()
+    language_names = {row.language_id: name for row, name in stats}
+    stats = [row for row, _ in stats]
+
     # Overall statistics
-    total_rules = db.query(GrammarRule).count()
-    total_languages = db.query(Language).count()
-    total_examples = db.query(RuleExample).count()
+    total_rules = sum(row.rule_count for row in stats)
+    total_languages = len(stats)
+    total_examples = sum(row.example_count for row in stats)
     
     print(f"\n📈 Overall Statistics:")
     print(f"  Total Grammar Rules: {total_rules}")
@@ -30,93 +54,58 @@ def analyze_database():
     
     # Rules by language
     print(f"\n🌍 Rules by Language:")
-    rules_by_lang = db.query(
-        GrammarRule.language_id,
-        func.count(GrammarRule.rule_id),
-        Language.language_name
-    ).join(Language).group_by(
-        GrammarRule.language_id, Language.language_name
-    ).order_by(func.count(GrammarRule.rule_id).desc()).all()
-    
-    for lang_id, count, lang_name in rules_by_lang:
-        print(f"  {lang_name} ({lang_id}): {count} rules")
+    for row in sorted(stats, key=lambda row: row.rule_count, reverse=True):
+        if row.rule_count:
+            print(f"  {language_names[row.language_id]} ({row.language_id}): {row.rule_count} rules")
     
     # Rules by difficulty
     print(f"\n🎯 Rules by Difficulty Level:")
-    rules_by_diff = db.query(
-        GrammarRule.difficulty_level,
-        func.count(GrammarRule.rule_id)
-    ).group_by(GrammarRule.difficulty_level).order_by(GrammarRule.difficulty_level).all()
+    rules_by_diff = merge_histograms(stats, 'rules_by_difficulty')
     
-    for level, count in rules_by_diff:
-        level_names = {
-            1: "Beginner",
-            2: "Elementary", 
-            3: "Intermediate",
-            4: "Advanced",
-            5: "Expert"
-        }
-        level_name = level_names.get(level, f"Level {level}")
+    for key, count in sorted(rules_by_diff.items(), key=lambda item: (item[0] == NO_VALUE, item[0].zfill(3))):
+        level = None if key == NO_VALUE else int(key)
+        level_name = LEVEL_NAMES.get(level, f"Level {level}")
         percentage = (count / total_rules) * 100
         print(f"  {level_name}: {count} rules ({percentage:.1f}%)")
     
     # UD vs Manual rules
     print(f"\n🔬 Data Sources:")
-    sources = db.query(
-        GrammarRule.usage_context,
-        func.count(GrammarRule.rule_id)
-    ).group_by(GrammarRule.usage_context).all()
+    sources = merge_histograms(stats, 'rules_by_usage_context')
     
-    for source, count in sources:
-        source_name = "Manual" if source is None else source.replace('_', ' ').title()
+    for source, count in sources.items():
+        source_name = "Manual" if source == NO_VALUE else source.replace('_', ' ').title()
         percentage = (count / total_rules) * 100
         print(f"  {source_name}: {count} rules ({percentage:.1f}%)")
     
     # Most common concepts
     print(f"\n💡 Most Common Grammar Concepts:")
-    from models.language_models import GrammarConcept
-    common_concepts = db.query(
-        GrammarConcept.concept_name,
-        func.count(GrammarRule.rule_id)
-    ).join(GrammarRule).group_by(
-        GrammarConcept.concept_name
-    ).order_by(
-        func.count(GrammarRule.rule_id).desc()
-    ).limit(10).all()
+    concept_names = dict(db.query(GrammarConcept.concept_id, GrammarConcept.concept_name).all())
+    common_concepts = Counter()
+    for concept_id, count in merge_histograms(stats, 'rules_by_concept').items():
+        if concept_id != NO_VALUE:
+            common_concepts[concept_names.get(int(concept_id), f"Concept {concept_id}")] += count
     
-    for concept, count in common_concepts:
+    for concept, count in common_concepts.most_common(10):
         print(f"  {concept}: {count} rules")
     
     # Language-specific insights
     print(f"\n🎨 Language-Specific Features:")
+    rule_counts = {row.language_id: row.rule_count for row in stats}
     
-    # Chinese rules
-    chinese_rules = db.query(GrammarRule).filter(
-        GrammarRule.language_id == 'zh'
-    ).all()
-    print(f"  Chinese: {len(chinese_rules)} rules covering tones, measure words, and aspect particles")
-    
-    # German rules  
-    german_rules = db.query(GrammarRule).filter(
-        GrammarRule.language_id == 'de'
-    ).all()
-    print(f"  German: {len(german_rules)} rules covering cases, verb position, and articles")
-    
-    # Japanese rules
-    japanese_rules = db.query(GrammarRule).filter(
-        GrammarRule.language_id == 'ja'
-    ).all()
-    print(f"  Japanese: {len(japanese_rules)} rules covering particles, politeness, and counters")
+    print(f"  Chinese: {rule_counts.get('zh', 0)} rules covering tones, measure words, and aspect particles")
+    print(f"  German: {rule_counts.get('de', 0)} rules covering cases, verb position, and articles")
+    print(f"  Japanese: {rule_counts.get('ja', 0)} rules covering particles, politeness, and counters")
     
     # Recent additions
     print(f"\n🆕 Recent UD-Based Additions:")
-    recent_ud_rules = db.query(GrammarRule).filter(
+    recent_ud_rules = db.query(GrammarRule.rule_name, Language.language_name).join(
+        Language, Language.language_id == GrammarRule.language_id
+    ).filter(
         GrammarRule.usage_context.in_(['universal_dependencies', 'enhanced_ud'])
     ).order_by(GrammarRule.rule_id.desc()).limit(5).all()
     
-    for rule in recent_ud_rules:
-        lang = db.query(Language).filter(Language.language_id == rule.language_id).first()
-        print(f"  {lang.language_name}: {rule.rule_name}")
+    for rule_name, language_name in recent_ud_rules:
+        print(f"  {language_name}: {rule_name}")
     
     db.close()
 
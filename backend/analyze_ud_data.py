@@ -4,8 +4,8 @@ Analyze the UD data we've integrated
 """
 
 from config.database import SessionLocal
-from models.language_models import GrammarRule, UDTreebankSentence, UDTokenAnalysis
-from sqlalchemy import func
+from models.language_models import GrammarRule, UDFeatureSet, UDTag, UDTreebankSentence, UDTokenAnalysis
+from sqlalchemy import func, true
 
 def analyze_ud_integration():
     """
@@ -42,10 +42,12 @@ def analyze_ud_integration():
     # Analyze POS distribution from stored tokens
     if sentence_counts:
         pos_distribution = db.query(
-            UDTokenAnalysis.upos,
+            UDTag.value,
             func.count(UDTokenAnalysis.analysis_id)
+        ).join(
+            UDTag, UDTag.tag_id == UDTokenAnalysis.upos_id
         ).group_by(
-            UDTokenAnalysis.upos
+            UDTag.value
         ).order_by(
             func.count(UDTokenAnalysis.analysis_id).desc()
         ).limit(10).all()
@@ -53,6 +55,34 @@ def analyze_ud_integration():
         print("\nUniversal POS Tag Distribution:")
         for pos, count in pos_distribution:
             print(f"  {pos}: {count} tokens")
+
+        # Case distribution by dependency relation, from the parsed FEATS
+        case = func.jsonb_array_elements_text(UDFeatureSet.features['Case']).table_valued('value').lateral('case_value')
+        case_by_deprel = db.query(
+            UDTokenAnalysis.language_id,
+            UDTag.value,
+            case.c.value,
+            func.count(UDTokenAnalysis.analysis_id)
+        ).join(
+            UDFeatureSet, UDFeatureSet.feats_id == UDTokenAnalysis.feats_id
+        ).join(
+            UDTag, UDTag.tag_id == UDTokenAnalysis.deprel_id
+        ).join(
+            case, true()
+        ).filter(
+            UDFeatureSet.features.has_key('Case')
+        ).group_by(
+            UDTokenAnalysis.language_id, UDTag.value, case.c.value
+        ).order_by(
+            UDTokenAnalysis.language_id, func.count(UDTokenAnalysis.analysis_id).desc()
+        ).all()
+
+        print("\nCase by Dependency Relation (top 10 per language):")
+        shown = {}
+        for lang, deprel, case_value, count in case_by_deprel:
+            shown[lang] = shown.get(lang, 0) + 1
+            if shown[lang] <= 10:
+                print(f"  {lang} {deprel}: {case_value} {count} tokens")
     
     db.close()
 
@@ -0,0 +1,148 @@
+"""
+Read-through cache of serialized API responses
+
+Rules, concepts and languages only change when an ingestion or maintenance
+script commits, and every such commit bumps a catalog version in the
+catalog_versions table (see models/language_models.py). Responses are cached
+as ready-to-send JSON bytes keyed by endpoint and parameters, and each entry
+records the catalog version (per language, or ALL_LANGUAGES) it was built
+from.
+
+The version table itself is read at most once per CATALOG_POLL_SECONDS, so
+hot reads are answered from memory without touching Postgres; a write is
+visible to the API at most that many seconds after it commits.
+
+The same versions give every response a strong ETag (endpoint key plus
+catalog version), so a request whose If-None-Match still matches is answered
+with 304 before any query or serialization, cached or not.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import Response
+from sqlalchemy import select
+
+from api.schemas import dump_json
+from models.language_models import CatalogVersion, ALL_LANGUAGES
+
+CACHE_MAX_ENTRIES = int(os.getenv("API_CACHE_MAX_ENTRIES", "512"))
+CACHE_MAX_BYTES = int(os.getenv("API_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CATALOG_POLL_SECONDS = float(os.getenv("CATALOG_POLL_SECONDS", "5"))
+# Browsers and proxies may reuse a response this long, then revalidate with If-None-Match
+CACHE_CONTROL = os.getenv("API_CACHE_CONTROL", f"public, max-age={int(CATALOG_POLL_SECONDS)}, must-revalidate")
+# Bump when the JSON produced for the same data changes, so old ETags stop matching
+RESPONSE_FORMAT_VERSION = 1
+
+def etag_for(key, version):
+    """
+    Strong ETag of the response for cache `key` at catalog `version`
+    """
+    digest = hashlib.blake2b(repr(key).encode("utf-8"), digest_size=8).hexdigest()
+    return f'"{digest}-{RESPONSE_FORMAT_VERSION}-{version}"'
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored
+    return any(candidate == "*" or candidate.removeprefix("W/") == etag for candidate in candidates)
+
+class CachedResponse:
+    __slots__ = ("version", "body", "headers")
+
+    def __init__(self, version, body, headers):
+        self.version = version
+        self.body = body
+        self.headers = headers
+
+class CatalogCache:
+    """
+    Bounded LRU cache of JSON bodies, invalidated by catalog version
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES, poll_interval=CATALOG_POLL_SECONDS):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.poll_interval = poll_interval
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self._versions = {}
+        self._polled_at = None
+        self._lock = threading.Lock()
+
+    async def catalog_versions(self, db):
+        """
+        Current catalog versions, re-read from the database once per poll interval
+        """
+        now = time.monotonic()
+        if self._polled_at is None or now - self._polled_at >= self.poll_interval:
+            result = await db.execute(select(CatalogVersion.language_id, CatalogVersion.version))
+            self._versions = {language_id: version for language_id, version in result.all()}
+            self._polled_at = now
+        return self._versions
+
+    async def catalog_version(self, db, language_id=None):
+        return (await self.catalog_versions(db)).get(language_id or ALL_LANGUAGES, 0)
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None or entry.version != version:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        if len(entry.body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous.body)
+            self.entries[key] = entry
+            self.size += len(entry.body)
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted.body)
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.size = 0
+            self._polled_at = None
+
+    async def json_response(self, db, key, build, language_id=None, request=None):
+        """
+        Serve `key` from the cache, or await build(headers) and cache its JSON
+
+        build is a coroutine function that returns the response data and may add response headers to the
+        dict it is given; those headers are cached with the body. Exceptions
+        (e.g. a 404 HTTPException) propagate and nothing is cached. When
+        `request` carries a matching If-None-Match, a 304 is returned instead.
+        """
+        version = await self.catalog_version(db, language_id)
+        validators = {"ETag": etag_for(key, version), "Cache-Control": CACHE_CONTROL}
+
+        if request is not None and etag_matches(request.headers.get("if-none-match"), validators["ETag"]):
+            self.not_modified += 1
+            return Response(status_code=304, headers=validators)
+
+        entry = self.get(key, version)
+        if entry is None:
+            headers = {}
+            data = await build(headers)
+            body = dump_json(data)
+            entry = CachedResponse(version, body, headers)
+            self.put(key, entry)
+        return Response(content=entry.body, media_type="application/json", headers={**entry.headers, **validators})
+
+catalog_cache = CatalogCache()
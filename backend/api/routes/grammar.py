@@ -1,38 +1,199 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from config.database import get_db
-from models.language_models import GrammarRule, GrammarConcept, Language
-from sqlalchemy.orm import joinedload
+from api.cache import catalog_cache
+from api.schemas import (
+    RuleOut, ExampleOut, LanguageOut, ConceptOut, SearchHitOut,
+    RULE_COLUMNS, EXAMPLE_COLUMNS, LANGUAGE_COLUMNS, CONCEPT_COLUMNS,
+)
+from api.search import search_rules
+from models.language_models import GrammarRule, GrammarConcept, Language, LanguageStats, RuleExample
 
 router = APIRouter(prefix="/grammar", tags=["grammar"])
 
-@router.get("/rules")
-async def get_grammar_rules(language_id: str = None, db: Session = Depends(get_db)):
-    query = db.query(GrammarRule).options(
-        joinedload(GrammarRule.language),
-        joinedload(GrammarRule.examples)
+RULE_INCLUDES = ("examples", "language")
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+def table_columns(model, names):
+    return [getattr(model, name) for name in names]
+
+def parse_list_param(value, allowed, name):
+    """
+    Split a comma-separated query parameter and reject unknown names
+    """
+    if not value:
+        return []
+    items = [item.strip() for item in value.split(",") if item.strip()]
+    unknown = [item for item in items if item not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown {name}: {', '.join(unknown)} (allowed: {', '.join(allowed)})"
+        )
+    return items
+
+def rule_columns(fields):
+    """
+    Rule columns selected by `fields=`; rule_id is always kept since it is the cursor
+    """
+    selected = parse_list_param(fields, RULE_COLUMNS, "fields") or list(RULE_COLUMNS)
+    if "rule_id" not in selected:
+        selected.insert(0, "rule_id")
+    return selected
+
+async def load_examples(db, rule_ids):
+    examples = {rule_id: [] for rule_id in rule_ids}
+    result = await db.execute(
+        select(*table_columns(RuleExample, EXAMPLE_COLUMNS))
+        .where(RuleExample.rule_id.in_(rule_ids))
+        .order_by(RuleExample.rule_id, RuleExample.example_id)
     )
+    for row in result.all():
+        example = ExampleOut.from_row(EXAMPLE_COLUMNS, row)
+        examples[example.rule_id].append(example)
+    return examples
+
+async def load_languages(db, language_ids):
+    result = await db.execute(
+        select(*table_columns(Language, LANGUAGE_COLUMNS))
+        .where(Language.language_id.in_(list(language_ids)))
+    )
+    return {row[0]: LanguageOut.from_row(LANGUAGE_COLUMNS, row) for row in result.all()}
+
+async def query_rules(db, language_id, columns, includes, cursor=None, limit=None):
+    """
+    RuleOut of `columns` ordered by rule_id, plus whether more rules follow
+
+    Examples and languages are each loaded with one extra query when asked for.
+    Embedding the language needs language_id, which is then selected but only
+    returned if it is one of `columns`.
+    """
+    selected = list(columns)
+    if "language" in includes and "language_id" not in selected:
+        selected.append("language_id")
+    query = select(*table_columns(GrammarRule, selected))
     if language_id:
-        query = query.filter(GrammarRule.language_id == language_id)
-    rules = query.all()
-    return rules
-
-@router.get("/rules/{language_id}")
-async def get_rules_by_language(language_id: str, db: Session = Depends(get_db)):
-    rules = db.query(GrammarRule).options(
-        joinedload(GrammarRule.language),
-        joinedload(GrammarRule.examples)
-    ).filter(GrammarRule.language_id == language_id).all()
-    if not rules:
-        raise HTTPException(status_code=404, detail="No rules found for this language")
-    return rules
-
-@router.get("/concepts")
-async def get_grammar_concepts(db: Session = Depends(get_db)):
-    return db.query(GrammarConcept).all()
-
-@router.get("/languages-with-rules")
-async def get_languages_with_rules(db: Session = Depends(get_db)):
-    # Get languages that have grammar rules
-    languages_with_rules = db.query(Language).join(GrammarRule).distinct().all()
-    return languages_with_rules
\ No newline at end of file
+        query = query.where(GrammarRule.language_id == language_id)
+    if cursor is not None:
+        query = query.where(GrammarRule.rule_id > cursor)
+    query = query.order_by(GrammarRule.rule_id)
+    if limit is not None:
+        query = query.limit(limit + 1)
+    rows = (await db.execute(query)).all()
+    has_more = limit is not None and len(rows) > limit
+    rows = rows[:limit]
+
+    rule_id_index = selected.index("rule_id")
+    examples = languages = None
+    if rows and "examples" in includes:
+        examples = await load_examples(db, [row[rule_id_index] for row in rows])
+    if rows and "language" in includes:
+        language_index = selected.index("language_id")
+        languages = await load_languages(db, {row[language_index] for row in rows})
+
+    rules = []
+    for row in rows:
+        relations = {}
+        if examples is not None:
+            relations["examples"] = examples[row[rule_id_index]]
+        if languages is not None:
+            relations["language"] = languages.get(row[language_index])
+        rules.append(RuleOut.from_row(columns, row[:len(columns)], **relations))
+    return rules, has_more
+
+@router.get("/rules", response_model=List[RuleOut])
+async def get_grammar_rules(
+    request: Request,
+    language_id: str = None,
+    cursor: int = Query(None, description="Return rules with rule_id greater than this (the X-Next-Cursor of the previous page)"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: str = Query(None, description="Comma-separated rule columns to return"),
+    include: str = Query(None, description="Comma-separated relations to embed: examples, language"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    One page of rules ordered by rule_id (keyset pagination)
+
+    Only the requested columns are selected, and examples or languages are
+    loaded with one extra query per page when asked for. When more rules
+    follow, the X-Next-Cursor header carries the cursor of the next page.
+    """
+    columns = rule_columns(fields)
+    includes = parse_list_param(include, RULE_INCLUDES, "include")
+
+    async def build(headers):
+        rules, has_more = await query_rules(db, language_id, columns, includes, cursor, limit)
+        if has_more:
+            next_cursor = rules[-1].rule_id
+            next_url = request.url.include_query_params(cursor=next_cursor)
+            headers["X-Next-Cursor"] = str(next_cursor)
+            headers["Link"] = f'<{next_url.path}?{next_url.query}>; rel="next"'
+        return rules
+
+    key = ("rules", language_id, cursor, limit, tuple(columns), tuple(includes))
+    return await catalog_cache.json_response(db, key, build, language_id, request)
+
+@router.get("/rules/{language_id}", response_model=List[RuleOut])
+async def get_rules_by_language(language_id: str, request: Request, db: AsyncSession = Depends(get_db)):
+    async def build(headers):
+        rules, _ = await query_rules(db, language_id, list(RULE_COLUMNS), RULE_INCLUDES)
+        if not rules:
+            raise HTTPException(status_code=404, detail="No rules found for this language")
+        return rules
+
+    return await catalog_cache.json_response(db, ("rules_by_language", language_id), build, language_id, request)
+
+@router.get("/search", response_model=List[SearchHitOut])
+async def search_grammar(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200, description="Words to look for; quotes, OR and -word are understood"),
+    language_id: str = None,
+    min_difficulty: int = Query(None, ge=1, le=5),
+    max_difficulty: int = Query(None, ge=1, le=5),
+    limit: int = Query(DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_SEARCH_LIMIT),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Rules whose name, description or examples match `q`, best first
+
+    Each hit carries highlighted snippets of the rule and of its best matching
+    example. Rules found only by trigram similarity come after full-text hits
+    and are marked "fuzzy".
+    """
+    q = q.strip()
+    if not q:
+        raise HTTPException(status_code=400, detail="Empty search query")
+
+    async def build(headers):
+        return await search_rules(db, q, language_id, min_difficulty, max_difficulty, limit)
+
+    key = ("search", q, language_id, min_difficulty, max_difficulty, limit)
+    return await catalog_cache.json_response(db, key, build, language_id, request)
+
+@router.get("/concepts", response_model=List[ConceptOut])
+async def get_grammar_concepts(request: Request, db: AsyncSession = Depends(get_db)):
+    async def build(headers):
+        result = await db.execute(select(*table_columns(GrammarConcept, CONCEPT_COLUMNS)))
+        return [ConceptOut.from_row(CONCEPT_COLUMNS, row) for row in result.all()]
+
+    return await catalog_cache.json_response(db, ("concepts",), build, request=request)
+
+@router.get("/languages-with-rules", response_model=List[LanguageOut])
+async def get_languages_with_rules(request: Request, db: AsyncSession = Depends(get_db)):
+    async def build(headers):
+        # Get languages that have grammar rules
+        result = await db.execute(
+            select(*table_columns(Language, LANGUAGE_COLUMNS))
+            .join(LanguageStats, Language.language_id == LanguageStats.language_id)
+            .where(LanguageStats.rule_count > 0)
+        )
+        return [LanguageOut.from_row(LANGUAGE_COLUMNS, row) for row in result.all()]
+
+    return await catalog_cache.json_response(db, ("languages_with_rules",), build, request=request)
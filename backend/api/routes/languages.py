@@ -1,61 +1,66 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from config.database import get_db
 from models.language_models import Language
+from api.cache import catalog_cache
+from api.schemas import LanguageOut, LanguageRuleCountOut, LANGUAGE_COLUMNS
 
 router = APIRouter(prefix="/languages", tags=["languages"])
 
+LANGUAGE_TABLE_COLUMNS = [getattr(Language, name) for name in LANGUAGE_COLUMNS]
+
+
+@router.get("/", response_model=List[LanguageOut])
+async def get_languages(request: Request, db: AsyncSession = Depends(get_db)):
+    async def build(headers):
+        result = await db.execute(select(*LANGUAGE_TABLE_COLUMNS))
+        return [LanguageOut.from_row(LANGUAGE_COLUMNS, row) for row in result.all()]
+
+    return await catalog_cache.json_response(db, ("languages",), build, request=request)
 
-@router.get("/")
-async def get_languages(db: Session = Depends(get_db)):
-    languages = db.query(Language).all()
-    return languages
 
+@router.get("/{language_id}", response_model=LanguageOut)
+async def get_language(language_id: str, request: Request, db: AsyncSession = Depends(get_db)):
+    async def build(headers):
+        result = await db.execute(select(*LANGUAGE_TABLE_COLUMNS).where(Language.language_id == language_id))
+        row = result.first()
+        if not row:
+            raise HTTPException(status_code=404, detail="Language not found")
+        return LanguageOut.from_row(LANGUAGE_COLUMNS, row)
 
-@router.get("/{language_id}")
-async def get_language(language_id: str, db: Session = Depends(get_db)):
-    language = db.query(Language).filter(Language.language_id == language_id).first()
-    if not language:
-        raise HTTPException(status_code=404, detail="Language not found")
-    return language
+    return await catalog_cache.json_response(db, ("language", language_id), build, request=request)
 
 
 from sqlalchemy import func
-from models.language_models import Language, GrammarRule
+from models.language_models import Language, LanguageStats
 
 
-@router.get("/with-rules/count")
-async def get_languages_with_rule_counts(db: Session = Depends(get_db)):
-    # Query to get languages with their rule counts
-    languages_with_counts = (
-        db.query(
-            Language.language_id,
-            Language.language_name,
-            Language.language_family,
-            Language.script,
-            func.count(GrammarRule.rule_id).label("rule_count"),
-        )
-        .outerjoin(GrammarRule, Language.language_id == GrammarRule.language_id)
-        .group_by(
+@router.get("/with-rules/count", response_model=List[LanguageRuleCountOut])
+async def get_languages_with_rule_counts(request: Request, db: AsyncSession = Depends(get_db)):
+    async def build(headers):
+        return await query_languages_with_rule_counts(db)
+
+    return await catalog_cache.json_response(
+        db, ("languages_with_rule_counts",), build, request=request
+    )
+
+
+RULE_COUNT_COLUMNS = ("language_id", "language_name", "language_family", "script", "rule_count")
+
+
+async def query_languages_with_rule_counts(db):
+    # Rule counts are read from the materialized language_stats rows
+    result = await db.execute(
+        select(
             Language.language_id,
             Language.language_name,
             Language.language_family,
             Language.script,
-        )
-        .all()
+            func.coalesce(LanguageStats.rule_count, 0).label("rule_count"),
+        ).outerjoin(LanguageStats, Language.language_id == LanguageStats.language_id)
     )
 
-    # Convert to list of dictionaries
-    result = []
-    for lang in languages_with_counts:
-        result.append(
-            {
-                "language_id": lang.language_id,
-                "language_name": lang.language_name,
-                "language_family": lang.language_family,
-                "script": lang.script,
-                "rule_count": lang.rule_count,
-            }
-        )
-
-    return result
+    return [LanguageRuleCountOut.from_row(RULE_COUNT_COLUMNS, row) for row in result.all()]
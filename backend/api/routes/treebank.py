@@ -0,0 +1,145 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.database import get_db
+from api.schemas import ConcordanceLineOut, TreeMatchOut
+from api.treebank import fact_conditions, query_treebank, resolve_facts, token_column
+from conllu.reader import parse_feats
+from models.language_models import UDTokenAnalysis, UDTreebankSentence
+from tree_query import compile_query, TreeQueryError
+
+router = APIRouter(prefix="/treebank", tags=["treebank"])
+
+DEFAULT_CONCORDANCE_LIMIT = 50
+MAX_CONCORDANCE_LIMIT = 500
+DEFAULT_CONTEXT_WIDTH = 5
+MAX_CONTEXT_WIDTH = 20
+DEFAULT_QUERY_LIMIT = 20
+MAX_QUERY_LIMIT = 200
+
+def set_next_cursor(request, response, next_cursor):
+    next_url = request.url.include_query_params(cursor=next_cursor)
+    response.headers["X-Next-Cursor"] = str(next_cursor)
+    response.headers["Link"] = f'<{next_url.path}?{next_url.query}>; rel="next"'
+
+async def load_sentence_forms(db, language_id, sentence_ids):
+    """
+    Token ids and forms of each sentence, in sentence order
+    """
+    sentences = {sentence_id: [] for sentence_id in sentence_ids}
+    result = await db.execute(
+        select(UDTokenAnalysis.sentence_id, UDTokenAnalysis.token_id, token_column('form'))
+        .where(UDTokenAnalysis.language_id == language_id, UDTokenAnalysis.sentence_id.in_(list(sentence_ids)))
+        .order_by(UDTokenAnalysis.sentence_id, UDTokenAnalysis.analysis_id)
+    )
+    for sentence_id, token_id, form in result.all():
+        sentences[sentence_id].append((token_id, form))
+    return sentences
+
+async def query_concordance(db, language_id, lemma=None, upos=None, deprel=None, feats=None, cursor=None, limit=DEFAULT_CONCORDANCE_LIMIT, width=DEFAULT_CONTEXT_WIDTH):
+    """
+    Keyword-in-context lines of the tokens matching every given filter, ordered by analysis_id, plus the cursor of the next page (None on the last)
+
+    The matches come from one of the (<id column>, analysis_id) indexes of
+    the language's partition (`feats` is a FEATS string the tokens must
+    contain, e.g. "Case=Dat"), and the context from one extra query over
+    their sentences. A token whose sentence a concurrent reload of the
+    language removed between the two queries is left out of the page.
+    """
+    facts = [(key, {value}) for key, value in (('lemma', lemma), ('upos', upos), ('deprel', deprel)) if value is not None]
+    facts.extend((name, {value}) for name, values in parse_feats(feats).items() for value in values.split(","))
+    ids = await resolve_facts(db, language_id, facts)
+
+    query = (
+        select(
+            UDTokenAnalysis.analysis_id, UDTokenAnalysis.sentence_id, UDTokenAnalysis.token_id,
+            token_column('lemma'), token_column('upos'), token_column('deprel'), UDTreebankSentence.source,
+        )
+        .join(UDTokenAnalysis.sentence)
+        .where(UDTokenAnalysis.language_id == language_id, *fact_conditions(UDTokenAnalysis, facts, ids))
+    )
+    if cursor is not None:
+        query = query.where(UDTokenAnalysis.analysis_id > cursor)
+    rows = (await db.execute(query.order_by(UDTokenAnalysis.analysis_id).limit(limit + 1))).all()
+    next_cursor = rows[limit - 1].analysis_id if len(rows) > limit else None
+    rows = rows[:limit]
+    if not rows:
+        return [], None
+
+    sentences = await load_sentence_forms(db, language_id, {row.sentence_id for row in rows})
+    lines = []
+    for row in rows:
+        tokens = sentences.get(row.sentence_id, [])
+        position = next((index for index, (token_id, _) in enumerate(tokens) if token_id == row.token_id), None)
+        if position is None:
+            continue
+        forms = [form for _, form in tokens]
+        lines.append(ConcordanceLineOut.model_construct(
+            analysis_id=row.analysis_id,
+            sentence_id=row.sentence_id,
+            token_id=row.token_id,
+            left=" ".join(forms[max(position - width, 0):position]),
+            keyword=forms[position],
+            right=" ".join(forms[position + 1:position + 1 + width]),
+            lemma=row.lemma,
+            upos=row.upos,
+            deprel=row.deprel,
+            source=row.source,
+        ))
+    return lines, next_cursor
+
+@router.get("/{language_id}/concordance", response_model=List[ConcordanceLineOut])
+async def get_concordance(
+    language_id: str,
+    request: Request,
+    response: Response,
+    lemma: str = None,
+    upos: str = None,
+    deprel: str = None,
+    feats: str = Query(None, description="Features the tokens must have, e.g. Case=Dat|Number=Plur"),
+    cursor: int = Query(None, description="Return tokens with analysis_id greater than this (the X-Next-Cursor of the previous page)"),
+    limit: int = Query(DEFAULT_CONCORDANCE_LIMIT, ge=1, le=MAX_CONCORDANCE_LIMIT),
+    width: int = Query(DEFAULT_CONTEXT_WIDTH, ge=0, le=MAX_CONTEXT_WIDTH, description="Tokens of context on each side"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Keyword-in-context lines for the tokens with this lemma, UPOS, deprel and/or features (keyset pagination)
+
+    When more lines follow, the X-Next-Cursor header carries the cursor of
+    the next page.
+    """
+    if lemma is None and upos is None and deprel is None and not parse_feats(feats):
+        raise HTTPException(status_code=400, detail="Give at least one of lemma, upos, deprel or feats")
+
+    lines, next_cursor = await query_concordance(db, language_id, lemma, upos, deprel, feats, cursor, limit, width)
+    if next_cursor is not None:
+        set_next_cursor(request, response, next_cursor)
+    return lines
+
+@router.get("/{language_id}/query", response_model=List[TreeMatchOut])
+async def query_dependency_trees(
+    language_id: str,
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=500, description="Tree query such as VERB >nsubj NOUN >obj NOUN (see tree_query.py)"),
+    cursor: int = Query(None, description="Continue after this candidate token (the X-Next-Cursor of the previous page)"),
+    limit: int = Query(DEFAULT_QUERY_LIMIT, ge=1, le=MAX_QUERY_LIMIT),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Matches of a dependency tree query, with the token bound to each named node
+
+    A page can be short, or even empty, when the request's candidate budget
+    ran out first; keep following X-Next-Cursor until it is absent.
+    """
+    try:
+        tree_query = compile_query(q)
+    except TreeQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    matches, next_cursor = await query_treebank(db, language_id, tree_query, cursor, limit)
+    if next_cursor is not None:
+        set_next_cursor(request, response, next_cursor)
+    return matches
@@ -0,0 +1,134 @@
+"""
+Response schemas of the grammar, language and treebank APIs, and their JSON encoding
+
+Routes select plain column tuples and turn each row into a schema with
+`from_row`. It uses model_construct: the values come straight from typed
+database columns, so they are not validated a second time, and no ORM object
+or lazy relationship is ever touched while serializing. Fields a query did
+not select (see `fields=` on /grammar/rules) stay unset and are left out of
+the JSON. Encoding is done by orjson.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+class OutSchema(BaseModel):
+    @classmethod
+    def from_row(cls, columns, row, **relations):
+        return cls.model_construct(**dict(zip(columns, row)), **relations)
+
+class LanguageOut(OutSchema):
+    language_id: str
+    language_name: str
+    language_family: Optional[str] = None
+    script: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+class LanguageRuleCountOut(LanguageOut):
+    rule_count: int = 0
+
+class ConceptOut(OutSchema):
+    concept_id: int
+    concept_name: str
+    category: str
+    description: Optional[str] = None
+    universal_linguistic_id: Optional[str] = None
+
+class ExampleOut(OutSchema):
+    example_id: int
+    rule_id: int
+    example_sentence: str
+    example_translation: Optional[str] = None
+    example_romanization: Optional[str] = None
+    example_gloss: Optional[str] = None
+    notes: Optional[str] = None
+
+class RuleOut(OutSchema):
+    # Everything but rule_id is optional since fields= can project columns away
+    rule_id: int
+    language_id: Optional[str] = None
+    concept_id: Optional[int] = None
+    rule_name: Optional[str] = None
+    rule_description: Optional[str] = None
+    usage_context: Optional[str] = None
+    difficulty_level: Optional[int] = None
+    is_active: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    examples: Optional[List[ExampleOut]] = None
+    language: Optional[LanguageOut] = None
+
+class SearchHitOut(OutSchema):
+    # Snippets are the matched text with hits wrapped in <mark>...</mark>; the
+    # text itself is not HTML-escaped
+    rule_id: int
+    language_id: str
+    rule_name: str
+    difficulty_level: Optional[int] = None
+    rank: float
+    match: str  # "text" (full-text), "fuzzy" (trigram) or "substring" (CJK n-grams)
+    rule_name_snippet: str
+    rule_description_snippet: str
+    example_id: Optional[int] = None
+    example_snippet: Optional[str] = None
+    example_translation_snippet: Optional[str] = None
+    example_romanization: Optional[str] = None
+
+class ConcordanceLineOut(OutSchema):
+    # One keyword-in-context line: `left` and `right` are up to `width` token
+    # forms on either side of the keyword, joined with spaces
+    analysis_id: int
+    sentence_id: int
+    token_id: str
+    left: str
+    keyword: str
+    right: str
+    lemma: Optional[str] = None
+    upos: Optional[str] = None
+    deprel: Optional[str] = None
+    source: Optional[str] = None
+
+class TreeNodeOut(OutSchema):
+    token_id: str
+    form: Optional[str] = None
+    lemma: Optional[str] = None
+    upos: Optional[str] = None
+    deprel: Optional[str] = None
+
+class TreeMatchOut(OutSchema):
+    # analysis_id is the token the query's first node matched, and the cursor
+    analysis_id: int
+    sentence_id: int
+    sentence_text: str
+    nodes: Dict[str, TreeNodeOut]
+
+# Table columns behind each schema, in output order
+LANGUAGE_COLUMNS = tuple(LanguageOut.model_fields)
+CONCEPT_COLUMNS = tuple(ConceptOut.model_fields)
+EXAMPLE_COLUMNS = tuple(ExampleOut.model_fields)
+RULE_COLUMNS = tuple(name for name in RuleOut.model_fields if name not in ("examples", "language"))
+SEARCH_HIT_COLUMNS = tuple(SearchHitOut.model_fields)
+
+def _encode_schema(obj):
+    if isinstance(obj, BaseModel):
+        fields_set = obj.model_fields_set
+        return {name: value for name, value in obj.__dict__.items() if name in fields_set}
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def dump_json(content):
+    """
+    Encode schemas (and plain JSON data) to UTF-8 JSON bytes with orjson
+    """
+    return orjson.dumps(content, default=_encode_schema)
+
+class SchemaJSONResponse(JSONResponse):
+    """
+    JSON response rendered by dump_json, used as the app's default response class
+    """
+
+    def render(self, content):
+        return dump_json(content)
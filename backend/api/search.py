@@ -0,0 +1,267 @@
+"""
+Search over grammar rules and their examples (/grammar/search)
+
+Full-text matching comes first: the query is parsed with websearch_to_tsquery
+and matched against the generated search_vector columns of grammar_rules
+(rule name and description) and rule_examples (sentence, translation and
+romanization), both GIN-indexed. A rule's rank is the best of its own
+ts_rank and those of its examples, examples counting for EXAMPLE_RANK_WEIGHT.
+The query, folded by normalize_romanization, is also matched as a substring
+of the examples' normalized romanization (trigram-indexed), so
+"wo chi pingguo" finds "Wǒ chī píngguǒ." whatever the tones and spacing.
+Queries that look like romanization (tone marks or numbers) or are filtered
+to ROMANIZED_LANGUAGES do this in the full-text pass; any other query only
+in the fallback below, since its letters may just happen to occur inside a
+romanization ("she" in "shénme shíhou").
+
+When full-text matching returns fewer hits than asked for (typos, partial
+words), the remaining slots are filled with pg_trgm word_similarity matches on
+rule names and example sentences and translations, ranked below every
+full-text hit.
+
+Queries containing Chinese or Japanese are substring searches instead, since
+the text search parser cannot segment those scripts: every run of CJK
+characters in the query must occur in the example sentence (or in the rule
+name or description). Candidate examples come from the posting lists of the
+rule_example_ngrams table (see cjk_ngrams.py), joined on example_id, and are
+then confirmed with strpos, so rule_examples is never scanned. Text outside
+the CJK runs is ignored by such a query.
+
+Each branch (rules, examples) ranks at most SEARCH_CANDIDATE_LIMIT matching
+rows, so a term found in most of the million examples costs about as much as
+a rare one; such a term is then ranked within an arbitrary subset of its
+matches.
+
+Snippets (ts_headline, or <mark> around CJK runs) are only computed for the
+rules returned.
+"""
+
+from sqlalchemy import select, union_all, and_, literal, literal_column, null, cast, func, Float, Integer
+from sqlalchemy.orm import aliased
+
+from api.schemas import SearchHitOut, SEARCH_HIT_COLUMNS
+from cjk_ngrams import cjk_runs, query_ngrams
+from models.language_models import GrammarRule, RuleExample, RuleExampleNgram, TEXT_SEARCH_CONFIG
+from romanization import normalize_romanization, looks_romanized
+
+EXAMPLE_RANK_WEIGHT = 0.5
+FUZZY_RANK_WEIGHT = 0.1
+SEARCH_CANDIDATE_LIMIT = 2000
+# Posting lists joined per CJK query; any further grams are left to the substring check
+MAX_QUERY_NGRAMS = 6
+# Shorter folded queries have no trigram to look up, and would match almost everything
+MIN_ROMANIZATION_QUERY = 3
+# Languages whose examples are searched by romanization in the full-text pass
+ROMANIZED_LANGUAGES = ('zh', 'ja')
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=2"
+
+_config = literal_column(f"'{TEXT_SEARCH_CONFIG}'::regconfig")
+
+def rule_filters(language_id=None, min_difficulty=None, max_difficulty=None):
+    filters = []
+    if language_id:
+        filters.append(GrammarRule.language_id == language_id)
+    if min_difficulty is not None:
+        filters.append(GrammarRule.difficulty_level >= min_difficulty)
+    if max_difficulty is not None:
+        filters.append(GrammarRule.difficulty_level <= max_difficulty)
+    return filters
+
+def filtered_examples(query, filters):
+    """
+    `query` over rule_examples restricted by rule `filters`, joining grammar_rules only when needed
+    """
+    if not filters:
+        return query
+    return query.join(GrammarRule, GrammarRule.rule_id == RuleExample.rule_id).where(*filters)
+
+def coverage(column, length):
+    """
+    Share of `column` covered by a match of `length` characters
+    """
+    return literal(float(length)) / func.greatest(func.char_length(column), 1)
+
+def romanization_hits(romanized, filters, weight):
+    """
+    (rule_id, rank, example_id) of examples whose normalized romanization contains `romanized`
+    """
+    column = RuleExample.example_romanization_normalized
+    examples = filtered_examples(
+        select(
+            RuleExample.rule_id,
+            (coverage(column, len(romanized)) * weight).label("rank"),
+            RuleExample.example_id,
+        ),
+        filters,
+    ).where(column.like(f"%{romanized}%"))  # only a-z, nothing to escape
+    return examples.limit(SEARCH_CANDIDATE_LIMIT)
+
+def text_hits(tsquery, filters, romanized=None):
+    """
+    (rule_id, rank, example_id) of rules and examples matching `tsquery`, or
+    whose normalized romanization contains `romanized`
+    """
+    rules = select(
+        GrammarRule.rule_id,
+        func.ts_rank(GrammarRule.search_vector, tsquery).label("rank"),
+        cast(null(), Integer).label("example_id"),
+    ).where(GrammarRule.search_vector.op("@@")(tsquery), *filters).limit(SEARCH_CANDIDATE_LIMIT)
+    examples = select(
+        RuleExample.rule_id,
+        (func.ts_rank(RuleExample.search_vector, tsquery) * EXAMPLE_RANK_WEIGHT).label("rank"),
+        RuleExample.example_id,
+    )
+    examples = filtered_examples(examples, filters).where(RuleExample.search_vector.op("@@")(tsquery))
+    branches = [rules, examples.limit(SEARCH_CANDIDATE_LIMIT)]
+
+    if romanized:
+        branches.append(romanization_hits(romanized, filters, EXAMPLE_RANK_WEIGHT))
+    return union_all(*branches)
+
+def fuzzy_hits(q, filters, exclude_rule_ids, romanized=None):
+    """
+    (rule_id, rank, example_id) of rules and examples with text similar to `q`,
+    or whose normalized romanization contains `romanized`
+
+    `<%` is pg_trgm's word_similarity operator, answered by the trigram indexes.
+    """
+    term = literal(q)
+    if exclude_rule_ids:
+        filters = [*filters, GrammarRule.rule_id.notin_(exclude_rule_ids)]
+    rules = select(
+        GrammarRule.rule_id,
+        (func.word_similarity(term, GrammarRule.rule_name) * FUZZY_RANK_WEIGHT).label("rank"),
+        cast(null(), Integer).label("example_id"),
+    ).where(term.op("<%")(GrammarRule.rule_name), *filters).limit(SEARCH_CANDIDATE_LIMIT)
+    examples = [
+        filtered_examples(
+            select(
+                RuleExample.rule_id,
+                (func.word_similarity(term, column) * FUZZY_RANK_WEIGHT).label("rank"),
+                RuleExample.example_id,
+            ),
+            filters,
+        )
+        .where(term.op("<%")(column))
+        .limit(SEARCH_CANDIDATE_LIMIT)
+        for column in (RuleExample.example_sentence, RuleExample.example_translation)
+    ]
+    if romanized:
+        examples.append(romanization_hits(romanized, filters, FUZZY_RANK_WEIGHT))
+    return union_all(rules, *examples)
+
+def substring_hits(runs, filters):
+    """
+    (rule_id, rank, example_id) of rules and examples containing every one of `runs`
+
+    Shorter texts rank higher: the rank is the share of the text the runs cover.
+    """
+    length = sum(len(run) for run in runs)
+
+    def contains_runs(column):
+        return and_(*(func.strpos(column, run) > 0 for run in runs))
+
+    # A run cannot span the space, so one test covers name and description
+    rule_text = func.concat_ws(" ", GrammarRule.rule_name, GrammarRule.rule_description)  # skips a NULL part
+    rules = select(
+        GrammarRule.rule_id,
+        coverage(rule_text, length).label("rank"),
+        cast(null(), Integer).label("example_id"),
+    ).where(contains_runs(rule_text), *filters).limit(SEARCH_CANDIDATE_LIMIT)
+
+    # Intersect the posting lists of the query grams: each is read in example_id
+    # order from the (gram, example_id) primary key
+    grams = query_ngrams(runs)[:MAX_QUERY_NGRAMS]
+    postings = [aliased(RuleExampleNgram) for _ in grams]
+    examples = select(
+        RuleExample.rule_id,
+        (coverage(RuleExample.example_sentence, length) * EXAMPLE_RANK_WEIGHT).label("rank"),
+        RuleExample.example_id,
+    ).select_from(postings[0])
+    for posting in postings[1:]:
+        examples = examples.join(posting, posting.example_id == postings[0].example_id)
+    examples = examples.join(RuleExample, RuleExample.example_id == postings[0].example_id).where(
+        *(posting.gram == gram for posting, gram in zip(postings, grams)),
+        contains_runs(RuleExample.example_sentence),
+    )
+    examples = filtered_examples(examples, filters)
+    return union_all(rules, examples.limit(SEARCH_CANDIDATE_LIMIT))
+
+def headline_highlighter(tsquery):
+    def highlight(column):
+        return func.ts_headline(_config, column, tsquery, HEADLINE_OPTIONS)
+    return highlight
+
+def substring_highlighter(runs):
+    def highlight(column):
+        for run in runs:
+            column = func.replace(column, run, f"<mark>{run}</mark>")
+        return column
+    return highlight
+
+def ranked_hits_query(hits, highlight, match, limit):
+    """
+    The `limit` best rules among `hits`, one row per rule with its best example,
+    and their snippets marked up by `highlight`
+    """
+    hits = hits.subquery("hits")
+    best = (
+        select(hits.c.rule_id, hits.c.rank, hits.c.example_id)
+        .distinct(hits.c.rule_id)
+        .order_by(hits.c.rule_id, hits.c.rank.desc(), hits.c.example_id)
+        .subquery("best")
+    )
+    top = select(best).order_by(best.c.rank.desc(), best.c.rule_id).limit(limit).subquery("top")
+
+    return (
+        select(
+            GrammarRule.rule_id,
+            GrammarRule.language_id,
+            GrammarRule.rule_name,
+            GrammarRule.difficulty_level,
+            cast(top.c.rank, Float),
+            literal(match),
+            highlight(GrammarRule.rule_name),
+            highlight(GrammarRule.rule_description),
+            RuleExample.example_id,
+            highlight(RuleExample.example_sentence),
+            highlight(RuleExample.example_translation),
+            RuleExample.example_romanization,
+        )
+        .select_from(top)
+        .join(GrammarRule, GrammarRule.rule_id == top.c.rule_id)
+        .outerjoin(RuleExample, RuleExample.example_id == top.c.example_id)
+        .order_by(top.c.rank.desc(), GrammarRule.rule_id)
+    )
+
+async def search_rules(db, q, language_id=None, min_difficulty=None, max_difficulty=None, limit=20):
+    """
+    SearchHitOut of the `limit` best rules for `q`, full-text hits first
+
+    A query with Chinese or Japanese characters is a substring search instead.
+    """
+    filters = rule_filters(language_id, min_difficulty, max_difficulty)
+
+    runs = cjk_runs(q)
+    if runs:
+        query = ranked_hits_query(substring_hits(runs, filters), substring_highlighter(runs), "substring", limit)
+        result = await db.execute(query)
+        return [SearchHitOut.from_row(SEARCH_HIT_COLUMNS, row) for row in result.all()]
+
+    romanized = normalize_romanization(q)
+    if romanized and len(romanized) < MIN_ROMANIZATION_QUERY:
+        romanized = None
+    romanized_first = looks_romanized(q) or language_id in ROMANIZED_LANGUAGES
+
+    tsquery = func.websearch_to_tsquery(_config, q)
+    highlight = headline_highlighter(tsquery)
+    candidates = text_hits(tsquery, filters, romanized if romanized_first else None)
+    result = await db.execute(ranked_hits_query(candidates, highlight, "text", limit))
+    hits = [SearchHitOut.from_row(SEARCH_HIT_COLUMNS, row) for row in result.all()]
+
+    if len(hits) < limit:
+        found = [hit.rule_id for hit in hits]
+        fallback = fuzzy_hits(q, filters, found, None if romanized_first else romanized)
+        result = await db.execute(ranked_hits_query(fallback, highlight, "fuzzy", limit - len(hits)))
+        hits.extend(SearchHitOut.from_row(SEARCH_HIT_COLUMNS, row) for row in result.all())
+    return hits
@@ -0,0 +1,284 @@
+"""
+Tree queries over the stored treebanks (/treebank/{language_id}/query)
+
+A query (see tree_query.py) is answered in two steps. Candidates are the
+tokens that could be the query's first node, read in analysis_id order from
+one of the (<column>, analysis_id) indexes of the language's partition (see
+UD_PARTITION_BY in models/language_models.py). Every relation of the
+query adds a correlated EXISTS that looks the related token up among the
+tokens of the same sentence, through the (sentence_id, token_id) index, so
+the database only returns tokens whose whole tree shape is present. Python
+then verifies what SQL does not express (!= tests, negated relations and
+distinct nodes) on the tokens of those sentences.
+
+The candidates are scanned in windows of the first node's index, so one
+request reads at most MAX_QUERY_CANDIDATES index entries however rare the
+matches are, and its cursor resumes the scan where it stopped.
+
+Tokens store their strings as dictionary ids (see ud_bulk_loader.py), so the
+values a query tests are first resolved to ids with resolve_facts, and the
+strings of the returned tokens are looked up in the dictionaries.
+"""
+
+from sqlalchemy import select, func, literal, cast, false, or_, tuple_, Integer
+from sqlalchemy.orm import aliased
+
+from api.schemas import TreeMatchOut, TreeNodeOut
+from conllu.reader import index_heads
+from models.language_models import UDFeatureSet, UDLexeme, UDTag, UDTokenAnalysis, UDTreebankSentence
+from tree_query import TOKEN_FIELDS, node_facts
+
+MAX_QUERY_CANDIDATES = 20000
+FIRST_CANDIDATE_WINDOW = 1000
+MAX_CANDIDATE_WINDOW = 20000
+MIN_VERIFY_BATCH = 200
+
+TOKEN_COLUMNS = ('token_id', 'form', 'lemma', 'upos', 'xpos', 'feats', 'head', 'deprel')
+
+TAG_KINDS = ('upos', 'xpos', 'deprel')
+
+# The dictionary column and key behind each string column of a token
+TOKEN_STRINGS = {
+    'form': (UDLexeme.text, UDLexeme.lexeme_id),
+    'lemma': (UDLexeme.text, UDLexeme.lexeme_id),
+    'upos': (UDTag.value, UDTag.tag_id),
+    'xpos': (UDTag.value, UDTag.tag_id),
+    'feats': (UDFeatureSet.feats, UDFeatureSet.feats_id),
+    'deprel': (UDTag.value, UDTag.tag_id),
+}
+
+def token_column(name, table=UDTokenAnalysis):
+    """
+    The `name` string of the token in `table`, looked up from its dictionary id
+
+    A correlated subquery rather than a join: it stays a primary key lookup
+    per returned row, where a join could hash a whole lexicon.
+    """
+    if name not in TOKEN_STRINGS:
+        return getattr(table, name)
+    value, key = TOKEN_STRINGS[name]
+    return select(value).where(key == getattr(table, f"{name}_id")).scalar_subquery().label(name)
+
+def id_column(table, key):
+    """
+    Id column of `table` holding the value of a fact key: a token field or a feature
+    """
+    return getattr(table, f"{key}_id" if key in TOKEN_FIELDS else 'feats_id')
+
+async def resolve_facts(db, language_id, facts):
+    """
+    Dictionary ids of the values tested by `facts`, as {(key, value): set of ids}
+
+    A form or lemma has one lexeme per language and a tag one id; a feature
+    value has the ids of every FEATS string that holds it. Values missing
+    from the dictionaries are missing from the result.
+    """
+    lexemes, tags, features = set(), set(), set()
+    for key, values in facts:
+        for value in values:
+            if key in ('form', 'lemma'):
+                lexemes.add(value)
+            elif key in TAG_KINDS:
+                tags.add((key, value))
+            else:
+                features.add((key, value))
+
+    ids = {}
+    if lexemes:
+        result = await db.execute(
+            select(UDLexeme.text, UDLexeme.lexeme_id)
+            .where(UDLexeme.language_id == language_id, UDLexeme.text.in_(sorted(lexemes)))
+        )
+        for text, lexeme_id in result.all():
+            for key in ('form', 'lemma'):
+                ids[key, text] = {lexeme_id}
+    if tags:
+        result = await db.execute(
+            select(UDTag.kind, UDTag.value, UDTag.tag_id).where(tuple_(UDTag.kind, UDTag.value).in_(sorted(tags)))
+        )
+        for kind, value, tag_id in result.all():
+            ids[kind, value] = {tag_id}
+    if features:
+        result = await db.execute(
+            select(UDFeatureSet.feats_id, UDFeatureSet.features)
+            .where(or_(*(UDFeatureSet.features.contains({key: [value]}) for key, value in sorted(features))))
+        )
+        for feats_id, feature_values in result.all():
+            for key, value in features:
+                if value in feature_values.get(key, ()):
+                    ids.setdefault((key, value), set()).add(feats_id)
+    return ids
+
+def fact_conditions(table, facts, ids):
+    """
+    Conditions on the id columns of `table` for `facts`, whose values `ids` resolves
+
+    Facts on the same column intersect (a FEATS string must hold every
+    feature tested); a fact none of whose values is known matches nothing.
+    """
+    allowed = {}
+    for key, values in facts:
+        found = set().union(*(ids.get((key, value), ()) for value in values))
+        column = id_column(table, key)
+        allowed[column.key] = allowed[column.key] & found if column.key in allowed else found
+    conditions = []
+    for name, found in allowed.items():
+        column = getattr(table, name)
+        if not found:
+            conditions.append(false())
+        else:
+            conditions.append(column == next(iter(found)) if len(found) == 1 else column.in_(sorted(found)))
+    return conditions
+
+def query_facts(tree_query):
+    """
+    Every fact a query's SQL tests: the facts of its nodes and the deprels of its > relations
+    """
+    facts = []
+    for node in tree_query.nodes:
+        facts.extend(node_facts(node))
+        facts.extend(('deprel', relation.deprels) for relation in node.relations if relation.op == '>' and relation.deprels)
+    return facts
+
+def relation_exists(language_id, table, relation, ids):
+    """
+    EXISTS for a token of the same sentence in `relation` to the token of `table`, with its own relations
+    """
+    other = aliased(UDTokenAnalysis)
+    conditions = [
+        other.language_id == language_id,  # a literal, so the lookup only plans the language's partition
+        other.sentence_id == table.sentence_id,
+        *fact_conditions(other, node_facts(relation.node), ids),
+    ]
+    if relation.op == '>':
+        conditions.append(other.head == table.token_id)
+        if relation.deprels:
+            conditions.extend(fact_conditions(other, [('deprel', relation.deprels)], ids))
+    elif relation.op == '<':
+        conditions.append(other.token_id == table.head)
+    elif relation.op == '.':
+        conditions.append(cast(other.token_id, Integer) == cast(table.token_id, Integer) + 1)
+    else:
+        conditions.append(cast(other.token_id, Integer) > cast(table.token_id, Integer))
+    conditions.extend(relation_exists(language_id, other, child, ids) for child in relation.node.relations if not child.negated)
+    return select(literal(1)).where(*conditions).exists()
+
+def anchor_query(language_id, tree_query, ids):
+    """
+    Tokens that could be the query's first node: the first node's index range, in analysis_id order
+    """
+    anchor = UDTokenAnalysis
+    return (
+        select(anchor.analysis_id)
+        .where(anchor.language_id == language_id, *fact_conditions(anchor, node_facts(tree_query.root), ids))
+        .order_by(anchor.analysis_id)
+    )
+
+def candidate_query(language_id, tree_query, ids):
+    """
+    Anchor tokens (analysis_id, sentence_id, token_id) whose sentence holds the query's tree shape
+    """
+    anchor = UDTokenAnalysis
+    return (
+        select(anchor.analysis_id, anchor.sentence_id, anchor.token_id)
+        .where(anchor.language_id == language_id, *fact_conditions(anchor, node_facts(tree_query.root), ids))
+        .where(*(relation_exists(language_id, anchor, relation, ids) for relation in tree_query.root.relations if not relation.negated))
+        .order_by(anchor.analysis_id)
+    )
+
+async def load_sentences(db, language_id, sentence_ids):
+    """
+    Reader-style sentence dicts (text, tokens, heads, children) by sentence_id
+    """
+    sentences = {}
+    result = await db.execute(
+        select(UDTreebankSentence.sentence_id, UDTreebankSentence.sentence_text)
+        .where(UDTreebankSentence.language_id == language_id, UDTreebankSentence.sentence_id.in_(sentence_ids))
+    )
+    for sentence_id, text in result.all():
+        sentences[sentence_id] = {'text': text, 'tokens': []}
+
+    result = await db.execute(
+        select(UDTokenAnalysis.sentence_id, *(token_column(name) for name in TOKEN_COLUMNS))
+        .where(UDTokenAnalysis.language_id == language_id, UDTokenAnalysis.sentence_id.in_(sentence_ids))
+        .order_by(UDTokenAnalysis.sentence_id, UDTokenAnalysis.analysis_id)
+    )
+    for sentence_id, token_id, *values in result.all():
+        token = dict(zip(TOKEN_COLUMNS[1:], values), id=token_id)
+        for name in ('feats', 'head'):
+            token[name] = token[name] or ''
+        sentences[sentence_id]['tokens'].append(token)
+
+    for sentence in sentences.values():
+        sentence['heads'], sentence['children'] = index_heads(sentence['tokens'])
+        sentence['positions'] = {token['id']: index for index, token in enumerate(sentence['tokens'])}
+    return sentences
+
+def match_out(analysis_id, sentence_id, sentence, binding):
+    tokens = sentence['tokens']
+    return TreeMatchOut.model_construct(
+        analysis_id=analysis_id,
+        sentence_id=sentence_id,
+        sentence_text=sentence['text'],
+        nodes={
+            name: TreeNodeOut.model_construct(
+                token_id=tokens[index]['id'],
+                form=tokens[index]['form'],
+                lemma=tokens[index]['lemma'],
+                upos=tokens[index]['upos'],
+                deprel=tokens[index]['deprel'],
+            )
+            for name, index in binding.items()
+        },
+    )
+
+async def query_treebank(db, language_id, tree_query, cursor=None, limit=20, max_candidates=MAX_QUERY_CANDIDATES):
+    """
+    Matches of a compiled TreeQuery in one language's treebank, and the cursor to continue from
+
+    Matches come in anchor (analysis_id) order. A page holds `limit`
+    matches, plus any further matches on its last anchor token so that no
+    anchor is split across pages; it holds fewer when `max_candidates` anchor
+    tokens were scanned first. The cursor is None once the scan is complete.
+    """
+    ids = await resolve_facts(db, language_id, query_facts(tree_query))
+    anchors = anchor_query(language_id, tree_query, ids)
+    candidates = candidate_query(language_id, tree_query, ids)
+    matches = []
+    scanned = 0
+    window = FIRST_CANDIDATE_WINDOW
+    verify_batch = max(2 * limit, MIN_VERIFY_BATCH)
+    while scanned < max_candidates:
+        window = min(window, max_candidates - scanned)
+        # First and last anchor of the window. Bounding the candidates on both
+        # sides keeps the planner on the anchor index instead of the primary key.
+        scan = anchors if cursor is None else anchors.where(UDTokenAnalysis.analysis_id > cursor)
+        scan = scan.limit(window).subquery()
+        first, last, count = (await db.execute(
+            select(func.min(scan.c.analysis_id), func.max(scan.c.analysis_id), func.count())
+        )).one()
+        if not count:
+            return matches, None
+        final = count < window
+
+        rows = (await db.execute(
+            candidates.where(UDTokenAnalysis.analysis_id.between(first, last)).limit(verify_batch)
+        )).all()
+        if len(rows) == verify_batch:
+            # Verify the window up to here first; the rest is the next window
+            last, final = rows[-1].analysis_id, False
+        sentences = await load_sentences(db, language_id, list({row.sentence_id for row in rows})) if rows else {}
+
+        for position, row in enumerate(rows):
+            sentence = sentences[row.sentence_id]
+            for binding in tree_query.matches_at(sentence, sentence['positions'][row.token_id]):
+                matches.append(match_out(row.analysis_id, row.sentence_id, sentence, binding))
+            if len(matches) >= limit and not (final and position == len(rows) - 1):
+                return matches, row.analysis_id
+
+        if final:
+            return matches, None
+        cursor = last
+        scanned += window
+        window = min(window * 4, MAX_CANDIDATE_WINDOW)
+    return matches, cursor
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark /treebank/{language_id}/concordance queries against the database in DATABASE_URL
+
+Times query_concordance (the endpoint minus serialization) for the most and
+least frequent lemma, UPOS tag and deprel of the language and prints the
+median; the latency budget is 50 ms on a multi-million-token table.
+
+Usage:
+    python benchmarks/bench_concordance.py <language_id>
+"""
+
+import os
+import sys
+import asyncio
+import statistics
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select, func
+
+from api.routes.treebank import query_concordance
+from api.treebank import TOKEN_STRINGS
+from config.database import AsyncSessionLocal
+from models.language_models import UDTokenAnalysis
+
+async def time_query(db, language_id, filters, repeat=9):
+    await query_concordance(db, language_id, **filters)  # warm up plans and buffers
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        lines, _ = await query_concordance(db, language_id, **filters)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), lines
+
+async def frequency_extremes(db, language_id, name):
+    value, key = TOKEN_STRINGS[name]
+    column = getattr(UDTokenAnalysis, f"{name}_id")
+    counts = (await db.execute(
+        select(value, func.count())
+        .select_from(UDTokenAnalysis)
+        .join(key.class_, key == column)
+        .where(UDTokenAnalysis.language_id == language_id)
+        .group_by(value)
+        .order_by(func.count().desc())
+    )).all()
+    return [counts[0][0], counts[-1][0]] if counts else []
+
+async def main():
+    language_id = sys.argv[1]
+    async with AsyncSessionLocal() as db:
+        token_count = (await db.execute(
+            select(func.count()).where(UDTokenAnalysis.language_id == language_id)
+        )).scalar()
+        print(f"{token_count:,} {language_id} tokens")
+        for name in ("lemma", "upos", "deprel"):
+            for value in await frequency_extremes(db, language_id, name):
+                elapsed, lines = await time_query(db, language_id, {name: value})
+                print(f"  {name}={value!r:24} {elapsed * 1000:7.1f} ms  {len(lines):3} lines")
+
+if __name__ == '__main__':
+    asyncio.run(main())
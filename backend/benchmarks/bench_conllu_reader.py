@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark the shared CoNLL-U reader against the original list-building parser
+
+The parsers read the whole file REPEAT times each, taking turns so that drift
+in machine speed affects both alike, and the median runs are compared; single
+runs vary by 30% or more from one invocation to the next.
+
+Usage:
+    python benchmarks/bench_conllu_reader.py [path/to/file.conllu]
+
+Without a path a synthetic treebank is generated in a temporary file.
+"""
+
+import os
+import sys
+import random
+import statistics
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conllu.reader import read_conllu_file
+
+REPEAT = 5
+
+def legacy_parse_conllu_file(file_path):
+    """
+    The parser previously copy-pasted across the ingestion scripts, kept as a baseline
+    """
+    sentences = []
+    
+    with open(file_path, 'r', encoding='utf-8') as f:
+        current_sentence = []
+        sentence_text = ""
+        
+        for line in f:
+            line = line.strip()
+            
+            if line.startswith('# text = '):
+                sentence_text = line[9:]
+            
+            elif line.startswith('#'):
+                continue
+            
+            elif not line:
+                if current_sentence and sentence_text:
+                    sentences.append({
+                        'text': sentence_text,
+                        'tokens': current_sentence
+                    })
+                current_sentence = []
+                sentence_text = ""
+            
+            else:
+                parts = line.split('\t')
+                if len(parts) >= 10 and '-' not in parts[0]:
+                    token_info = {
+                        'id': parts[0],
+                        'form': parts[1],
+                        'lemma': parts[2],
+                        'upos': parts[3],
+                        'xpos': parts[4],
+                        'feats': parts[5],
+                        'head': parts[6],
+                        'deprel': parts[7],
+                        'deps': parts[8],
+                        'misc': parts[9]
+                    }
+                    current_sentence.append(token_info)
+    
+    return sentences
+
+def write_synthetic_treebank(path, sentence_count=20000, seed=13):
+    """
+    Write a random but well-formed CoNLL-U file for benchmarking
+    """
+    rng = random.Random(seed)
+    upos_tags = ['NOUN', 'VERB', 'ADJ', 'DET', 'ADP', 'PRON', 'ADV', 'PUNCT']
+    deprels = ['nsubj', 'obj', 'amod', 'det', 'case', 'advmod', 'obl', 'punct']
+    feats = ['Case=Nom|Gender=Masc|Number=Sing', 'Case=Acc|Number=Plur', 'Mood=Ind|Tense=Pres', '_']
+    
+    with open(path, 'w', encoding='utf-8') as f:
+        for s in range(sentence_count):
+            length = rng.randint(5, 40)
+            forms = [f"w{rng.randint(0, 5000)}" for _ in range(length)]
+            f.write(f"# sent_id = s{s}\n# text = {' '.join(forms)}\n")
+            for i, form in enumerate(forms, start=1):
+                head = 0 if i == 1 else rng.randint(1, i - 1)
+                f.write('\t'.join([
+                    str(i), form, form.lower(), rng.choice(upos_tags), '_',
+                    rng.choice(feats), str(head), 'root' if head == 0 else rng.choice(deprels), '_', '_'
+                ]) + '\n')
+            f.write('\n')
+
+def time_parser(parse):
+    start = time.perf_counter()
+    token_count = 0
+    sentence_count = 0
+    for sentence in parse():
+        sentence_count += 1
+        token_count += len(sentence['tokens'])
+    return sentence_count, token_count, time.perf_counter() - start
+
+def report(label, runs):
+    sentence_count, token_count, _ = runs[0]
+    elapsed = statistics.median(run[2] for run in runs)
+    print(f"  {label:<10} {sentence_count:>8} sentences {token_count:>10} tokens "
+          f"{elapsed:8.2f}s {token_count / elapsed:>12,.0f} tokens/sec")
+    return token_count / elapsed
+
+def main():
+    if len(sys.argv) > 1:
+        path = sys.argv[1]
+        cleanup = False
+    else:
+        handle, path = tempfile.mkstemp(suffix='.conllu')
+        os.close(handle)
+        write_synthetic_treebank(path)
+        cleanup = True
+    
+    print(f"📊 CoNLL-U parser benchmark: {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+    try:
+        legacy_runs, streaming_runs = [], []
+        for _ in range(REPEAT):
+            legacy_runs.append(time_parser(lambda: legacy_parse_conllu_file(path)))
+            streaming_runs.append(time_parser(lambda: read_conllu_file(path)))
+        legacy = report('legacy', legacy_runs)
+        streaming = report('conllu', streaming_runs)
+        print(f"  Speedup: {streaming / legacy:.2f}x")
+    finally:
+        if cleanup:
+            os.remove(path)
+
+if __name__ == '__main__':
+    main()
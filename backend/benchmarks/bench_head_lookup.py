@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Benchmark head-token lookup: linear scan per token versus the precomputed head index
+
+Usage:
+    python benchmarks/bench_head_lookup.py [sentence_length ...]
+"""
+
+import os
+import sys
+import random
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conllu.reader import index_heads, get_head
+
+def make_sentence(length, rng):
+    tokens = []
+    for i in range(1, length + 1):
+        head = 0 if i == 1 else rng.randint(1, i - 1)
+        tokens.append({'id': str(i), 'form': f'w{i}', 'head': str(head), 'upos': 'NOUN', 'deprel': 'nmod'})
+    heads, children = index_heads(tokens)
+    return {'text': '', 'tokens': tokens, 'heads': heads, 'children': children}
+
+def scan_lookup(sentences):
+    found = 0
+    for sentence in sentences:
+        tokens = sentence['tokens']
+        for token in tokens:
+            head_token = next((t for t in tokens if t['id'] == token['head']), None)
+            if head_token:
+                found += 1
+    return found
+
+def indexed_lookup(sentences):
+    found = 0
+    for sentence in sentences:
+        for i in range(len(sentence['tokens'])):
+            if get_head(sentence, i):
+                found += 1
+    return found
+
+def main():
+    lengths = [int(arg) for arg in sys.argv[1:]] or [10, 40, 120]
+    rng = random.Random(7)
+    
+    print("📊 Head lookup benchmark (2,000 sentences per length)")
+    for length in lengths:
+        sentences = [make_sentence(length, rng) for _ in range(2000)]
+        timings = []
+        for lookup in (scan_lookup, indexed_lookup):
+            start = time.perf_counter()
+            lookup(sentences)
+            timings.append(time.perf_counter() - start)
+        print(f"  length {length:>4}: scan {timings[0]:7.3f}s  indexed {timings[1]:7.3f}s  "
+              f"speedup {timings[0] / timings[1]:6.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark serializing a rule list response: ORM objects through
+jsonable_encoder and json.dumps (FastAPI's default path) versus RuleOut
+schemas built from column tuples and encoded with orjson
+
+No database is needed: transient ORM objects and row tuples with the same
+content are built in memory.
+
+Usage:
+    python benchmarks/bench_rule_serialization.py [rule_count] [examples_per_rule]
+"""
+
+import os
+import sys
+import json
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm.attributes import set_committed_value
+
+from api.schemas import (
+    RuleOut, ExampleOut, LanguageOut, dump_json,
+    RULE_COLUMNS, EXAMPLE_COLUMNS, LANGUAGE_COLUMNS,
+)
+from models.language_models import GrammarRule, RuleExample, Language
+
+def make_rows(rule_count, examples_per_rule):
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    language_row = ('zh', 'Chinese', 'Sino-Tibetan', 'Hanzi', now)
+    rule_rows = []
+    example_rows = []
+    for rule_id in range(1, rule_count + 1):
+        rule_rows.append((
+            rule_id, 'zh', rule_id % 40, f'Rule {rule_id}', f'Description of grammar rule {rule_id} ' * 4,
+            'written', rule_id % 5 + 1, True, now, now
+        ))
+        for n in range(examples_per_rule):
+            example_rows.append((
+                rule_id * 10 + n, rule_id, f'我吃苹果{n}。 (Wǒ chī píngguǒ.) - I eat apples.',
+                'I eat apples.', 'Wǒ chī píngguǒ.', None, None
+            ))
+    return language_row, rule_rows, example_rows
+
+def orm_payload(language_row, rule_rows, example_rows):
+    """
+    ORM objects shaped like a joinedload(language, examples) result
+    """
+    # set_committed_value fills relationships as a load would, without backref events
+    language = Language(**dict(zip(LANGUAGE_COLUMNS, language_row)))
+    examples = {}
+    for row in example_rows:
+        examples.setdefault(row[1], []).append(RuleExample(**dict(zip(EXAMPLE_COLUMNS, row))))
+    rules = []
+    for row in rule_rows:
+        rule = GrammarRule(**dict(zip(RULE_COLUMNS, row)))
+        set_committed_value(rule, 'language', language)
+        set_committed_value(rule, 'examples', examples.get(rule.rule_id, []))
+        rules.append(rule)
+    return rules
+
+def encode_orm(rules):
+    return json.dumps(jsonable_encoder(rules), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def encode_schemas(language_row, rule_rows, example_rows):
+    language = LanguageOut.from_row(LANGUAGE_COLUMNS, language_row)
+    examples = {}
+    for row in example_rows:
+        examples.setdefault(row[1], []).append(ExampleOut.from_row(EXAMPLE_COLUMNS, row))
+    rules = [
+        RuleOut.from_row(RULE_COLUMNS, row, examples=examples.get(row[0], []), language=language)
+        for row in rule_rows
+    ]
+    return dump_json(rules)
+
+def best_of(function, *args, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), len(body)
+
+def main():
+    rule_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1200
+    examples_per_rule = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    rows = make_rows(rule_count, examples_per_rule)
+    orm_rules = orm_payload(*rows)
+
+    orm_time, orm_size = best_of(encode_orm, orm_rules)
+    schema_time, schema_size = best_of(encode_schemas, *rows)
+
+    print(f"{rule_count} rules, {examples_per_rule} examples each")
+    print(f"  ORM + jsonable_encoder + json: {orm_time * 1000:8.1f} ms  ({orm_size:,} bytes)")
+    print(f"  RuleOut rows + orjson:         {schema_time * 1000:8.1f} ms  ({schema_size:,} bytes)")
+    print(f"  speedup: {orm_time / schema_time:.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Benchmark /grammar/search queries against the database in DATABASE_URL
+
+Times search_rules (the endpoint minus the response cache) for each query and
+prints the median; the latency budget is 20 ms at 1M examples. Queries that
+find fewer full-text hits than the limit include the trigram fallback, so the
+database needs pg_trgm (and the trigram indexes) for the timings to mean
+anything.
+
+Usage:
+    python benchmarks/bench_search.py [query ...]
+"""
+
+import os
+import sys
+import asyncio
+import statistics
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select, func, text
+
+from api.search import search_rules
+from config.database import AsyncSessionLocal
+from models.language_models import RuleExample
+
+DEFAULT_QUERIES = ["verb", "past tense", "particle", "I eat apples", "subjunctiv", "case"]
+
+async def time_query(db, q, repeat=9):
+    await search_rules(db, q)  # warm up plans and buffers
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        hits = await search_rules(db, q)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), hits
+
+async def main():
+    queries = sys.argv[1:] or DEFAULT_QUERIES
+    async with AsyncSessionLocal() as db:
+        if not (await db.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))).scalar():
+            sys.exit("pg_trgm is not installed in this database; the fuzzy fallback cannot run")
+        example_count = (await db.execute(select(func.count(RuleExample.example_id)))).scalar()
+        print(f"{example_count:,} examples")
+        for q in queries:
+            elapsed, hits = await time_query(db, q)
+            fuzzy = sum(1 for hit in hits if hit.match == "fuzzy")
+            print(f"  {q!r:24} {elapsed * 1000:7.1f} ms  {len(hits):3} hits ({fuzzy} fuzzy)")
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark /treebank/{language_id}/query tree queries against the database in DATABASE_URL
+
+Times query_treebank (the endpoint minus serialization) for one page of each
+query and prints the median. A page scans at most MAX_QUERY_CANDIDATES
+anchor tokens, so its time should not grow with the size of the treebank.
+
+Usage:
+    python benchmarks/bench_tree_query.py <language_id> [query ...]
+"""
+
+import os
+import sys
+import asyncio
+import statistics
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select, func
+
+from api.treebank import query_treebank
+from config.database import AsyncSessionLocal
+from models.language_models import UDTreebankSentence
+from tree_query import compile_query
+
+DEFAULT_QUERIES = [
+    "VERB >nsubj NOUN >obj NOUN",
+    "VERB=verb >compound:prt _=prefix",
+    "NOUN <obl (VERB >aux AUX)",
+    "[upos=NOUN Case=Dat] <nsubj _",
+    "ADJ . NOUN",
+]
+
+async def time_query(db, language_id, tree_query, repeat=5):
+    await query_treebank(db, language_id, tree_query)  # warm up plans and buffers
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        matches, cursor = await query_treebank(db, language_id, tree_query)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), matches, cursor
+
+async def main():
+    language_id = sys.argv[1]
+    queries = sys.argv[2:] or DEFAULT_QUERIES
+    async with AsyncSessionLocal() as db:
+        sentence_count = (await db.execute(
+            select(func.count()).where(UDTreebankSentence.language_id == language_id)
+        )).scalar()
+        print(f"{sentence_count:,} {language_id} sentences")
+        for q in queries:
+            elapsed, matches, cursor = await time_query(db, language_id, compile_query(q))
+            more = "more" if cursor is not None else "done"
+            print(f"  {q!r:36} {elapsed * 1000:7.1f} ms  {len(matches):3} matches ({more})")
+
+if __name__ == '__main__':
+    asyncio.run(main())
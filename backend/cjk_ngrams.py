@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Character n-grams of Chinese and Japanese text
+
+Postgres's text search parser does not segment Chinese or Japanese: a whole
+run of hanzi or kana becomes a single token, so a search for "了" or "は"
+never matches the sentences containing them. Instead every example's runs of
+CJK characters are cut into character unigrams and bigrams, stored in the
+rule_example_ngrams table (see models/language_models.py).
+
+A substring query is answered from that table: a one-character query is a
+single unigram lookup, and a longer one takes the examples holding all of
+its bigrams as candidates, confirmed with a plain substring test.
+
+    python cjk_ngrams.py    # (re)build rule_example_ngrams for every example
+"""
+
+import io
+import re
+import time
+
+# Han ideographs (with extensions and compatibility forms), the iteration
+# marks 々〆〇, hiragana, katakana and halfwidth katakana. Hangul is left out:
+# Korean separates words with spaces, so full-text search already handles it.
+CJK_RUN = re.compile(
+    '[\u3005-\u3007\u3040-\u30ff\u31f0-\u31ff\u3400-\u4dbf\u4e00-\u9fff'
+    '\uf900-\ufaff\uff66-\uff9f\U00020000-\U0002fa1f]+'
+)
+
+def cjk_runs(text):
+    """
+    Maximal runs of CJK characters in `text`, in order
+    """
+    return CJK_RUN.findall(text or '')
+
+def text_ngrams(text):
+    """
+    Distinct character unigrams and bigrams of the CJK runs in `text`
+    """
+    grams = set()
+    for run in cjk_runs(text):
+        grams.update(run)
+        grams.update(run[i:i + 2] for i in range(len(run) - 1))
+    return grams
+
+def query_ngrams(runs):
+    """
+    Grams an example must hold to contain every run, in query order: the
+    bigrams of each run, or its character when the run is one character long
+    """
+    grams = []
+    for run in runs:
+        run_grams = [run] if len(run) == 1 else [run[i:i + 2] for i in range(len(run) - 1)]
+        grams.extend(gram for gram in run_grams if gram not in grams)
+    return grams
+
+# Constraints and indexes of rule_example_ngrams, dropped while the table is
+# refilled and created again afterwards: one sort per index and a single
+# foreign key check are far cheaper than maintaining them row by row.
+NGRAM_TABLE_INDEXES = (
+    ("ALTER TABLE rule_example_ngrams DROP CONSTRAINT IF EXISTS rule_example_ngrams_example_id_fkey",
+     "ALTER TABLE rule_example_ngrams ADD CONSTRAINT rule_example_ngrams_example_id_fkey "
+     "FOREIGN KEY (example_id) REFERENCES rule_examples (example_id) ON DELETE CASCADE"),
+    ("ALTER TABLE rule_example_ngrams DROP CONSTRAINT IF EXISTS rule_example_ngrams_pkey",
+     "ALTER TABLE rule_example_ngrams ADD CONSTRAINT rule_example_ngrams_pkey PRIMARY KEY (gram, example_id)"),
+    ("DROP INDEX IF EXISTS ix_rule_example_ngrams_example_id",
+     "CREATE INDEX ix_rule_example_ngrams_example_id ON rule_example_ngrams (example_id)"),
+)
+
+def rebuild_example_ngrams(batch_size=5000):
+    """
+    Rebuild rule_example_ngrams from every example, streaming the grams with COPY
+
+    The ORM keeps the table up to date as examples are written; this is for
+    examples loaded around the ORM, and for filling the table the first time.
+    It runs in one transaction that locks the table, so searches in Chinese
+    and Japanese wait until it commits.
+    """
+    from sqlalchemy import text
+    from config.database import engine
+    from ud_bulk_loader import copy_row
+
+    start = time.time()
+    example_count = gram_count = 0
+    with engine.begin() as connection:
+        connection.execute(text("TRUNCATE rule_example_ngrams"))
+        for drop, _ in NGRAM_TABLE_INDEXES:
+            connection.execute(text(drop))
+
+        cursor = connection.connection.cursor()
+        last_id = 0
+        while True:
+            rows = connection.execute(
+                text(
+                    "SELECT example_id, example_sentence FROM rule_examples "
+                    "WHERE example_id > :last_id ORDER BY example_id LIMIT :batch_size"
+                ),
+                {"last_id": last_id, "batch_size": batch_size},
+            ).all()
+            if not rows:
+                break
+            buffer = io.StringIO()
+            for example_id, sentence in rows:
+                for gram in text_ngrams(sentence):
+                    buffer.write(copy_row((gram, example_id)))
+                    gram_count += 1
+            buffer.seek(0)
+            cursor.copy_expert("COPY rule_example_ngrams (gram, example_id) FROM STDIN", buffer)
+            example_count += len(rows)
+            last_id = rows[-1][0]
+
+        for _, create in reversed(NGRAM_TABLE_INDEXES):
+            connection.execute(text(create))
+        connection.execute(text("ANALYZE rule_example_ngrams"))
+
+    print(f"✅ Indexed {example_count} examples: {gram_count} n-grams in {time.time() - start:.1f}s")
+
+if __name__ == '__main__':
+    rebuild_example_ngrams()
@@ -0,0 +1,5 @@
+"""
+CoNLL-U reading utilities shared by the UD ingestion scripts
+"""
+
+from conllu.reader import iter_sentences, read_conllu_file, parse_feats, index_heads, get_head, SentenceCounter
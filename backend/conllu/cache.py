@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Binary parsed-treebank cache
+
+The first load of a .conllu file writes a compact cache next to it
+(`<file>.conllu.cols`) holding the TreebankColumns arrays, the sentence text
+blobs and the vocabulary. Later loads memory-map that file instead of parsing
+the treebank again.
+
+A cache is used when the path, size and mtime of the source file match the
+ones recorded in its header. If only the mtime changed (a fresh checkout or
+copy of the same data), the content hash decides, and a matching cache gets
+the new mtime written into its header so the next load skips the hash.
+
+Layout:
+    8 bytes   magic
+    8 bytes   header length (little endian)
+    header    JSON: source key, counts and the offset/typecode of each section
+    sections  raw array / blob bytes, each aligned to 8 bytes
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import sys
+from array import array
+
+from conllu.columns import TreebankColumns, Vocabulary, STRING_COLUMNS
+
+CACHE_SUFFIX = '.cols'
+CACHE_MAGIC = b'UDCOLS01'
+CACHE_VERSION = 1
+
+def cache_path_for(file_path):
+    return file_path + CACHE_SUFFIX
+
+def file_hash(file_path, chunk_size=1 << 20):
+    """
+    BLAKE2b digest of a file's content, read in chunks
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _source_key(file_path, content_hash=None):
+    stat = os.stat(file_path)
+    return {
+        'path': os.path.abspath(file_path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'hash': content_hash
+    }
+
+def _sections(treebank):
+    """
+    Name, typecode and buffer of every section written to the cache
+    """
+    sections = [(f'column:{name}', 'I', treebank.columns[name]) for name in STRING_COLUMNS]
+    sections += [
+        ('heads', 'i', treebank.heads),
+        ('sentence_offsets', 'Q', treebank.sentence_offsets),
+        ('text_offsets', 'Q', treebank.text_offsets),
+        ('sent_id_offsets', 'Q', treebank.sent_id_offsets),
+        ('texts', 'B', treebank.texts),
+        ('sent_ids', 'B', treebank.sent_ids),
+        ('vocab', 'B', '\n'.join(treebank.vocab.strings).encode('utf-8')),
+    ]
+    return sections
+
+def write_treebank_cache(treebank, file_path, content_hash=None):
+    """
+    Write `treebank` as the cache for `file_path`, atomically
+    """
+    cache_path = cache_path_for(file_path)
+    sections = _sections(treebank)
+
+    layout = []
+    offset = 0
+    for name, typecode, buffer in sections:
+        length = memoryview(buffer).nbytes
+        layout.append({'name': name, 'typecode': typecode, 'offset': offset, 'length': length})
+        offset += length + (-length % 8)
+
+    header = json.dumps({
+        'version': CACHE_VERSION,
+        'byteorder': sys.byteorder,
+        'itemsizes': {code: array(code).itemsize for code in 'IiQ'},
+        'source': _source_key(file_path, content_hash or file_hash(file_path)),
+        'sentence_count': len(treebank),
+        'token_count': treebank.token_count,
+        'vocab_size': len(treebank.vocab),
+        'sections': layout
+    }).encode('utf-8')
+    header += b' ' * (-len(header) % 8)
+
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(CACHE_MAGIC)
+        f.write(len(header).to_bytes(8, 'little'))
+        f.write(header)
+        for (name, typecode, buffer), section in zip(sections, layout):
+            f.write(memoryview(buffer).cast('B'))
+            f.write(b'\0' * (-section['length'] % 8))
+    os.replace(temp_path, cache_path)
+    return cache_path
+
+def _read_header(cache_path):
+    with open(cache_path, 'rb') as f:
+        if f.read(8) != CACHE_MAGIC:
+            return None, 0
+        header_length = int.from_bytes(f.read(8), 'little')
+        return json.loads(f.read(header_length)), 16 + header_length
+
+def _update_source_mtime(cache_path, header, mtime_ns):
+    """
+    Rewrite the header in place with the source's new mtime; False if it no longer fits
+    """
+    header['source']['mtime_ns'] = mtime_ns
+    encoded = json.dumps(header).encode('utf-8')
+    with open(cache_path, 'r+b') as f:
+        f.seek(8)
+        header_length = int.from_bytes(f.read(8), 'little')
+        if len(encoded) > header_length:
+            return False
+        f.write(encoded + b' ' * (header_length - len(encoded)))
+    return True
+
+def _is_current(header, file_path, cache_path):
+    """
+    Check the cache header against the source file: path, size, mtime, then hash
+    """
+    if header.get('version') != CACHE_VERSION or header.get('byteorder') != sys.byteorder:
+        return False
+    if header.get('itemsizes') != {code: array(code).itemsize for code in 'IiQ'}:
+        return False
+
+    cached = header['source']
+    current = _source_key(file_path)
+    if cached['path'] != current['path'] or cached['size'] != current['size']:
+        return False
+    if cached['mtime_ns'] == current['mtime_ns']:
+        return True
+    if cached['hash'] != file_hash(file_path):
+        return False
+    try:
+        return _update_source_mtime(cache_path, header, current['mtime_ns'])
+    except OSError:
+        return True  # read-only cache: still valid, only checked by hash again next time
+
+def open_treebank_cache(file_path):
+    """
+    Memory-map the cache for `file_path`, or return None if it is missing or stale
+    """
+    cache_path = cache_path_for(file_path)
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        header, data_start = _read_header(cache_path)
+        if not header or not _is_current(header, file_path, cache_path):
+            return None
+        with open(cache_path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Ignoring treebank cache {cache_path}: {e}")
+        return None
+
+    view = memoryview(mapped)
+    buffers = {}
+    for section in header['sections']:
+        start = data_start + section['offset']
+        buffers[section['name']] = view[start:start + section['length']].cast(section['typecode'])
+
+    vocab_blob = bytes(buffers['vocab']).decode('utf-8')
+    vocab = Vocabulary(vocab_blob.split('\n') if header['vocab_size'] else [])
+
+    return TreebankColumns(
+        vocab=vocab,
+        columns={name: buffers[f'column:{name}'] for name in STRING_COLUMNS},
+        heads=buffers['heads'],
+        sentence_offsets=buffers['sentence_offsets'],
+        texts=buffers['texts'],
+        text_offsets=buffers['text_offsets'],
+        sent_ids=buffers['sent_ids'],
+        sent_id_offsets=buffers['sent_id_offsets']
+    )
+
+def load_treebank(file_path, use_cache=True):
+    """
+    Load a treebank into TreebankColumns, going through the binary cache
+
+    A missing or stale cache is rebuilt after parsing. If the cache cannot be
+    written (for example a read-only treebank directory) the parsed store is
+    still returned.
+    """
+    if use_cache:
+        treebank = open_treebank_cache(file_path)
+        if treebank is not None:
+            return treebank
+
+    treebank = TreebankColumns.from_conllu_file(file_path)
+
+    if use_cache and len(treebank):
+        try:
+            write_treebank_cache(treebank, file_path)
+        except OSError as e:
+            print(f"Could not write treebank cache for {file_path}: {e}")
+
+    return treebank
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Columnar, array-backed in-memory treebank store
+
+Token dicts of ten Python strings cost around 1 KB per token. TreebankColumns
+keeps every CoNLL-U string column as an array of integer ids into one shared
+interned vocabulary, heads as sentence-relative indexes, and sentence
+boundaries as offsets into those arrays, which brings a token down to a few
+dozen bytes. Only the basic syntactic words are stored; multi-word token
+ranges and empty nodes are not kept.
+
+Sentences are materialized on demand in the same dict shape that
+conllu.reader yields, so the pattern extractors work unchanged, while
+whole-corpus statistics such as UPOS counts run directly on the arrays.
+"""
+
+from array import array
+from collections import Counter
+
+from conllu.reader import read_conllu_file
+
+STRING_COLUMNS = ('form', 'lemma', 'upos', 'xpos', 'feats', 'deprel', 'deps', 'misc')
+
+class Vocabulary:
+    """
+    Bidirectional string <-> integer id map shared by all string columns
+    """
+
+    def __init__(self, strings=None):
+        self.strings = list(strings) if strings else []
+        self._ids = None
+
+    @property
+    def ids(self):
+        # Built lazily: stores loaded read-only never need the reverse map
+        if self._ids is None:
+            self._ids = {string: index for index, string in enumerate(self.strings)}
+        return self._ids
+
+    def intern(self, string):
+        ids = self.ids
+        index = ids.get(string)
+        if index is None:
+            index = len(self.strings)
+            ids[string] = index
+            self.strings.append(string)
+        return index
+
+    def lookup(self, string):
+        """
+        Return the id of `string`, or None if it never occurs in the treebank
+        """
+        return self.ids.get(string)
+
+    def __getitem__(self, index):
+        return self.strings[index]
+
+    def __len__(self):
+        return len(self.strings)
+
+class TreebankColumns:
+    """
+    A treebank held as parallel integer columns with per-sentence offsets
+    """
+
+    def __init__(self, vocab=None, columns=None, heads=None, sentence_offsets=None,
+                 texts=None, text_offsets=None, sent_ids=None, sent_id_offsets=None):
+        self.vocab = vocab if vocab is not None else Vocabulary()
+        self.columns = columns if columns is not None else {name: array('I') for name in STRING_COLUMNS}
+        self.heads = heads if heads is not None else array('i')
+        # Token offset of sentence i is sentence_offsets[i]; one extra entry marks the end
+        self.sentence_offsets = sentence_offsets if sentence_offsets is not None else array('Q', [0])
+        # Sentence text and sent_id are UTF-8 blobs sliced by byte offsets
+        self.texts = texts if texts is not None else bytearray()
+        self.text_offsets = text_offsets if text_offsets is not None else array('Q', [0])
+        self.sent_ids = sent_ids if sent_ids is not None else bytearray()
+        self.sent_id_offsets = sent_id_offsets if sent_id_offsets is not None else array('Q', [0])
+
+    @classmethod
+    def from_sentences(cls, sentences):
+        """
+        Build a store from any iterable of parsed sentences, consuming it once
+        """
+        treebank = cls()
+        for sentence in sentences:
+            treebank.append(sentence)
+        return treebank
+
+    @classmethod
+    def from_conllu_file(cls, file_path):
+        return cls.from_sentences(read_conllu_file(file_path))
+
+    def append(self, sentence):
+        intern = self.vocab.intern
+        tokens = sentence['tokens']
+        for name, column in self.columns.items():
+            column.extend([intern(token[name]) for token in tokens])
+        self.heads.extend(sentence['heads'])
+        self.sentence_offsets.append(self.sentence_offsets[-1] + len(tokens))
+
+        self.texts += sentence['text'].encode('utf-8')
+        self.text_offsets.append(len(self.texts))
+        self.sent_ids += (sentence.get('sent_id') or '').encode('utf-8')
+        self.sent_id_offsets.append(len(self.sent_ids))
+
+    def __len__(self):
+        return len(self.sentence_offsets) - 1
+
+    @property
+    def token_count(self):
+        return self.sentence_offsets[-1]
+
+    def sentence_text(self, index):
+        return bytes(self.texts[self.text_offsets[index]:self.text_offsets[index + 1]]).decode('utf-8')
+
+    def sentence_id(self, index):
+        sent_id = bytes(self.sent_ids[self.sent_id_offsets[index]:self.sent_id_offsets[index + 1]])
+        return sent_id.decode('utf-8') or None
+
+    def sentence(self, index):
+        """
+        Materialize sentence `index` as a reader-style dict
+        """
+        start = self.sentence_offsets[index]
+        end = self.sentence_offsets[index + 1]
+        strings = self.vocab.strings
+        column_values = [
+            (name, [strings[value] for value in column[start:end]])
+            for name, column in self.columns.items()
+        ]
+        heads = list(self.heads[start:end])
+        children = [[] for _ in heads]
+
+        tokens = []
+        for position, head_index in enumerate(heads):
+            token = {name: values[position] for name, values in column_values}
+            token['id'] = str(position + 1)
+            token['head'] = str(head_index + 1)  # Root (-1) becomes '0'
+            tokens.append(token)
+            if head_index >= 0:
+                children[head_index].append(position)
+
+        return {
+            'sent_id': self.sentence_id(index),
+            'text': self.sentence_text(index),
+            'tokens': tokens,
+            'multiword_tokens': [],
+            'empty_nodes': [],
+            'metadata': {},
+            'heads': heads,
+            'children': children
+        }
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.sentence(index)
+
+    def column_counts(self, name):
+        """
+        Count the values of a string column across the whole treebank
+        """
+        strings = self.vocab.strings
+        return Counter({strings[value]: count for value, count in Counter(self.columns[name]).items()})
+
+    def memory_usage(self):
+        """
+        Approximate bytes held by the arrays and blobs (vocabulary excluded)
+        """
+        buffers = list(self.columns.values()) + [
+            self.heads, self.sentence_offsets, self.texts, self.text_offsets,
+            self.sent_ids, self.sent_id_offsets
+        ]
+        return sum(memoryview(buffer).nbytes for buffer in buffers)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Several treebank files read as one deduplicated corpus
+
+UD languages often have several treebanks, and the same sentence can appear in
+more than one of them (PUD sentences, shared sources, re-annotations). A
+TreebankCorpus reads a list of TreebankColumns as one corpus and skips any
+sentence whose text was already seen in an earlier file. It offers the same
+read interface as TreebankColumns (iteration, len, token_count,
+column_counts), so the analysis functions accept either.
+"""
+
+import hashlib
+import os
+from array import array
+from collections import Counter
+
+from conllu.cache import load_treebank
+
+def _text_key(treebank, index):
+    start = treebank.text_offsets[index]
+    end = treebank.text_offsets[index + 1]
+    digest = hashlib.blake2b(bytes(treebank.texts[start:end]).strip(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+class TreebankCorpus:
+    """
+    Read-only view over several TreebankColumns with duplicate sentences removed
+    """
+
+    def __init__(self, treebanks, sources=None, deduplicate=True):
+        self.treebanks = treebanks
+        self.sources = sources or [None] * len(treebanks)
+        # Per treebank: None keeps every sentence, otherwise an array of kept indexes
+        self.selected = []
+        self.duplicate_count = 0
+
+        seen = set()
+        for treebank in treebanks:
+            if not deduplicate:
+                self.selected.append(None)
+                continue
+            kept = array('I')
+            for index in range(len(treebank)):
+                key = _text_key(treebank, index)
+                if key not in seen:
+                    seen.add(key)
+                    kept.append(index)
+            self.duplicate_count += len(treebank) - len(kept)
+            self.selected.append(None if len(kept) == len(treebank) else kept)
+
+    def _indexes(self, position):
+        kept = self.selected[position]
+        return range(len(self.treebanks[position])) if kept is None else kept
+
+    def __len__(self):
+        return sum(len(self._indexes(position)) for position in range(len(self.treebanks)))
+
+    @property
+    def token_count(self):
+        total = 0
+        for position, treebank in enumerate(self.treebanks):
+            if self.selected[position] is None:
+                total += treebank.token_count
+            else:
+                offsets = treebank.sentence_offsets
+                total += sum(offsets[index + 1] - offsets[index] for index in self.selected[position])
+        return total
+
+    def __iter__(self):
+        for position, treebank in enumerate(self.treebanks):
+            source = self.sources[position]
+            for index in self._indexes(position):
+                sentence = treebank.sentence(index)
+                sentence['source'] = source
+                yield sentence
+
+    def column_counts(self, name):
+        counts = Counter()
+        for position, treebank in enumerate(self.treebanks):
+            column = treebank.columns[name]
+            if self.selected[position] is None:
+                ids = Counter(column)
+            else:
+                ids = Counter()
+                offsets = treebank.sentence_offsets
+                for index in self.selected[position]:
+                    ids.update(column[offsets[index]:offsets[index + 1]])
+            strings = treebank.vocab.strings
+            for value, count in ids.items():
+                counts[strings[value]] += count
+        return counts
+
+def load_corpus(file_paths, deduplicate=True):
+    """
+    Load every file (through the binary cache) as one deduplicated corpus
+    """
+    treebanks = [load_treebank(file_path) for file_path in file_paths]
+    sources = [os.path.basename(file_path) for file_path in file_paths]
+    return TreebankCorpus(treebanks, sources, deduplicate=deduplicate)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Streaming CoNLL-U reader
+
+Sentences are yielded one at a time so analysis and database ingestion can
+start while the treebank is still being read, and memory use does not grow
+with the size of the file.
+
+Each sentence is a dict with:
+    sent_id           -- value of the `# sent_id` comment (or None)
+    text              -- value of the `# text` comment, or the surface string
+                         rebuilt from the tokens when the comment is missing
+    tokens            -- basic syntactic words (integer ids), as ten-key dicts
+    multiword_tokens  -- multi-word token ranges such as `3-4 im`
+    empty_nodes       -- enhanced-graph empty nodes such as `5.1`
+    metadata          -- every other `# key = value` comment
+    heads             -- heads[i] is the index in `tokens` of token i's head,
+                         or -1 for the root
+    children          -- children[i] lists the indexes of token i's dependents
+"""
+
+CONLLU_FIELDS = ('id', 'form', 'lemma', 'upos', 'xpos', 'feats', 'head', 'deprel', 'deps', 'misc')
+
+_DIGITS = frozenset('0123456789')
+
+def _surface_text(tokens, multiword_tokens):
+    """
+    Rebuild the sentence text from FORM and SpaceAfter=No when `# text` is missing
+    """
+    ranges = {mwt['start']: mwt for mwt in multiword_tokens}
+    pieces = []
+    skip_until = 0
+    for token in tokens:
+        position = int(token['id'])
+        if position <= skip_until:
+            continue
+        word = ranges.get(position, token)
+        if word is not token:
+            skip_until = word['end']
+        pieces.append(word['form'])
+        if 'SpaceAfter=No' not in word['misc']:
+            pieces.append(' ')
+    return ''.join(pieces).strip()
+
+def parse_feats(feats):
+    """
+    FEATS as a {feature: value} dict
+
+    "Case=Acc,Dat|Number=Sing" gives {'Case': 'Acc,Dat', 'Number': 'Sing'};
+    "_" and empty FEATS give {}. Multiple values stay comma-separated.
+    """
+    if not feats or feats == '_':
+        return {}
+    return dict([item.split('=', 1) for item in feats.split('|') if '=' in item])
+
+def index_heads(tokens):
+    """
+    Precompute integer head indexes and a children adjacency list
+
+    Head and dependent lookups then cost O(1) instead of scanning the
+    sentence for a matching id.
+    """
+    token_count = len(tokens)
+    heads = [-1] * token_count
+    children = [[] for _ in range(token_count)]
+
+    # Basic token ids are 1..n in order, so id k sits at index k-1
+    if token_count and tokens[-1]['id'] == str(token_count):
+        positions = None
+    else:
+        positions = {token['id']: index for index, token in enumerate(tokens)}
+
+    for index, token in enumerate(tokens):
+        head = token['head']
+        if positions is None:
+            head_index = int(head) - 1 if head.isdigit() else -1
+            if head_index >= token_count:
+                head_index = -1
+        else:
+            head_index = positions.get(head, -1)
+        if head_index >= 0:
+            heads[index] = head_index
+            children[head_index].append(index)
+
+    return heads, children
+
+def get_head(sentence, index):
+    """
+    Return the head of sentence['tokens'][index], or None for the root
+    """
+    head_index = sentence['heads'][index]
+    return sentence['tokens'][head_index] if head_index >= 0 else None
+
+def iter_sentences(lines):
+    """
+    Yield sentences from an iterable of CONLL-U lines, one at a time
+
+    Token lines are by far the most common, so they are tested first and
+    split exactly once; comment and blank lines take the slower path.
+    """
+    tokens = []
+    multiword_tokens = []
+    empty_nodes = []
+    metadata = {}
+    digits = _DIGITS
+
+    for line in lines:
+        if line[:1] in digits:
+            parts = line.rstrip('\r\n').split('\t')
+            if len(parts) != 10:
+                continue  # Malformed line
+            token_id = parts[0]
+            token = {
+                'id': token_id,
+                'form': parts[1],
+                'lemma': parts[2],
+                'upos': parts[3],  # Universal POS tag
+                'xpos': parts[4],  # Language-specific POS tag
+                'feats': parts[5],
+                'head': parts[6],
+                'deprel': parts[7],  # Dependency relation
+                'deps': parts[8],
+                'misc': parts[9]
+            }
+            if token_id.isdigit():
+                tokens.append(token)
+            elif '-' in token_id:
+                start, end = token_id.split('-')
+                token['start'] = int(start)
+                token['end'] = int(end)
+                multiword_tokens.append(token)
+            else:  # Empty node, e.g. 5.1
+                empty_nodes.append(token)
+            continue
+
+        line = line.strip()
+
+        if line.startswith('#'):
+            key, separator, value = line[1:].partition('=')
+            if separator:
+                metadata[key.strip()] = value.strip()
+
+        elif not line:  # Empty line indicates sentence end
+            if tokens:
+                yield _build_sentence(tokens, multiword_tokens, empty_nodes, metadata)
+            tokens = []
+            multiword_tokens = []
+            empty_nodes = []
+            metadata = {}
+
+    # Files are not always terminated by a blank line
+    if tokens:
+        yield _build_sentence(tokens, multiword_tokens, empty_nodes, metadata)
+
+def _build_sentence(tokens, multiword_tokens, empty_nodes, metadata):
+    sent_id = metadata.pop('sent_id', None)
+    text = metadata.pop('text', None)
+    if not text:
+        text = _surface_text(tokens, multiword_tokens)
+    heads, children = index_heads(tokens)
+    return {
+        'sent_id': sent_id,
+        'text': text,
+        'tokens': tokens,
+        'multiword_tokens': multiword_tokens,
+        'empty_nodes': empty_nodes,
+        'metadata': metadata,
+        'heads': heads,
+        'children': children
+    }
+
+def read_conllu_file(file_path):
+    """
+    Stream sentences from a CONLL-U file without loading it into memory
+    """
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            yield from iter_sentences(f)
+    except Exception as e:
+        print(f"Error parsing {file_path}: {e}")
+
+class SentenceCounter:
+    """
+    Pass sentences through unchanged while counting them
+    """
+
+    def __init__(self, sentences):
+        self.sentences = sentences
+        self.count = 0
+
+    def __iter__(self):
+        for sentence in self.sentences:
+            self.count += 1
+            yield sentence
@@ -0,0 +1,33 @@
+-- Full-text and trigram search over rules and examples (/grammar/search)
+--
+-- Brings an existing database up to date; new databases get the same columns
+-- and indexes from schema.sql or Base.metadata.create_all.
+--   psql "$DATABASE_URL" -f backend/database/migrations/001_rule_search.sql
+--
+-- Adding a stored generated column rewrites the table, so run it while no
+-- ingestion script is writing.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE grammar_rules ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(rule_name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(rule_description, '')), 'B')
+    ) STORED;
+
+ALTER TABLE rule_examples ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(example_sentence, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(example_translation, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(example_romanization, '')), 'B')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS ix_grammar_rules_search_vector ON grammar_rules USING gin (search_vector);
+CREATE INDEX IF NOT EXISTS ix_grammar_rules_rule_name_trgm ON grammar_rules USING gin (rule_name gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS ix_rule_examples_search_vector ON rule_examples USING gin (search_vector);
+CREATE INDEX IF NOT EXISTS ix_rule_examples_sentence_trgm ON rule_examples USING gin (example_sentence gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_rule_examples_translation_trgm ON rule_examples USING gin (example_translation gin_trgm_ops);
+
+ANALYZE grammar_rules;
+ANALYZE rule_examples;
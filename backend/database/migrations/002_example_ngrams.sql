@@ -0,0 +1,16 @@
+-- CJK character n-gram index of example sentences (substring search for zh/ja)
+--
+--   psql "$DATABASE_URL" -f backend/database/migrations/002_example_ngrams.sql
+--   python cjk_ngrams.py    # fill the table from the existing examples
+--
+-- New and edited examples are indexed by the ORM as they are flushed
+-- (models/language_models.py); rerun cjk_ngrams.py after loading examples
+-- with plain SQL or COPY.
+
+CREATE TABLE IF NOT EXISTS rule_example_ngrams (
+    gram VARCHAR(2) NOT NULL,
+    example_id INTEGER NOT NULL REFERENCES rule_examples(example_id) ON DELETE CASCADE,
+    PRIMARY KEY (gram, example_id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_rule_example_ngrams_example_id ON rule_example_ngrams (example_id);
@@ -0,0 +1,11 @@
+-- Tone-insensitive romanization search (see romanization.py)
+--
+--   psql "$DATABASE_URL" -f backend/database/migrations/003_romanization_index.sql
+--   python romanization.py    # split "hanzi (pinyin) - translation" examples and fill the column
+--
+-- The column is filled by the ORM on every insert and update of an example.
+
+ALTER TABLE rule_examples ADD COLUMN IF NOT EXISTS example_romanization_normalized TEXT;
+
+CREATE INDEX IF NOT EXISTS ix_rule_examples_romanization_normalized_trgm
+    ON rule_examples USING gin (example_romanization_normalized gin_trgm_ops);
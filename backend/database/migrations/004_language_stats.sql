@@ -0,0 +1,16 @@
+-- Materialized per-language catalog statistics (see models/language_models.py)
+--
+--   psql "$DATABASE_URL" -f backend/database/migrations/004_language_stats.sql
+--
+-- Rows are filled by the API at startup for languages that have none, and
+-- recomputed by every ORM commit that changes a language's rules or examples.
+
+CREATE TABLE IF NOT EXISTS language_stats (
+    language_id VARCHAR(2) PRIMARY KEY REFERENCES languages(language_id) ON DELETE CASCADE,
+    rule_count INTEGER NOT NULL DEFAULT 0,
+    example_count INTEGER NOT NULL DEFAULT 0,
+    rules_by_difficulty JSONB NOT NULL DEFAULT '{}',
+    rules_by_concept JSONB NOT NULL DEFAULT '{}',
+    rules_by_usage_context JSONB NOT NULL DEFAULT '{}',
+    refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,23 @@
+-- Token language and concordance indexes (/treebank/{language_id}/concordance)
+--
+-- Brings an existing database up to date; new databases get the same column
+-- and indexes from Base.metadata.create_all.
+--   psql "$DATABASE_URL" -f backend/database/migrations/005_token_concordance.sql
+--
+-- The backfill rewrites every token row, so run it while no ingestion script
+-- is writing. Tokens loaded afterwards get language_id from ud_bulk_loader.
+
+ALTER TABLE ud_token_analysis ADD COLUMN IF NOT EXISTS language_id VARCHAR(2) REFERENCES languages(language_id);
+
+UPDATE ud_token_analysis t SET language_id = s.language_id
+FROM ud_treebank_sentences s
+WHERE t.sentence_id = s.sentence_id AND t.language_id IS NULL;
+
+ALTER TABLE ud_token_analysis ALTER COLUMN language_id SET NOT NULL;
+
+CREATE INDEX IF NOT EXISTS ix_ud_token_analysis_language_lemma ON ud_token_analysis (language_id, lemma, analysis_id);
+CREATE INDEX IF NOT EXISTS ix_ud_token_analysis_language_upos ON ud_token_analysis (language_id, upos, analysis_id);
+CREATE INDEX IF NOT EXISTS ix_ud_token_analysis_language_deprel ON ud_token_analysis (language_id, deprel, analysis_id);
+CREATE INDEX IF NOT EXISTS ix_ud_token_analysis_sentence_token ON ud_token_analysis (sentence_id, token_id);
+
+ANALYZE ud_token_analysis;
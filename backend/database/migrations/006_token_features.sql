@@ -0,0 +1,22 @@
+-- Parsed FEATS of UD tokens (ud_token_analysis.features) and their GIN index
+--
+-- Brings an existing database up to date; new databases get the same column
+-- and index from Base.metadata.create_all.
+--   psql "$DATABASE_URL" -f backend/database/migrations/006_token_features.sql
+--
+-- The backfill parses the stored FEATS text the way ud_bulk_loader does
+-- ("Case=Acc,Dat|Number=Sing" -> {"Case": ["Acc", "Dat"], "Number": ["Sing"]})
+-- and rewrites every token row, so run it while no ingestion script is writing.
+
+ALTER TABLE ud_token_analysis ADD COLUMN IF NOT EXISTS features JSONB;
+
+UPDATE ud_token_analysis SET features = (
+    SELECT jsonb_object_agg(split_part(item, '=', 1), string_to_array(split_part(item, '=', 2), ','))
+    FROM unnest(string_to_array(feats, '|')) AS item
+    WHERE position('=' IN item) > 0
+)
+WHERE features IS NULL AND feats IS NOT NULL AND feats <> '_';
+
+CREATE INDEX IF NOT EXISTS ix_ud_token_analysis_features ON ud_token_analysis USING gin (features jsonb_path_ops);
+
+ANALYZE ud_token_analysis;
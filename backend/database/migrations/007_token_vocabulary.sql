@@ -0,0 +1,111 @@
+-- Dictionary-encoded UD tokens: ud_lexicon, ud_tags and ud_feature_sets
+--
+-- Brings an existing database up to date; new databases get the same tables
+-- and indexes from Base.metadata.create_all.
+--   psql "$DATABASE_URL" -f backend/database/migrations/007_token_vocabulary.sql
+--
+-- Forms and lemmas move to a per-language lexicon, UPOS/XPOS tags and deprels
+-- to ud_tags, and FEATS strings (with their parsed features) to
+-- ud_feature_sets; ud_token_analysis keeps integer ids into them. The token
+-- table is rebuilt rather than updated in place, so the old strings do not
+-- linger as dead space. Run it while no ingestion script is writing.
+
+BEGIN;
+
+CREATE TABLE ud_lexicon (
+    lexeme_id SERIAL PRIMARY KEY,
+    language_id VARCHAR(2) NOT NULL REFERENCES languages(language_id),
+    text VARCHAR(500) NOT NULL,
+    CONSTRAINT uq_ud_lexicon_language_text UNIQUE (language_id, text)
+);
+
+CREATE TABLE ud_tags (
+    tag_id SMALLSERIAL PRIMARY KEY,
+    kind VARCHAR(10) NOT NULL,
+    value VARCHAR(100) NOT NULL,
+    CONSTRAINT uq_ud_tags_kind_value UNIQUE (kind, value)
+);
+
+CREATE TABLE ud_feature_sets (
+    feats_id SERIAL PRIMARY KEY,
+    feats TEXT NOT NULL UNIQUE,
+    features JSONB
+);
+
+INSERT INTO ud_lexicon (language_id, text)
+SELECT language_id, form FROM ud_token_analysis WHERE form IS NOT NULL
+UNION
+SELECT language_id, lemma FROM ud_token_analysis WHERE lemma IS NOT NULL
+ORDER BY 1, 2;
+
+INSERT INTO ud_tags (kind, value)
+SELECT 'upos', upos FROM ud_token_analysis WHERE upos IS NOT NULL
+UNION
+SELECT 'xpos', xpos FROM ud_token_analysis WHERE xpos IS NOT NULL
+UNION
+SELECT 'deprel', deprel FROM ud_token_analysis WHERE deprel IS NOT NULL
+ORDER BY 1, 2;
+
+-- Tokens without features (NULL features, e.g. FEATS "_") keep a NULL feats_id
+INSERT INTO ud_feature_sets (feats, features)
+SELECT DISTINCT ON (feats) feats, features FROM ud_token_analysis
+WHERE features IS NOT NULL
+ORDER BY feats;
+
+CREATE INDEX ix_ud_feature_sets_features ON ud_feature_sets USING gin (features jsonb_path_ops);
+
+CREATE TABLE ud_token_analysis_encoded (
+    analysis_id INTEGER NOT NULL,
+    sentence_id INTEGER NOT NULL,
+    language_id VARCHAR(2) NOT NULL,
+    token_id VARCHAR(20),
+    form_id INTEGER,
+    lemma_id INTEGER,
+    upos_id SMALLINT,
+    xpos_id SMALLINT,
+    feats_id INTEGER,
+    head VARCHAR(20),
+    deprel_id SMALLINT
+);
+
+INSERT INTO ud_token_analysis_encoded
+SELECT t.analysis_id, t.sentence_id, t.language_id, t.token_id,
+       form.lexeme_id, lemma.lexeme_id, upos.tag_id, xpos.tag_id, feature_set.feats_id, t.head, deprel.tag_id
+FROM ud_token_analysis t
+LEFT JOIN ud_lexicon form ON form.language_id = t.language_id AND form.text = t.form
+LEFT JOIN ud_lexicon lemma ON lemma.language_id = t.language_id AND lemma.text = t.lemma
+LEFT JOIN ud_tags upos ON upos.kind = 'upos' AND upos.value = t.upos
+LEFT JOIN ud_tags xpos ON xpos.kind = 'xpos' AND xpos.value = t.xpos
+LEFT JOIN ud_tags deprel ON deprel.kind = 'deprel' AND deprel.value = t.deprel
+LEFT JOIN ud_feature_sets feature_set ON feature_set.feats = t.feats AND t.features IS NOT NULL
+ORDER BY t.analysis_id;
+
+-- Keep the analysis_id sequence: hand it to the new table before dropping the old one
+ALTER SEQUENCE ud_token_analysis_analysis_id_seq OWNED BY ud_token_analysis_encoded.analysis_id;
+DROP TABLE ud_token_analysis;
+ALTER TABLE ud_token_analysis_encoded RENAME TO ud_token_analysis;
+ALTER TABLE ud_token_analysis ALTER COLUMN analysis_id SET DEFAULT nextval('ud_token_analysis_analysis_id_seq');
+
+ALTER TABLE ud_token_analysis
+    ADD CONSTRAINT ud_token_analysis_pkey PRIMARY KEY (analysis_id),
+    ADD CONSTRAINT ud_token_analysis_sentence_id_fkey FOREIGN KEY (sentence_id) REFERENCES ud_treebank_sentences(sentence_id),
+    ADD CONSTRAINT ud_token_analysis_language_id_fkey FOREIGN KEY (language_id) REFERENCES languages(language_id),
+    ADD CONSTRAINT ud_token_analysis_form_id_fkey FOREIGN KEY (form_id) REFERENCES ud_lexicon(lexeme_id),
+    ADD CONSTRAINT ud_token_analysis_lemma_id_fkey FOREIGN KEY (lemma_id) REFERENCES ud_lexicon(lexeme_id),
+    ADD CONSTRAINT ud_token_analysis_upos_id_fkey FOREIGN KEY (upos_id) REFERENCES ud_tags(tag_id),
+    ADD CONSTRAINT ud_token_analysis_xpos_id_fkey FOREIGN KEY (xpos_id) REFERENCES ud_tags(tag_id),
+    ADD CONSTRAINT ud_token_analysis_feats_id_fkey FOREIGN KEY (feats_id) REFERENCES ud_feature_sets(feats_id),
+    ADD CONSTRAINT ud_token_analysis_deprel_id_fkey FOREIGN KEY (deprel_id) REFERENCES ud_tags(tag_id);
+
+CREATE INDEX ix_ud_token_analysis_lemma ON ud_token_analysis (lemma_id, analysis_id);
+CREATE INDEX ix_ud_token_analysis_language_upos ON ud_token_analysis (language_id, upos_id, analysis_id);
+CREATE INDEX ix_ud_token_analysis_language_deprel ON ud_token_analysis (language_id, deprel_id, analysis_id);
+CREATE INDEX ix_ud_token_analysis_language_feats ON ud_token_analysis (language_id, feats_id, analysis_id);
+CREATE INDEX ix_ud_token_analysis_sentence_token ON ud_token_analysis (sentence_id, token_id);
+
+COMMIT;
+
+ANALYZE ud_lexicon;
+ANALYZE ud_tags;
+ANALYZE ud_feature_sets;
+ANALYZE ud_token_analysis;
@@ -0,0 +1,99 @@
+-- Partition ud_treebank_sentences and ud_token_analysis by language_id
+--
+-- Brings an existing database up to date; new databases get the same
+-- partitioned tables from Base.metadata.create_all, and ud_bulk_loader
+-- creates the partition of each language it loads.
+--   psql "$DATABASE_URL" -f backend/database/migrations/008_language_partitions.sql
+--
+-- Each stored language gets a partition of both tables
+-- (ud_treebank_sentences_de, ud_token_analysis_de, ...). The primary keys
+-- gain language_id, as partitioned tables require, and tokens reference their
+-- sentence by (sentence_id, language_id). Rows are copied once into the new
+-- tables and keep their ids. Run it while no ingestion script is writing.
+
+BEGIN;
+
+ALTER TABLE ud_token_analysis RENAME TO ud_token_analysis_unpartitioned;
+ALTER TABLE ud_treebank_sentences RENAME TO ud_treebank_sentences_unpartitioned;
+ALTER TABLE ud_token_analysis_unpartitioned RENAME CONSTRAINT ud_token_analysis_pkey TO ud_token_analysis_unpartitioned_pkey;
+ALTER TABLE ud_treebank_sentences_unpartitioned RENAME CONSTRAINT ud_treebank_sentences_pkey TO ud_treebank_sentences_unpartitioned_pkey;
+DROP INDEX ix_ud_token_analysis_lemma, ix_ud_token_analysis_language_upos, ix_ud_token_analysis_language_deprel,
+    ix_ud_token_analysis_language_feats, ix_ud_token_analysis_sentence_token;
+
+CREATE TABLE ud_treebank_sentences (
+    sentence_id INTEGER NOT NULL DEFAULT nextval('ud_treebank_sentences_sentence_id_seq'),
+    language_id VARCHAR(2) NOT NULL,
+    sentence_text TEXT NOT NULL,
+    source VARCHAR(100),
+    treebank_metadata TEXT
+) PARTITION BY LIST (language_id);
+
+CREATE TABLE ud_token_analysis (
+    analysis_id INTEGER NOT NULL DEFAULT nextval('ud_token_analysis_analysis_id_seq'),
+    sentence_id INTEGER NOT NULL,
+    language_id VARCHAR(2) NOT NULL,
+    token_id VARCHAR(20),
+    form_id INTEGER,
+    lemma_id INTEGER,
+    upos_id SMALLINT,
+    xpos_id SMALLINT,
+    feats_id INTEGER,
+    head VARCHAR(20),
+    deprel_id SMALLINT
+) PARTITION BY LIST (language_id);
+
+DO $$
+DECLARE
+    language TEXT;
+BEGIN
+    FOR language IN SELECT DISTINCT language_id FROM ud_treebank_sentences_unpartitioned LOOP
+        EXECUTE format('CREATE TABLE %I PARTITION OF ud_treebank_sentences FOR VALUES IN (%L)',
+                       'ud_treebank_sentences_' || language, language);
+        EXECUTE format('CREATE TABLE %I PARTITION OF ud_token_analysis FOR VALUES IN (%L)',
+                       'ud_token_analysis_' || language, language);
+    END LOOP;
+END $$;
+
+INSERT INTO ud_treebank_sentences (sentence_id, language_id, sentence_text, source, treebank_metadata)
+SELECT sentence_id, language_id, sentence_text, source, treebank_metadata
+FROM ud_treebank_sentences_unpartitioned
+ORDER BY sentence_id;
+
+INSERT INTO ud_token_analysis
+    (analysis_id, sentence_id, language_id, token_id, form_id, lemma_id, upos_id, xpos_id, feats_id, head, deprel_id)
+SELECT analysis_id, sentence_id, language_id, token_id, form_id, lemma_id, upos_id, xpos_id, feats_id, head, deprel_id
+FROM ud_token_analysis_unpartitioned
+ORDER BY analysis_id;
+
+-- Keep the id sequences: hand them to the new tables before dropping the old ones
+ALTER SEQUENCE ud_treebank_sentences_sentence_id_seq OWNED BY ud_treebank_sentences.sentence_id;
+ALTER SEQUENCE ud_token_analysis_analysis_id_seq OWNED BY ud_token_analysis.analysis_id;
+DROP TABLE ud_token_analysis_unpartitioned;
+DROP TABLE ud_treebank_sentences_unpartitioned;
+
+ALTER TABLE ud_treebank_sentences
+    ADD PRIMARY KEY (sentence_id, language_id),
+    ADD FOREIGN KEY (language_id) REFERENCES languages(language_id);
+
+ALTER TABLE ud_token_analysis
+    ADD PRIMARY KEY (analysis_id, language_id),
+    ADD FOREIGN KEY (sentence_id, language_id) REFERENCES ud_treebank_sentences(sentence_id, language_id),
+    ADD FOREIGN KEY (language_id) REFERENCES languages(language_id),
+    ADD FOREIGN KEY (form_id) REFERENCES ud_lexicon(lexeme_id),
+    ADD FOREIGN KEY (lemma_id) REFERENCES ud_lexicon(lexeme_id),
+    ADD FOREIGN KEY (upos_id) REFERENCES ud_tags(tag_id),
+    ADD FOREIGN KEY (xpos_id) REFERENCES ud_tags(tag_id),
+    ADD FOREIGN KEY (feats_id) REFERENCES ud_feature_sets(feats_id),
+    ADD FOREIGN KEY (deprel_id) REFERENCES ud_tags(tag_id);
+
+-- Partitions hold one language, so the index keys need no language_id
+CREATE INDEX ix_ud_token_analysis_lemma ON ud_token_analysis (lemma_id, analysis_id);
+CREATE INDEX ix_ud_token_analysis_upos ON ud_token_analysis (upos_id, analysis_id);
+CREATE INDEX ix_ud_token_analysis_deprel ON ud_token_analysis (deprel_id, analysis_id);
+CREATE INDEX ix_ud_token_analysis_feats ON ud_token_analysis (feats_id, analysis_id);
+CREATE INDEX ix_ud_token_analysis_sentence_token ON ud_token_analysis (sentence_id, token_id);
+
+COMMIT;
+
+ANALYZE ud_treebank_sentences;
+ANALYZE ud_token_analysis;
@@ -35,9 +35,21 @@ CREATE TABLE grammar_rules (
     difficulty_level INTEGER CHECK (difficulty_level BETWEEN 1 AND 5),
     is_active BOOLEAN DEFAULT TRUE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- /grammar/search (see database/migrations/001_rule_search.sql)
+    search_vector TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(rule_name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(rule_description, '')), 'B')
+    ) STORED
 );
 
+-- Keyset pagination of /grammar/rules within a language
+CREATE INDEX ix_grammar_rules_language_rule ON grammar_rules (language_id, rule_id);
+
+-- Full-text and fuzzy search
+CREATE INDEX ix_grammar_rules_search_vector ON grammar_rules USING gin (search_vector);
+CREATE INDEX ix_grammar_rules_rule_name_trgm ON grammar_rules USING gin (rule_name gin_trgm_ops);
+
 -- 4. Examples for rules
 CREATE TABLE rule_examples (
     example_id SERIAL PRIMARY KEY,
@@ -45,8 +57,51 @@ CREATE TABLE rule_examples (
     example_sentence TEXT NOT NULL,
     example_translation TEXT,
     example_romanization TEXT,  -- For non-Latin scripts
+    example_romanization_normalized TEXT,  -- Tone-insensitive, for search (romanization.py)
     example_gloss TEXT,  -- Linguistic interlinear gloss
-    notes TEXT
+    notes TEXT,
+    search_vector TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(example_sentence, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(example_translation, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(example_romanization, '')), 'B')
+    ) STORED
+);
+
+CREATE INDEX ix_rule_examples_rule_id ON rule_examples (rule_id);
+CREATE INDEX ix_rule_examples_search_vector ON rule_examples USING gin (search_vector);
+CREATE INDEX ix_rule_examples_sentence_trgm ON rule_examples USING gin (example_sentence gin_trgm_ops);
+CREATE INDEX ix_rule_examples_translation_trgm ON rule_examples USING gin (example_translation gin_trgm_ops);
+CREATE INDEX ix_rule_examples_romanization_normalized_trgm ON rule_examples USING gin (example_romanization_normalized gin_trgm_ops);
+
+-- CJK character unigrams and bigrams of each example sentence, for substring
+-- search in Chinese and Japanese (see cjk_ngrams.py)
+CREATE TABLE rule_example_ngrams (
+    gram VARCHAR(2) NOT NULL,
+    example_id INTEGER NOT NULL REFERENCES rule_examples(example_id) ON DELETE CASCADE,
+    PRIMARY KEY (gram, example_id)
+);
+
+CREATE INDEX ix_rule_example_ngrams_example_id ON rule_example_ngrams (example_id);
+
+-- Catalog versions read by the API response cache; one row per language plus '*'
+-- for cross-language data, bumped whenever rules, examples, concepts or languages change
+CREATE TABLE catalog_versions (
+    language_id VARCHAR(2) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Rule and example counts per language, with rules per difficulty, concept and
+-- usage context as JSONB histograms ('' keys NULL values); recomputed for the
+-- languages a transaction changed when it commits
+CREATE TABLE language_stats (
+    language_id CHAR(2) PRIMARY KEY REFERENCES languages(language_id) ON DELETE CASCADE,
+    rule_count INTEGER NOT NULL DEFAULT 0,
+    example_count INTEGER NOT NULL DEFAULT 0,
+    rules_by_difficulty JSONB NOT NULL DEFAULT '{}',
+    rules_by_concept JSONB NOT NULL DEFAULT '{}',
+    rules_by_usage_context JSONB NOT NULL DEFAULT '{}',
+    refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
 -- 5. Cross-language rule relationships
@@ -5,6 +5,7 @@ Add final enhancements to balance the database
 
 from config.database import SessionLocal
 from models.language_models import GrammarRule, RuleExample
+from romanization import example_fields
 
 def add_balanced_rules():
     """
@@ -82,7 +83,7 @@ def add_balanced_rules():
             for example_text in rule_data['examples']:
                 example = RuleExample(
                     rule_id=grammar_rule.rule_id,
-                    example_sentence=example_text
+                    **example_fields(example_text)
                 )
                 db.add(example)
             
@@ -10,6 +10,8 @@ def fix_ud_tables():
     # Drop and recreate the UD tables with correct field sizes
     UDTokenAnalysis.__table__.drop(engine, checkfirst=True)
     UDTreebankSentence.__table__.drop(engine, checkfirst=True)
+    for table in (UDLexeme, UDTag, UDFeatureSet):
+        table.__table__.drop(engine, checkfirst=True)
     
     # Recreate tables
     Base.metadata.create_all(bind=engine)
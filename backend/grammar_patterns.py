@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Pattern registry and single-pass extraction engine for UD treebanks
+
+Each grammar pattern is registered once, under a pattern set (the analysis
+profile of one ingestion script) and optionally restricted to some
+languages. extract_patterns walks every sentence once: a single loop over the
+tokens indexes them by deprel, UPOS and case, and every active pattern then
+reads those indexes instead of re-scanning the tokens. Adding patterns, or
+running several pattern sets together, adds no passes over the corpus.
+
+A pattern is a function (sentence, facts) that yields one dict per match.
+Matches are not kept: each pattern folds them into a PatternStats of
+constant size (a match count, a seeded reservoir sample of example sentences
+and capped value histograms), so memory stays flat however large the corpus
+is, and the same seed always picks the same examples.
+"""
+
+import random
+from collections import defaultdict, Counter
+
+from conllu.reader import get_head, parse_feats
+from tree_query import compile_query, node_facts
+
+PATTERN_REGISTRY = defaultdict(list)
+
+class SentenceFacts:
+    """
+    Per-sentence token indexes built in one pass and shared by all patterns
+    """
+
+    __slots__ = ('tokens', 'by_deprel', 'by_upos', 'cases')
+
+    def __init__(self, sentence):
+        self.tokens = sentence['tokens']
+        self.by_deprel = defaultdict(list)
+        self.by_upos = defaultdict(list)
+        self.cases = {}  # token index -> value of its Case feature
+
+        for index, token in enumerate(self.tokens):
+            self.by_deprel[token['deprel']].append(index)
+            self.by_upos[token['upos']].append(index)
+            feats = token['feats']
+            if 'Case=' in feats:
+                # 'Case=' also matches inside other features, e.g. PrepCase=Npr
+                case = parse_feats(feats).get('Case')
+                if case is not None:
+                    self.cases[index] = case
+
+    def with_deprel(self, *deprels):
+        """
+        Token indexes carrying any of `deprels`, in sentence order
+        """
+        if len(deprels) == 1:
+            return self.by_deprel.get(deprels[0], [])
+        return sorted(index for deprel in deprels for index in self.by_deprel.get(deprel, []))
+
+    def with_upos(self, upos):
+        return self.by_upos.get(upos, [])
+
+class PatternStats:
+    """
+    Constant-size summary of one pattern's matches
+
+    count           -- total matches
+    sentence_count  -- sentences with at least one match
+    histograms      -- {match field: Counter of values}, pruned to the most
+                       frequent values once they exceed `histogram_limit`
+    examples()      -- a uniform reservoir sample of matching sentences
+    """
+
+    def __init__(self, example_size=5, seed=0, histogram_limit=5000):
+        self.count = 0
+        self.sentence_count = 0
+        self.histograms = defaultdict(Counter)
+        self.example_size = example_size
+        self.histogram_limit = histogram_limit
+        self._reservoir = []  # (sentence position, sent_id, text)
+        self._rng = random.Random(seed)
+        self._last_position = None
+
+    def add(self, position, sentence, match):
+        self.count += 1
+
+        for field, value in match.items():
+            values = value if isinstance(value, list) else [value]
+            histogram = self.histograms[field]
+            for item in values:
+                histogram[item] += 1
+            if len(histogram) > self.histogram_limit:
+                self.histograms[field] = Counter(dict(histogram.most_common(self.histogram_limit // 2)))
+
+        # Sample sentences, not matches, so one long sentence is not over-represented
+        if position == self._last_position:
+            return
+        self._last_position = position
+        self.sentence_count += 1
+
+        example = (position, sentence.get('sent_id'), sentence['text'])
+        if len(self._reservoir) < self.example_size:
+            self._reservoir.append(example)
+        else:
+            slot = self._rng.randrange(self.sentence_count)
+            if slot < self.example_size:
+                self._reservoir[slot] = example
+
+    def examples(self, limit=None):
+        """
+        Sampled example sentence texts, in corpus order
+        """
+        sample = sorted(self._reservoir)[:limit]
+        return [text for _, _, text in sample]
+
+    def example_ids(self, limit=None):
+        return [sent_id for _, sent_id, _ in sorted(self._reservoir)[:limit]]
+
+    def most_common(self, field, n=None):
+        return self.histograms[field].most_common(n)
+
+    def __len__(self):
+        return self.count
+
+    def __bool__(self):
+        return self.count > 0
+
+class Pattern:
+    def __init__(self, pattern_set, name, match, languages=None, min_tokens=0, max_tokens=None):
+        self.pattern_set = pattern_set
+        self.name = name
+        self.match = match
+        self.languages = frozenset(languages) if languages else None
+        self.min_tokens = min_tokens
+        self.max_tokens = max_tokens
+
+    def applies_to(self, language_code):
+        return self.languages is None or language_code in self.languages
+
+def register_pattern(pattern_set, name, languages=None, min_tokens=0, max_tokens=None):
+    """
+    Decorator registering a pattern function under `pattern_set`
+    """
+    def decorator(match):
+        PATTERN_REGISTRY[pattern_set].append(
+            Pattern(pattern_set, name, match, languages, min_tokens, max_tokens)
+        )
+        return match
+    return decorator
+
+def register_query_pattern(pattern_set, name, query, languages=None, min_tokens=0, max_tokens=None):
+    """
+    Register a tree query (see tree_query.py) as a pattern under `pattern_set`
+
+    Each match yields {node name: form} for the nodes named in the query.
+    """
+    tree_query = compile_query(query)
+    root_facts = dict(node_facts(tree_query.root))
+
+    def match(sentence, facts):
+        # Start from the SentenceFacts index of the first node's deprel or UPOS
+        if 'deprel' in root_facts:
+            candidates = facts.with_deprel(*root_facts['deprel'])
+        elif 'upos' in root_facts and len(root_facts['upos']) == 1:
+            candidates = facts.with_upos(next(iter(root_facts['upos'])))
+        else:
+            candidates = None
+        tokens = facts.tokens
+        for binding in tree_query.matches(sentence, candidates):
+            yield {node_name: tokens[binding[node_name]]['form'] for node_name in tree_query.named}
+
+    PATTERN_REGISTRY[pattern_set].append(Pattern(pattern_set, name, match, languages, min_tokens, max_tokens))
+
+def active_patterns(language_code, pattern_sets):
+    return [
+        pattern
+        for pattern_set in pattern_sets
+        for pattern in PATTERN_REGISTRY[pattern_set]
+        if pattern.applies_to(language_code)
+    ]
+
+def extract_patterns(sentences, language_code, pattern_sets, example_size=5, seed=0):
+    """
+    Run every active pattern of `pattern_sets` over `sentences` in one traversal
+
+    Returns {pattern_set: {pattern_name: PatternStats}}; patterns without any
+    match are left out. Each pattern's example reservoir is seeded from
+    `seed` and its own name, so runs with the same seed are reproducible.
+    """
+    patterns = active_patterns(language_code, pattern_sets)
+    results = {pattern_set: {} for pattern_set in pattern_sets}
+
+    for position, sentence in enumerate(sentences):
+        token_count = len(sentence['tokens'])
+        facts = None
+
+        for pattern in patterns:
+            if token_count < pattern.min_tokens:
+                continue
+            if pattern.max_tokens is not None and token_count > pattern.max_tokens:
+                continue
+            if facts is None:
+                facts = SentenceFacts(sentence)
+            for match in pattern.match(sentence, facts):
+                stats = results[pattern.pattern_set].get(pattern.name)
+                if stats is None:
+                    stats = PatternStats(example_size, seed=f"{seed}:{pattern.pattern_set}:{pattern.name}")
+                    results[pattern.pattern_set][pattern.name] = stats
+                stats.add(position, sentence, match)
+
+    return results
+
+# Basic dependency patterns (integrate_local_ud)
+
+@register_pattern('basic', 'subject_verb')
+def basic_subject_verb(sentence, facts):
+    for i in facts.with_deprel('nsubj'):
+        head_token = get_head(sentence, i)
+        if head_token and head_token['upos'] == 'VERB':
+            yield {'subject': facts.tokens[i]['form'], 'verb': head_token['form']}
+
+@register_pattern('basic', 'verb_object')
+def basic_verb_object(sentence, facts):
+    for i in facts.with_deprel('obj', 'iobj'):
+        head_token = get_head(sentence, i)
+        if head_token and head_token['upos'] == 'VERB':
+            yield {'object': facts.tokens[i]['form'], 'verb': head_token['form']}
+
+@register_pattern('basic', 'modifiers')
+def basic_modifiers(sentence, facts):
+    for i in facts.with_deprel('amod', 'advmod'):
+        head_token = get_head(sentence, i)
+        if head_token:
+            token = facts.tokens[i]
+            yield {'modifier': token['form'], 'modified': head_token['form'], 'relation': token['deprel']}
+
+# Enhanced patterns (enhanced_ud_integration); very short or long sentences are skipped
+
+ENHANCED_LIMITS = {'min_tokens': 3, 'max_tokens': 50}
+
+@register_pattern('enhanced', 'measure_words', languages=['zh'], **ENHANCED_LIMITS)
+def enhanced_measure_words(sentence, facts):
+    # Look for measure words and their nouns
+    tokens = facts.tokens
+    for i in facts.with_upos('NUM'):
+        if i + 1 < len(tokens):
+            next_token = tokens[i + 1]
+            if next_token['upos'] == 'NOUN' and 'measure' in next_token['feats'].lower():
+                yield {'num': tokens[i]['form'], 'measure': next_token['form']}
+
+@register_pattern('enhanced', 'verb_second', languages=['de'], **ENHANCED_LIMITS)
+def enhanced_verb_second(sentence, facts):
+    verbs = facts.with_upos('VERB')
+    if len(verbs) >= 2:
+        yield {'verbs': [facts.tokens[i]['form'] for i in verbs]}
+
+@register_pattern('enhanced', 'particles', languages=['ja'], **ENHANCED_LIMITS)
+def enhanced_particles(sentence, facts):
+    # Look for topic and case markers
+    for token in facts.tokens:
+        if token['form'] in ('は', 'が', 'を'):
+            yield {'particle': token['form']}
+
+@register_pattern('enhanced', 'cases', languages=['ru'], **ENHANCED_LIMITS)
+def enhanced_cases(sentence, facts):
+    for i, case in facts.cases.items():
+        yield {'word': facts.tokens[i]['form'], 'case': case}
+
+@register_pattern('enhanced', 'subject_verb', **ENHANCED_LIMITS)
+def enhanced_subject_verb(sentence, facts):
+    subjects = facts.with_deprel('nsubj')
+    verbs = facts.with_upos('VERB')
+    if subjects and verbs:
+        yield {'subject': facts.tokens[subjects[0]]['form'], 'verb': facts.tokens[verbs[0]]['form']}
+
+@register_pattern('enhanced', 'verb_object', **ENHANCED_LIMITS)
+def enhanced_verb_object(sentence, facts):
+    objects = facts.with_deprel('obj', 'iobj')
+    verbs = facts.with_upos('VERB')
+    if objects and verbs:
+        yield {'object': facts.tokens[objects[0]]['form'], 'verb': facts.tokens[verbs[0]]['form']}
+
+@register_pattern('enhanced', 'adjective_noun', **ENHANCED_LIMITS)
+def enhanced_adjective_noun(sentence, facts):
+    for i in facts.with_deprel('amod'):
+        head_token = get_head(sentence, i)
+        if head_token and head_token['upos'] == 'NOUN':
+            yield {'adjective': facts.tokens[i]['form'], 'noun': head_token['form']}
+
+# German-specific patterns (extract_german_ud_rules); very short sentences are skipped
+
+@register_pattern('german', 'case_usage', languages=['de'], min_tokens=4)
+def german_case_usage(sentence, facts):
+    for i, case in facts.cases.items():
+        head_token = get_head(sentence, i)
+        if head_token:
+            token = facts.tokens[i]
+            yield {'word': token['form'], 'case': case, 'head': head_token['form'], 'relation': token['deprel']}
+
+@register_pattern('german', 'verb_second', languages=['de'], min_tokens=4)
+def german_verb_second(sentence, facts):
+    # Root verb in second position
+    for i in facts.with_deprel('root'):
+        token = facts.tokens[i]
+        if token['upos'] == 'VERB' and i == 1:
+            yield {'verb': token['form']}
+
+register_query_pattern('german', 'separable_verbs', 'VERB=verb >compound:prt _=prefix', languages=['de'], min_tokens=4)
+
+@register_pattern('german', 'adjective_declension', languages=['de'], min_tokens=4)
+def german_adjective_declension(sentence, facts):
+    for i in facts.with_deprel('amod'):
+        token = facts.tokens[i]
+        if token['upos'] == 'ADJ' and i in facts.cases and 'Degree=' in token['feats']:
+            yield {'adjective': token['form'], 'features': token['feats']}
+
+# Dependency relation patterns (integrate_ud_data)
+
+@register_pattern('ud', 'nsubj')
+def ud_nsubj(sentence, facts):
+    for i in facts.with_deprel('nsubj'):
+        head_token = get_head(sentence, i)
+        if head_token and head_token['upos'] == 'VERB':
+            yield {'subject': facts.tokens[i]['form'], 'verb': head_token['form']}
+
+@register_pattern('ud', 'obj')
+def ud_obj(sentence, facts):
+    for i in facts.with_deprel('obj', 'iobj'):
+        head_token = get_head(sentence, i)
+        if head_token and head_token['upos'] == 'VERB':
+            yield {'object': facts.tokens[i]['form'], 'verb': head_token['form']}
+
+@register_pattern('ud', 'amod')
+def ud_amod(sentence, facts):
+    for i in facts.with_deprel('amod'):
+        head_token = get_head(sentence, i)
+        if head_token and head_token['upos'] == 'NOUN':
+            yield {'adjective': facts.tokens[i]['form'], 'noun': head_token['form']}
+
+@register_pattern('ud', 'advmod')
+def ud_advmod(sentence, facts):
+    for i in facts.with_deprel('advmod'):
+        head_token = get_head(sentence, i)
+        if head_token and head_token['upos'] == 'VERB':
+            yield {'adverb': facts.tokens[i]['form'], 'verb': head_token['form']}
@@ -4,10 +4,31 @@ Integrate Universal Dependencies data from local treebanks
 """
 
 import os
+import re
 import glob
+import argparse
+from functools import partial
 from collections import defaultdict, Counter
 from config.database import SessionLocal
-from models.language_models import GrammarRule, RuleExample, GrammarConcept, UDTreebankSentence, UDTokenAnalysis
+from conllu.corpus import load_corpus
+from ud_ingestion import run_ingestion, warm_treebank_caches, add_ingestion_arguments
+from ud_bulk_loader import bulk_load_corpus
+from grammar_patterns import extract_patterns
+from models.language_models import GrammarRule, RuleExample, GrammarConcept
+
+# Map our language codes to UD treebank patterns
+UD_LANGUAGE_PATTERNS = {
+    'zh': ['UD_Chinese-*', 'UD_Chinese_GSD', 'UD_Chinese-PUD'],
+    'de': ['UD_German-*', 'UD_German_GSD', 'UD_German-HDT'],
+    'ru': ['UD_Russian-*', 'UD_Russian_GSD', 'UD_Russian-SynTagRus'],
+    'fr': ['UD_French-*', 'UD_French_GSD', 'UD_French-Sequoia'],
+    'it': ['UD_Italian-*', 'UD_Italian_ISDT', 'UD_Italian-PoSTWITA'],
+    'ja': ['UD_Japanese-*', 'UD_Japanese_GSD', 'UD_Japanese-BCCWJ'],
+    'ar': ['UD_Arabic-*', 'UD_Arabic_PADT', 'UD_Arabic-NYUAD'],
+    'hi': ['UD_Hindi-*', 'UD_Hindi_HDTB', 'UD_Hindi-English-HIENCS']
+}
+
+SPLIT_PATTERN = re.compile(r'-ud-(train|dev|test)\b')
 
 def find_ud_treebanks(base_path):
     """
@@ -15,19 +36,7 @@ def find_ud_treebanks(base_path):
     """
     treebanks = {}
     
-    # Map our language codes to UD treebank patterns
-    language_mapping = {
-        'zh': ['UD_Chinese-*', 'UD_Chinese_GSD', 'UD_Chinese-PUD'],
-        'de': ['UD_German-*', 'UD_German_GSD', 'UD_German-HDT'],
-        'ru': ['UD_Russian-*', 'UD_Russian_GSD', 'UD_Russian-SynTagRus'],
-        'fr': ['UD_French-*', 'UD_French_GSD', 'UD_French-Sequoia'],
-        'it': ['UD_Italian-*', 'UD_Italian_ISDT', 'UD_Italian-PoSTWITA'],
-        'ja': ['UD_Japanese-*', 'UD_Japanese_GSD', 'UD_Japanese-BCCWJ'],
-        'ar': ['UD_Arabic-*', 'UD_Arabic_PADT', 'UD_Arabic-NYUAD'],
-        'hi': ['UD_Hindi-*', 'UD_Hindi_HDTB', 'UD_Hindi-English-HIENCS']
-    }
-    
-    for lang_code, patterns in language_mapping.items():
+    for lang_code, patterns in UD_LANGUAGE_PATTERNS.items():
         for pattern in patterns:
             search_path = os.path.join(base_path, pattern, "*.conllu")
             files = glob.glob(search_path)
@@ -38,107 +47,57 @@ def find_ud_treebanks(base_path):
     
     return treebanks
 
-def parse_conllu_file(file_path):
+def build_corpus_manifest(base_path):
     """
-    Parse a CONLL-U file and extract sentences with annotations
+    List every treebank and split for each language
+
+    Unlike find_ud_treebanks, every pattern is searched and every .conllu file
+    is kept. Returns {lang_code: [{'treebank', 'split', 'path', 'size'}, ...]}
+    ordered train, dev, test within each treebank.
     """
-    sentences = []
-    
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            current_sentence = []
-            sentence_text = ""
-            
-            for line in f:
-                line = line.strip()
-                
-                if line.startswith('# text = '):
-                    sentence_text = line[9:]
-                
-                elif line.startswith('#'):
-                    continue
-                
-                elif not line:  # Empty line indicates sentence end
-                    if current_sentence and sentence_text:
-                        sentences.append({
-                            'text': sentence_text,
-                            'tokens': current_sentence
-                        })
-                    current_sentence = []
-                    sentence_text = ""
-                
-                else:
-                    # Parse token line: ID FORM LEMMA UPOS XPOS FEATS HEAD DEPREL DEPS MISC
-                    parts = line.split('\t')
-                    if len(parts) >= 10 and '-' not in parts[0]:  # Skip multi-word tokens
-                        token_info = {
-                            'id': parts[0],
-                            'form': parts[1],
-                            'lemma': parts[2],
-                            'upos': parts[3],  # Universal POS tag
-                            'xpos': parts[4],  # Language-specific POS tag
-                            'feats': parts[5],
-                            'head': parts[6],
-                            'deprel': parts[7],  # Dependency relation
-                            'deps': parts[8],
-                            'misc': parts[9]
-                        }
-                        current_sentence.append(token_info)
+    split_order = {'train': 0, 'dev': 1, 'test': 2}
+    manifest = {}
     
-    except Exception as e:
-        print(f"Error parsing {file_path}: {e}")
+    for lang_code, patterns in UD_LANGUAGE_PATTERNS.items():
+        paths = set()
+        for pattern in patterns:
+            paths.update(glob.glob(os.path.join(base_path, pattern, "*.conllu")))
+        
+        entries = []
+        for path in paths:
+            match = SPLIT_PATTERN.search(os.path.basename(path))
+            entries.append({
+                'treebank': os.path.basename(os.path.dirname(path)),
+                'split': match.group(1) if match else 'other',
+                'path': path,
+                'size': os.path.getsize(path)
+            })
+        entries.sort(key=lambda e: (e['treebank'], split_order.get(e['split'], 3), e['path']))
+        
+        if entries:
+            manifest[lang_code] = entries
     
-    return sentences
+    return manifest
 
-def analyze_grammar_patterns(sentences, language_code):
+def print_corpus_manifest(manifest):
+    print("📚 Corpus manifest:")
+    for lang_code, entries in manifest.items():
+        treebank_names = sorted({e['treebank'] for e in entries})
+        size_mb = sum(e['size'] for e in entries) / 1e6
+        print(f"  {lang_code}: {len(treebank_names)} treebanks, {len(entries)} files, {size_mb:.1f} MB")
+        for entry in entries:
+            print(f"    {entry['treebank']:<32} {entry['split']:<6} {entry['size'] / 1e6:8.1f} MB")
+
+def analyze_grammar_patterns(treebank, language_code):
     """
-    Analyze sentences to extract common grammar patterns
+    Analyze a columnar treebank to extract common grammar patterns
     """
-    patterns = defaultdict(list)
-    pos_stats = Counter()
-    deprel_stats = Counter()
+    # POS and dependency statistics come straight from the columns
+    pos_stats = treebank.column_counts('upos')
+    deprel_stats = treebank.column_counts('deprel')
     
-    for sentence in sentences:
-        text = sentence['text']
-        tokens = sentence['tokens']
-        
-        # Collect POS and dependency statistics
-        for token in tokens:
-            pos_stats[token['upos']] += 1
-            deprel_stats[token['deprel']] += 1
-        
-        # Extract specific grammar patterns
-        for i, token in enumerate(tokens):
-            # Subject-verb patterns
-            if token['deprel'] == 'nsubj':
-                head_token = next((t for t in tokens if t['id'] == token['head']), None)
-                if head_token and head_token['upos'] == 'VERB':
-                    patterns['subject_verb'].append({
-                        'subject': token['form'],
-                        'verb': head_token['form'],
-                        'sentence': text
-                    })
-            
-            # Object patterns
-            elif token['deprel'] in ['obj', 'iobj']:
-                head_token = next((t for t in tokens if t['id'] == token['head']), None)
-                if head_token and head_token['upos'] == 'VERB':
-                    patterns['verb_object'].append({
-                        'object': token['form'],
-                        'verb': head_token['form'],
-                        'sentence': text
-                    })
-            
-            # Modifier patterns
-            elif token['deprel'] in ['amod', 'advmod']:
-                head_token = next((t for t in tokens if t['id'] == token['head']), None)
-                if head_token:
-                    patterns['modifiers'].append({
-                        'modifier': token['form'],
-                        'modified': head_token['form'],
-                        'relation': token['deprel'],
-                        'sentence': text
-                    })
+    # Subject-verb, verb-object and modifier patterns in one pass
+    patterns = extract_patterns(treebank, language_code, ['basic'])['basic']
     
     print(f"  POS distribution: {dict(pos_stats.most_common(5))}")
     print(f"  Top dependencies: {dict(deprel_stats.most_common(5))}")
@@ -167,7 +126,7 @@ def create_grammar_rules_from_patterns(patterns, language_code, pos_stats, depre
         sv_rule = {
             'name': 'Subject-Verb Structure',
             'description': 'Basic sentence structure with subjects and verbs',
-            'examples': [p['sentence'] for p in patterns['subject_verb'][:3]],
+            'examples': patterns['subject_verb'].examples(3),
             'difficulty': 2
         }
         grammar_rules.append(sv_rule)
@@ -176,7 +135,7 @@ def create_grammar_rules_from_patterns(patterns, language_code, pos_stats, depre
         vo_rule = {
             'name': 'Verb-Object Structure',
             'description': 'Verbs with their objects',
-            'examples': [p['sentence'] for p in patterns['verb_object'][:3]],
+            'examples': patterns['verb_object'].examples(3),
             'difficulty': 2
         }
         grammar_rules.append(vo_rule)
@@ -186,38 +145,60 @@ def create_grammar_rules_from_patterns(patterns, language_code, pos_stats, depre
         mod_rule = {
             'name': 'Modifier Usage',
             'description': 'How adjectives and adverbs modify other words',
-            'examples': [p['sentence'] for p in patterns['modifiers'][:3]],
+            'examples': patterns['modifiers'].examples(3),
             'difficulty': 2
         }
         grammar_rules.append(mod_rule)
     
     return grammar_rules
 
-def integrate_language_treebank(language_code, file_path):
+def analyze_treebank_files(language_code, file_paths):
     """
-    Integrate a single language's treebank
+    Load and analyze one language's treebank files; runs in an ingestion worker process
+
+    Sentences repeated across the files are counted once. Only compact
+    results are returned: the rule dicts and counts. The writer streams the
+    sentences themselves from the treebank caches.
     """
-    print(f"\nProcessing {language_code} from {file_path}")
-    
-    # Parse the treebank
-    sentences = parse_conllu_file(file_path)
-    print(f"  Found {len(sentences)} sentences")
+    # Load the files as one deduplicated corpus (memory-mapped from cache when possible)
+    treebank = load_corpus(file_paths)
+    result = {
+        'sentence_count': len(treebank),
+        'token_count': treebank.token_count,
+        'duplicate_count': treebank.duplicate_count,
+        'grammar_rules': []
+    }
     
-    if not sentences:
-        return 0
+    if not result['sentence_count']:
+        return result
     
     # Analyze patterns
-    patterns, pos_stats, deprel_stats = analyze_grammar_patterns(sentences, language_code)
+    patterns, pos_stats, deprel_stats = analyze_grammar_patterns(treebank, language_code)
     
     # Create grammar rules
-    grammar_rules = create_grammar_rules_from_patterns(patterns, language_code, pos_stats, deprel_stats)
-    print(f"  Created {len(grammar_rules)} grammar rules")
+    result['grammar_rules'] = create_grammar_rules_from_patterns(patterns, language_code, pos_stats, deprel_stats)
+    return result
+
+def write_treebank_result(language_code, file_paths, result, max_sentences=None):
+    """
+    Write one analyzed treebank to the database; runs in the single writer process
+
+    Every sentence (or the first `max_sentences`) is bulk loaded into the UD
+    tables with COPY, replacing what earlier runs stored for the same files.
+    """
+    if not result['sentence_count']:
+        return 0
+    
+    # Store the treebank sentences in UD tables
+    sources = [os.path.basename(file_path) for file_path in file_paths]
+    stored_sentences, _ = bulk_load_corpus(language_code, load_corpus(file_paths), sources, max_sentences)
     
-    # Add to database
     db = SessionLocal()
+    
+    # Add to database
     added_count = 0
     
-    for rule_data in grammar_rules:
+    for rule_data in result['grammar_rules']:
         try:
             # Find or create a concept
             concept_name = rule_data['name'].lower().replace(' ', '_')
@@ -263,50 +244,63 @@ def integrate_language_treebank(language_code, file_path):
             print(f"Error adding rule: {e}")
             continue
     
-    # Store some sentence examples in UD tables
-    stored_sentences = 0
-    for i, sentence in enumerate(sentences[:10]):  # Store first 10 sentences
-        try:
-            ud_sentence = UDTreebankSentence(
-                language_id=language_code,
-                sentence_text=sentence['text'],
-                source=os.path.basename(file_path),
-                treebank_metadata='{}'
-            )
-            db.add(ud_sentence)
-            db.flush()
-            
-            # Store token analysis
-            for token in sentence['tokens']:
-                ud_token = UDTokenAnalysis(
-                    sentence_id=ud_sentence.sentence_id,
-                    token_id=token['id'],
-                    form=token['form'],
-                    lemma=token['lemma'],
-                    upos=token['upos'],
-                    xpos=token['xpos'],
-                    feats=token['feats'],
-                    head=token['head'],
-                    deprel=token['deprel']
-                )
-                db.add(ud_token)
-            
-            stored_sentences += 1
-            
-        except Exception as e:
-            print(f"Error storing sentence: {e}")
-            continue
-    
     db.commit()
     db.close()
     
-    print(f"  ✅ Added {added_count} rules and {stored_sentences} example sentences")
+    print(f"  ✅ Added {added_count} rules and {stored_sentences} treebank sentences for {language_code}")
     return added_count
 
+def integrate_language_treebank(language_code, file_paths):
+    """
+    Integrate a single language's treebank files in this process
+    """
+    print(f"\nProcessing {language_code} from {', '.join(file_paths)}")
+    result = analyze_treebank_files(language_code, file_paths)
+    print(f"  Found {result['sentence_count']} sentences, {result['token_count']} tokens "
+          f"({result['duplicate_count']} duplicates skipped)")
+    print(f"  Created {len(result['grammar_rules'])} grammar rules")
+    return write_treebank_result(language_code, file_paths, result)
+
+def select_treebank_files(treebanks):
+    """
+    Pick one train or dev file per language as an ingestion job
+    """
+    jobs = []
+    for lang_code, files in treebanks.items():
+        for file_path in files:
+            if 'train.conllu' in file_path or 'dev.conllu' in file_path:
+                jobs.append((lang_code, [file_path]))
+                break  # Process only one file per language unless --manifest is given
+    return jobs
+
+def select_ingestion_jobs(ud_base_path, use_manifest, workers):
+    """
+    Build the (language, files) jobs for a run: one file per language, or every
+    file from the corpus manifest with their caches warmed in parallel first
+    """
+    if not use_manifest:
+        treebanks = find_ud_treebanks(ud_base_path)
+        if treebanks:
+            print(f"Found treebanks for {len(treebanks)} languages: {list(treebanks.keys())}")
+        return select_treebank_files(treebanks)
+    
+    manifest = build_corpus_manifest(ud_base_path)
+    print_corpus_manifest(manifest)
+    warm_treebank_caches([e['path'] for entries in manifest.values() for e in entries], workers)
+    return [(lang_code, [e['path'] for e in entries]) for lang_code, entries in manifest.items()]
+
 def main():
     """
     Main integration function
     """
+    parser = argparse.ArgumentParser(description='Integrate local Universal Dependencies treebanks')
+    add_ingestion_arguments(parser)
+    parser.add_argument(
+        '--max-sentences', type=int, default=None,
+        help='Store at most this many sentences per language in the UD tables (default: all)'
+    )
+    args = parser.parse_args()
+    
     ud_base_path = "/home/zaya/Downloads/Workspace/Universal_Dependencies_2.16/ud-treebanks-v2.16"
     
     if not os.path.exists(ud_base_path):
@@ -314,24 +308,20 @@ def main():
         return
     
     # Find available treebanks
-    treebanks = find_ud_treebanks(ud_base_path)
+    jobs = select_ingestion_jobs(ud_base_path, args.manifest, args.workers)
     
-    if not treebanks:
+    if not jobs:
         print("No UD treebanks found for target languages")
         return
     
-    print(f"Found treebanks for {len(treebanks)} languages: {list(treebanks.keys())}")
-    
-    total_rules_added = 0
-    
-    for lang_code, files in treebanks.items():
-        for file_path in files:
-            if 'train.conllu' in file_path or 'dev.conllu' in file_path:
-                rules_added = integrate_language_treebank(lang_code, file_path)
-                total_rules_added += rules_added
-                break  # Process only one file per language for now
+    total_rules_added = run_ingestion(
+        jobs,
+        analyze_treebank_files,
+        partial(write_treebank_result, max_sentences=args.max_sentences),
+        workers=args.workers
+    )
     
     print(f"\n🎉 Integration complete! Added {total_rules_added} UD-based grammar rules")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
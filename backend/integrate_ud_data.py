@@ -7,12 +7,14 @@ import requests
 import re
 from collections import defaultdict, Counter
 from config.database import SessionLocal
+from conllu.reader import iter_sentences, SentenceCounter
+from grammar_patterns import extract_patterns
 from models.language_models import GrammarRule, RuleExample, GrammarConcept
 from sqlalchemy import func
 
 def download_ud_treebank(language_code, treebank_name):
     """
-    Download UD treebank data
+    Stream UD treebank data line by line as it downloads
     """
     base_url = "https://raw.githubusercontent.com/UniversalDependencies/"
     
@@ -36,112 +38,19 @@ def download_ud_treebank(language_code, treebank_name):
     url = f"{base_url}{treebank}/master/{treebank.lower()}-ud-train.conllu"
     
     try:
-        response = requests.get(url)
+        response = requests.get(url, stream=True)
         response.raise_for_status()
-        return response.text
+        response.encoding = 'utf-8'
+        return response.iter_lines(decode_unicode=True)
     except requests.RequestException as e:
         print(f"Error downloading {treebank}: {e}")
         return None
 
-def parse_conllu(data):
-    """
-    Parse CONLL-U format data
-    """
-    sentences = []
-    current_sentence = []
-    
-    for line in data.split('\n'):
-        line = line.strip()
-        
-        if line.startswith('#'):
-            if line.startswith('# text = '):
-                sentence_text = line[9:]
-            continue
-            
-        if not line:  # Empty line indicates sentence end
-            if current_sentence:
-                sentences.append({
-                    'text': sentence_text,
-                    'tokens': current_sentence
-                })
-                current_sentence = []
-            continue
-            
-        # Parse token line: ID FORM LEMMA UPOS XPOS FEATS HEAD DEPREL DEPS MISC
-        parts = line.split('\t')
-        if len(parts) >= 10 and '-' not in parts[0]:  # Skip multi-word tokens
-            token_info = {
-                'id': parts[0],
-                'form': parts[1],
-                'lemma': parts[2],
-                'upos': parts[3],  # Universal POS tag
-                'xpos': parts[4],  # Language-specific POS tag
-                'feats': parts[5],
-                'head': parts[6],
-                'deprel': parts[7],  # Dependency relation
-                'deps': parts[8],
-                'misc': parts[9]
-            }
-            current_sentence.append(token_info)
-    
-    return sentences
-
 def extract_grammar_patterns(sentences, language_code):
     """
-    Extract common grammar patterns from UD data
+    Extract common grammar patterns from UD data in one pass ('ud' pattern set)
     """
-    patterns = defaultdict(list)
-    
-    for sentence in sentences:
-        text = sentence['text']
-        tokens = sentence['tokens']
-        
-        # Extract dependency patterns
-        dep_relations = [(t['form'], t['deprel']) for t in tokens]
-        
-        # Common patterns to look for
-        for i, token in enumerate(tokens):
-            # Subject-verb relationships
-            if token['deprel'] == 'nsubj':
-                head_token = next((t for t in tokens if t['id'] == token['head']), None)
-                if head_token and head_token['upos'] == 'VERB':
-                    patterns['nsubj'].append({
-                        'subject': token['form'],
-                        'verb': head_token['form'],
-                        'sentence': text
-                    })
-            
-            # Object-verb relationships
-            elif token['deprel'] in ['obj', 'iobj']:
-                head_token = next((t for t in tokens if t['id'] == token['head']), None)
-                if head_token and head_token['upos'] == 'VERB':
-                    patterns['obj'].append({
-                        'object': token['form'],
-                        'verb': head_token['form'],
-                        'sentence': text
-                    })
-            
-            # Adjective-noun relationships
-            elif token['deprel'] == 'amod':
-                head_token = next((t for t in tokens if t['id'] == token['head']), None)
-                if head_token and head_token['upos'] == 'NOUN':
-                    patterns['amod'].append({
-                        'adjective': token['form'],
-                        'noun': head_token['form'],
-                        'sentence': text
-                    })
-            
-            # Adverb-verb relationships
-            elif token['deprel'] == 'advmod':
-                head_token = next((t for t in tokens if t['id'] == token['head']), None)
-                if head_token and head_token['upos'] == 'VERB':
-                    patterns['advmod'].append({
-                        'adverb': token['form'],
-                        'verb': head_token['form'],
-                        'sentence': text
-                    })
-    
-    return patterns
+    return extract_patterns(sentences, language_code, ['ud'])['ud']
 
 def map_ud_to_grammar_concepts(patterns, language_code):
     """
@@ -157,22 +66,22 @@ def map_ud_to_grammar_concepts(patterns, language_code):
     
     grammar_rules = []
     
-    for pattern_type, examples in patterns.items():
+    for pattern_type, stats in patterns.items():
         if pattern_type in concept_mapping:
             concept_name = concept_mapping[pattern_type]
             
             # Get the most frequent patterns
-            if examples:
+            if stats:
                 # Create a rule based on this pattern
-                rule_description = f"Pattern extracted from UD data: {pattern_type.upper()} relationship"
+                rule_description = f"Pattern extracted from UD data: {pattern_type.upper()} relationship ({stats.count} occurrences)"
                 
-                # Use first few examples
-                sample_examples = examples[:3]
+                # Use a few sampled examples
+                sample_examples = stats.examples(3)
                 
                 grammar_rules.append({
                     'concept': concept_name,
                     'description': rule_description,
-                    'examples': [ex['sentence'] for ex in sample_examples],
+                    'examples': sample_examples,
                     'pattern_type': pattern_type
                 })
     
@@ -185,21 +94,20 @@ def integrate_ud_for_language(language_code):
     print(f"Integrating UD data for {language_code}...")
     
     # Download UD data
-    ud_data = download_ud_treebank(language_code, None)
-    if not ud_data:
+    ud_lines = download_ud_treebank(language_code, None)
+    if not ud_lines:
         print(f"No UD data available for {language_code}")
         return 0
     
-    # Parse the data
-    sentences = parse_conllu(ud_data)
-    print(f"Parsed {len(sentences)} sentences for {language_code}")
+    # Parse and extract patterns while the data is still downloading
+    sentences = SentenceCounter(iter_sentences(ud_lines))
+    patterns = extract_grammar_patterns(sentences, language_code)
+    print(f"Parsed {sentences.count} sentences for {language_code}")
     
-    if not sentences:
+    if not sentences.count:
         print(f"No sentences parsed for {language_code}")
         return 0
     
-    # Extract patterns
-    patterns = extract_grammar_patterns(sentences, language_code)
     print(f"Extracted {sum(len(v) for v in patterns.values())} grammar patterns")
     
     # Map to grammar concepts
@@ -1,9 +1,11 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from config.database import engine, Base
-from models.language_models import Language, GrammarConcept, GrammarRule
+from config.database import engine, Base, database_pool_stats
+from models.language_models import Language, GrammarConcept, GrammarRule, refresh_missing_language_stats
 from api.routes import languages  # Add this import
 from api.routes import grammar
+from api.routes import treebank
+from api.schemas import SchemaJSONResponse
 
 # Import all models to ensure they are registered with Base
 from models.language_models import *
@@ -12,11 +14,13 @@ from models.language_models import *
 def create_tables():
     """Create all database tables"""
     Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        refresh_missing_language_stats(connection)
     print("✅ Database tables created successfully!")
 
 create_tables()
 
-app = FastAPI(title="Zayas Grammar API", version="1.0.0")
+app = FastAPI(title="Zayas Grammar API", version="1.0.0", default_response_class=SchemaJSONResponse)
 
 # CORS middleware
 app.add_middleware(
@@ -25,11 +29,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Link", "ETag"],  # Rule list and concordance pagination, revalidation
 )
 
 # Include routers
 app.include_router(languages.router)  # Add this line
 app.include_router(grammar.router)
+app.include_router(treebank.router)
 
 @app.get("/")
 async def root():
@@ -39,6 +45,11 @@ async def root():
 async def health_check():
     return {"status": "healthy", "database": "connected"}
 
+@app.get("/api/health/pool")
+async def pool_stats():
+    # Per worker process: compare workers x (pool_size + max_overflow) with max_connections
+    return database_pool_stats()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -1,7 +1,39 @@
-from sqlalchemy import Column, String, Integer, Text, TIMESTAMP, Boolean, ForeignKey
+from itertools import chain
+
+from sqlalchemy import (
+    Column, String, Integer, SmallInteger, BigInteger, Text, TIMESTAMP, Boolean, ForeignKey, Index, Computed, DDL,
+    UniqueConstraint, ForeignKeyConstraint, event, inspect, update, select, exists, tuple_, literal
+)
+from sqlalchemy.dialects.postgresql import insert, TSVECTOR, JSONB
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred, Session
 from config.database import Base
+from cjk_ngrams import text_ngrams
+from romanization import normalize_romanization
+
+# Text search configuration of the search vectors. 'simple' only lowercases, so
+# it treats every language alike (no stemming or stop words).
+TEXT_SEARCH_CONFIG = 'simple'
+
+def search_vector_column(*weighted_columns):
+    """
+    Generated tsvector over (column, weight) pairs, kept up to date by Postgres
+    """
+    parts = [
+        f"setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce({column}, '')), '{weight}')"
+        for column, weight in weighted_columns
+    ]
+    # Deferred: only /grammar/search reads it, so loading whole rows skips it
+    return deferred(Column(TSVECTOR, Computed(" || ".join(parts), persisted=True)))
+
+def trigram_index(name, column):
+    """
+    GIN trigram index for pg_trgm's fuzzy operators on `column`
+    """
+    return Index(name, column, postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'})
+
+# Trigram indexes need pg_trgm; create it before the tables (schema.sql does the same)
+event.listen(Base.metadata, 'before_create', DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
 
 class Language(Base):
     __tablename__ = "languages"
@@ -34,56 +66,174 @@ class GrammarRule(Base):
     is_active = Column(Boolean, default=True)
     created_at = Column(TIMESTAMP, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+    search_vector = search_vector_column(('rule_name', 'A'), ('rule_description', 'B'))
     
     # Relationships
     language = relationship("Language")
     concept = relationship("GrammarConcept")
     examples = relationship("RuleExample", back_populates="rule", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Keyset pagination of /grammar/rules within a language
+        Index('ix_grammar_rules_language_rule', 'language_id', 'rule_id'),
+        # /grammar/search
+        Index('ix_grammar_rules_search_vector', 'search_vector', postgresql_using='gin'),
+        trigram_index('ix_grammar_rules_rule_name_trgm', 'rule_name'),
+    )
+
 class RuleExample(Base):
     __tablename__ = "rule_examples"
     
     example_id = Column(Integer, primary_key=True, autoincrement=True)
-    rule_id = Column(Integer, ForeignKey('grammar_rules.rule_id'), nullable=False)
+    rule_id = Column(Integer, ForeignKey('grammar_rules.rule_id'), nullable=False, index=True)
     example_sentence = Column(Text, nullable=False)
     example_translation = Column(Text)
     example_romanization = Column(Text)
+    example_romanization_normalized = Column(Text)  # normalize_romanization(example_romanization), set on flush
     example_gloss = Column(Text)
     notes = Column(Text)
+    search_vector = search_vector_column(
+        ('example_sentence', 'A'), ('example_translation', 'B'), ('example_romanization', 'B')
+    )
     
     # Relationships
     rule = relationship("GrammarRule", back_populates="examples")
+
+    __table_args__ = (
+        # /grammar/search
+        Index('ix_rule_examples_search_vector', 'search_vector', postgresql_using='gin'),
+        trigram_index('ix_rule_examples_sentence_trgm', 'example_sentence'),
+        trigram_index('ix_rule_examples_translation_trgm', 'example_translation'),
+        trigram_index('ix_rule_examples_romanization_normalized_trgm', 'example_romanization_normalized'),
+    )
+
+@event.listens_for(RuleExample, "before_insert")
+@event.listens_for(RuleExample, "before_update")
+def _normalize_example_romanization(mapper, connection, example):
+    example.example_romanization_normalized = normalize_romanization(example.example_romanization)
+
+class RuleExampleNgram(Base):
+    """
+    Inverted index of the CJK character unigrams and bigrams of each example sentence
+
+    Written by the after_flush hook below as examples are added or edited (and
+    rebuilt in bulk by `python cjk_ngrams.py`); rows go with their example
+    through ON DELETE CASCADE.
+    """
+    __tablename__ = "rule_example_ngrams"
+
+    gram = Column(String(2), primary_key=True)
+    example_id = Column(
+        Integer, ForeignKey('rule_examples.example_id', ondelete='CASCADE'), primary_key=True, index=True
+    )
     
     
 # Replace the UDTreebankSentence class with this corrected version:
 
+# The UD tables are list-partitioned by language_id, one partition per
+# language (ud_treebank_sentences_de, ud_token_analysis_de, ...). Queries for
+# one language only read its partitions; ud_bulk_loader creates them and
+# swaps in a freshly loaded pair on a full reload.
+UD_PARTITION_BY = {'postgresql_partition_by': 'LIST (language_id)'}
+
 class UDTreebankSentence(Base):
     __tablename__ = "ud_treebank_sentences"
     
     sentence_id = Column(Integer, primary_key=True, autoincrement=True)
-    language_id = Column(String(2), ForeignKey('languages.language_id'), nullable=False)
+    language_id = Column(String(2), ForeignKey('languages.language_id'), primary_key=True)  # partition key
     sentence_text = Column(Text, nullable=False)
     source = Column(String(100))  # Which UD treebank
     treebank_metadata = Column(Text)  # Changed from 'metadata' to 'treebank_metadata'
     
     language = relationship("Language")
 
+    __table_args__ = (UD_PARTITION_BY,)
+
+class UDLexeme(Base):
+    """
+    Per-language dictionary of the forms and lemmas of the stored treebanks
+    """
+    __tablename__ = "ud_lexicon"
+
+    lexeme_id = Column(Integer, primary_key=True, autoincrement=True)
+    language_id = Column(String(2), ForeignKey('languages.language_id'), nullable=False)
+    text = Column(String(500), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('language_id', 'text', name='uq_ud_lexicon_language_text'),
+    )
+
+class UDTag(Base):
+    """
+    Dictionary of the UPOS tags, XPOS tags and deprels of the stored treebanks
+    """
+    __tablename__ = "ud_tags"
+
+    tag_id = Column(SmallInteger, primary_key=True, autoincrement=True)
+    kind = Column(String(10), nullable=False)  # 'upos', 'xpos' or 'deprel'
+    value = Column(String(100), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('kind', 'value', name='uq_ud_tags_kind_value'),
+    )
+
+class UDFeatureSet(Base):
+    """
+    Dictionary of the distinct FEATS strings of the stored treebanks
+    """
+    __tablename__ = "ud_feature_sets"
+
+    feats_id = Column(Integer, primary_key=True, autoincrement=True)
+    feats = Column(Text, nullable=False, unique=True)
+    features = Column(JSONB)  # FEATS parsed, values as lists: {"Case": ["Acc", "Dat"]}
+
+    __table_args__ = (
+        # Feature containment, e.g. features @> '{"Case": ["Dat"]}'
+        Index('ix_ud_feature_sets_features', 'features', postgresql_using='gin',
+              postgresql_ops={'features': 'jsonb_path_ops'}),
+    )
+
 class UDTokenAnalysis(Base):
+    """
+    One token of a stored sentence
+
+    Forms, lemmas, tags and FEATS are ids into the dictionary tables above
+    (ud_bulk_loader interns them), which keeps the rows and their indexes a
+    fraction of the size of repeated strings.
+    """
     __tablename__ = "ud_token_analysis"
     
     analysis_id = Column(Integer, primary_key=True, autoincrement=True)
-    sentence_id = Column(Integer, ForeignKey('ud_treebank_sentences.sentence_id'), nullable=False)
+    sentence_id = Column(Integer, nullable=False)
+    language_id = Column(String(2), ForeignKey('languages.language_id'), primary_key=True)  # copied from the sentence; partition key
     token_id = Column(String(20))  # Increased from 10 to 20
-    form = Column(String(500))     # Increased from 200 to 500
-    lemma = Column(String(500))    # Increased from 200 to 500
-    upos = Column(String(50))      # Increased from 20 to 50
-    xpos = Column(String(100))     # Increased from 20 to 100
-    feats = Column(Text)           # Already Text - good
+    form_id = Column(Integer, ForeignKey('ud_lexicon.lexeme_id'))
+    lemma_id = Column(Integer, ForeignKey('ud_lexicon.lexeme_id'))
+    upos_id = Column(SmallInteger, ForeignKey('ud_tags.tag_id'))
+    xpos_id = Column(SmallInteger, ForeignKey('ud_tags.tag_id'))
+    feats_id = Column(Integer, ForeignKey('ud_feature_sets.feats_id'))  # NULL without features
     head = Column(String(20))      # Increased from 10 to 20
-    deprel = Column(String(50))    # Increased from 20 to 50
+    deprel_id = Column(SmallInteger, ForeignKey('ud_tags.tag_id'))
     
     sentence = relationship("UDTreebankSentence")
 
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ['sentence_id', 'language_id'],
+            ['ud_treebank_sentences.sentence_id', 'ud_treebank_sentences.language_id'],
+        ),
+        # /treebank/{language_id}/concordance: each filter is a range scan
+        # that already returns its matches in keyset (analysis_id) order.
+        # Partitions hold one language, so the keys need no language_id.
+        Index('ix_ud_token_analysis_lemma', 'lemma_id', 'analysis_id'),
+        Index('ix_ud_token_analysis_upos', 'upos_id', 'analysis_id'),
+        Index('ix_ud_token_analysis_deprel', 'deprel_id', 'analysis_id'),
+        Index('ix_ud_token_analysis_feats', 'feats_id', 'analysis_id'),
+        # Tokens of the matched sentences, for the context on either side
+        Index('ix_ud_token_analysis_sentence_token', 'sentence_id', 'token_id'),
+        UD_PARTITION_BY,
+    )
+
 class GrammarPattern(Base):
     __tablename__ = "grammar_patterns"
     
@@ -94,4 +244,229 @@ class GrammarPattern(Base):
     frequency = Column(Integer)  # How common in UD data
     example_sentence = Column(Text)
     
-    language = relationship("Language")
\ No newline at end of file
+    language = relationship("Language")
+
+# Catalog versions: one counter per language plus ALL_LANGUAGES, bumped in the
+# same transaction as any change to rules, examples, concepts or languages.
+# The API response cache (api/cache.py) compares them to its cached entries.
+
+ALL_LANGUAGES = '*'
+
+class CatalogVersion(Base):
+    __tablename__ = "catalog_versions"
+
+    language_id = Column(String(2), primary_key=True)  # ALL_LANGUAGES for cross-language data
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+
+def _increment_catalog_versions(connection, language_ids):
+    for language_id in sorted(language_ids):
+        statement = insert(CatalogVersion.__table__).values(language_id=language_id, version=1)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=['language_id'],
+            set_={'version': CatalogVersion.version + 1, 'updated_at': func.now()}
+        ))
+
+def bump_catalog_version(connection, language_ids=None):
+    """
+    Increment the catalog version of `language_ids` and of ALL_LANGUAGES
+
+    With no language ids, every language's version is incremented (used when
+    a change cannot be attributed to one language): the existing rows, which
+    include languages deleted since, and a new row at version 1 for any
+    language that has none yet, so none stays at the cache's default of 0.
+    """
+    if language_ids is None:
+        connection.execute(
+            update(CatalogVersion.__table__)
+            .where(CatalogVersion.language_id != ALL_LANGUAGES)
+            .values(version=CatalogVersion.version + 1, updated_at=func.now())
+        )
+        connection.execute(
+            insert(CatalogVersion.__table__)
+            .from_select(['language_id', 'version'], select(Language.language_id, literal(1)))
+            .on_conflict_do_nothing(index_elements=['language_id'])
+        )
+        language_ids = []
+    _increment_catalog_versions(connection, {ALL_LANGUAGES, *language_ids})
+
+def _changed_catalog_languages(session):
+    """
+    Languages touched by the pending changes of `session`; None means all of them
+    """
+    languages = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, GrammarRule):
+            languages.add(obj.language_id)
+        elif isinstance(obj, RuleExample):
+            rule = obj.rule or session.get(GrammarRule, obj.rule_id)
+            if rule is None:
+                return None
+            languages.add(rule.language_id)
+        elif isinstance(obj, (Language, GrammarConcept)):
+            return None
+    return languages
+
+@event.listens_for(Session, "after_flush")
+def _bump_catalog_versions(session, flush_context):
+    if not any(
+        isinstance(obj, (GrammarRule, RuleExample, Language, GrammarConcept))
+        for obj in chain(session.new, session.dirty, session.deleted)
+    ):
+        return
+
+    # One bump per language and transaction is enough, however many flushes it has
+    # (None marks a bump of every language; languages added after it are still
+    # upserted when a later flush touches them)
+    bumped = session.info.setdefault('catalog_versions_bumped', set())
+    languages = _changed_catalog_languages(session)
+    if languages is None:
+        if None not in bumped:
+            bump_catalog_version(session.connection())
+            bumped.update((ALL_LANGUAGES, None))
+    else:
+        pending = (languages | {ALL_LANGUAGES}) - bumped
+        if pending:
+            _increment_catalog_versions(session.connection(), pending)
+            bumped.update(pending)
+
+@event.listens_for(Session, "after_flush")
+def _index_example_ngrams(session, flush_context):
+    changed = [
+        obj for obj in chain(session.new, session.dirty)
+        if isinstance(obj, RuleExample) and (obj in session.new or _sentence_changed(obj))
+    ]
+    if not changed:
+        return
+
+    connection = session.connection()
+    table = RuleExampleNgram.__table__
+    edited = [obj.example_id for obj in changed if obj not in session.new]
+    if edited:
+        connection.execute(table.delete().where(table.c.example_id.in_(edited)))
+    rows = [
+        {'gram': gram, 'example_id': obj.example_id}
+        for obj in changed
+        for gram in text_ngrams(obj.example_sentence)
+    ]
+    if rows:
+        connection.execute(table.insert(), rows)
+
+def _sentence_changed(example):
+    return inspect(example).attrs.example_sentence.history.has_changes()
+
+# Materialized catalog statistics: one row per language with its rule and
+# example counts and its rules per difficulty, concept and usage context.
+# Whenever a commit bumps catalog versions, the rows of exactly those languages
+# are recomputed in the same transaction, so reading statistics never needs a
+# GROUP BY over grammar_rules.
+
+NO_VALUE = ''  # histogram key of rules whose difficulty, concept or usage context is NULL
+
+class LanguageStats(Base):
+    __tablename__ = "language_stats"
+
+    language_id = Column(String(2), ForeignKey('languages.language_id', ondelete='CASCADE'), primary_key=True)
+    rule_count = Column(Integer, nullable=False, default=0)
+    example_count = Column(Integer, nullable=False, default=0)
+    rules_by_difficulty = Column(JSONB, nullable=False, default=dict)   # {"1": 12, ...}
+    rules_by_concept = Column(JSONB, nullable=False, default=dict)      # {"<concept_id>": 3, ...}
+    rules_by_usage_context = Column(JSONB, nullable=False, default=dict)
+    refreshed_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+
+# GROUPING() of (difficulty_level, concept_id, usage_context) for each grouping set below
+_STATS_GROUPINGS = {
+    0b111: None,
+    0b011: ('rules_by_difficulty', 'difficulty_level'),
+    0b101: ('rules_by_concept', 'concept_id'),
+    0b110: ('rules_by_usage_context', 'usage_context'),
+}
+
+def refresh_language_stats(connection, language_ids=None):
+    """
+    Recompute the language_stats rows of `language_ids` (every language when None)
+
+    All rule histograms come from one GROUPING SETS scan of the languages' rules,
+    and example counts from one join.
+    """
+    languages = Language.__table__
+    rules = GrammarRule.__table__
+    examples = RuleExample.__table__
+
+    query = select(languages.c.language_id)
+    if language_ids is not None:
+        query = query.where(languages.c.language_id.in_(sorted(language_ids)))
+    language_ids = connection.execute(query).scalars().all()
+    if not language_ids:
+        return
+
+    stats = {
+        language_id: {
+            'language_id': language_id, 'rule_count': 0, 'example_count': 0,
+            'rules_by_difficulty': {}, 'rules_by_concept': {}, 'rules_by_usage_context': {},
+        }
+        for language_id in language_ids
+    }
+    dimensions = (rules.c.difficulty_level, rules.c.concept_id, rules.c.usage_context)
+    grouped = connection.execute(
+        select(rules.c.language_id, *dimensions, func.grouping(*dimensions), func.count())
+        .where(rules.c.language_id.in_(language_ids))
+        .group_by(func.grouping_sets(
+            tuple_(rules.c.language_id),
+            *(tuple_(rules.c.language_id, dimension) for dimension in dimensions)
+        ))
+    )
+    for language_id, difficulty_level, concept_id, usage_context, grouping, count in grouped:
+        row = stats[language_id]
+        target = _STATS_GROUPINGS[grouping]
+        if target is None:
+            row['rule_count'] = count
+            continue
+        histogram, column = target
+        value = {'difficulty_level': difficulty_level, 'concept_id': concept_id, 'usage_context': usage_context}[column]
+        row[histogram][NO_VALUE if value is None else str(value)] = count
+
+    example_counts = connection.execute(
+        select(rules.c.language_id, func.count(examples.c.example_id))
+        .select_from(examples.join(rules, rules.c.rule_id == examples.c.rule_id))
+        .where(rules.c.language_id.in_(language_ids))
+        .group_by(rules.c.language_id)
+    )
+    for language_id, count in example_counts:
+        stats[language_id]['example_count'] = count
+
+    statement = insert(LanguageStats.__table__).values(list(stats.values()))
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=['language_id'],
+        set_={
+            **{name: statement.excluded[name] for name in (
+                'rule_count', 'example_count', 'rules_by_difficulty', 'rules_by_concept', 'rules_by_usage_context'
+            )},
+            'refreshed_at': func.now(),
+        }
+    ))
+
+def refresh_missing_language_stats(connection):
+    """
+    Fill language_stats for languages that have no row yet (new tables, rows loaded with plain SQL)
+    """
+    missing = select(Language.language_id).where(
+        ~exists().where(LanguageStats.language_id == Language.language_id)
+    )
+    language_ids = connection.execute(missing).scalars().all()
+    if language_ids:
+        refresh_language_stats(connection, language_ids)
+
+@event.listens_for(Session, "before_commit")
+def _refresh_changed_language_stats(session):
+    session.flush()  # so every change of the transaction has bumped its languages
+    bumped = session.info.get('catalog_versions_bumped')
+    if not bumped:
+        return
+    language_ids = None if None in bumped else bumped - {ALL_LANGUAGES}
+    refresh_language_stats(session.connection(), language_ids)
+
+@event.listens_for(Session, "after_transaction_end")
+def _reset_catalog_bumps(session, transaction):
+    if transaction.parent is None:
+        session.info.pop('catalog_versions_bumped', None)
@@ -5,6 +5,7 @@ Restore essential examples for key grammar rules
 
 from config.database import SessionLocal
 from models.language_models import GrammarRule, RuleExample
+from romanization import example_fields
 
 def restore_essential_examples():
     """
@@ -93,7 +94,7 @@ def restore_essential_examples():
                 for example_text in example_data['examples']:
                     example = RuleExample(
                         rule_id=rule.rule_id,
-                        example_sentence=example_text
+                        **example_fields(example_text)
                     )
                     db.add(example)
                     restored_count += 1
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Structured example fields and tone-insensitive romanization
+
+Chinese (and some other non-Latin) examples are written as one string,
+"我吃苹果。 (Wǒ chī píngguǒ.) - I eat apples.". parse_example splits such a
+string into the sentence, its romanization and its translation, which are
+stored in example_sentence, example_romanization and example_translation.
+
+normalize_romanization folds a romanization to lowercase ASCII letters
+without tones or spaces ("Wǒ chī píngguǒ." -> "wochipingguo"), so a learner
+typing "wo chi pingguo", "wo3 chi1 ping2guo3" or "pingguo" finds the example.
+The folded form is kept in rule_examples.example_romanization_normalized,
+under a trigram index that answers substring queries.
+
+    python romanization.py    # split and normalize the examples already stored
+"""
+
+import re
+import unicodedata
+from collections import namedtuple
+
+ParsedExample = namedtuple('ParsedExample', ['sentence', 'romanization', 'translation'])
+
+# "sentence (romanization) - translation", the format the frontend also recognises
+EXAMPLE_FORMAT = re.compile(r'^(?P<sentence>.+?)\s*\((?P<romanization>[^()]+)\)\s*[-–—]\s*(?P<translation>.+)$', re.S)
+
+def has_non_latin_letters(text):
+    return any(ch.isalpha() and not unicodedata.name(ch, '').startswith('LATIN') for ch in text)
+
+def parse_example(text):
+    """
+    Split an example string into ParsedExample(sentence, romanization, translation)
+
+    Only sentences in a non-Latin script are split, so a Latin-script example
+    with a parenthesis and a dash stays whole. Unsplit examples come back as
+    (text, None, None).
+    """
+    match = EXAMPLE_FORMAT.match(text.strip()) if text else None
+    if not match or not has_non_latin_letters(match.group('sentence')):
+        return ParsedExample(text, None, None)
+    romanization = match.group('romanization').strip()
+    if has_non_latin_letters(romanization):
+        return ParsedExample(text, None, None)
+    return ParsedExample(match.group('sentence').strip(), romanization, match.group('translation').strip())
+
+def example_fields(text):
+    """
+    RuleExample keyword arguments for an example string
+    """
+    parsed = parse_example(text)
+    fields = {'example_sentence': parsed.sentence}
+    if parsed.romanization:
+        fields['example_romanization'] = parsed.romanization
+        fields['example_translation'] = parsed.translation
+    return fields
+
+def normalize_romanization(text):
+    """
+    Lowercase ASCII letters of `text`, with tone marks, tone numbers, spaces and punctuation removed
+
+    ü folds to u. Returns None when nothing is left.
+    """
+    if not text:
+        return None
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    folded = ''.join(ch for ch in decomposed if 'a' <= ch <= 'z')
+    return folded or None
+
+# Macron and caron: pinyin tones 1 and 3, Hepburn long vowels. Acute and grave
+# accents are as common in French or Spanish queries, so they do not count.
+ROMANIZATION_MARKS = ('\u0304', '\u030c')
+
+def looks_romanized(text):
+    """
+    Whether `text` has tone numbers or marks that only a romanization would ("wo3", "wǒ", "tōkyō")
+    """
+    if not text:
+        return False
+    if re.search(r'[a-zü][1-5]', text.lower()):
+        return True
+    return any(ch in ROMANIZATION_MARKS for ch in unicodedata.normalize('NFD', text))
+
+def split_stored_examples(batch_size=1000):
+    """
+    Parse examples stored as one string into their fields, and fill the normalized romanization
+    """
+    from sqlalchemy import or_
+    from config.database import SessionLocal
+    from models.language_models import RuleExample
+
+    db = SessionLocal()
+    split_count = normalized_count = 0
+    last_id = 0
+    while True:
+        examples = (
+            db.query(RuleExample)
+            .filter(RuleExample.example_id > last_id)
+            .filter(or_(
+                RuleExample.example_romanization.is_(None),
+                RuleExample.example_romanization_normalized.is_(None),
+            ))
+            .order_by(RuleExample.example_id)
+            .limit(batch_size)
+            .all()
+        )
+        if not examples:
+            break
+        for example in examples:
+            if example.example_romanization is None:
+                fields = example_fields(example.example_sentence)
+                if 'example_romanization' in fields:
+                    example.example_sentence = fields['example_sentence']
+                    example.example_romanization = fields['example_romanization']
+                    example.example_translation = example.example_translation or fields['example_translation']
+                    split_count += 1
+            elif example.example_romanization_normalized is None:
+                example.example_romanization_normalized = normalize_romanization(example.example_romanization)
+                normalized_count += 1
+        db.commit()
+        last_id = examples[-1].example_id
+
+    db.close()
+    print(f"✅ Split {split_count} examples into sentence, romanization and translation")
+    print(f"✅ Normalized {normalized_count} existing romanizations")
+
+if __name__ == '__main__':
+    split_stored_examples()
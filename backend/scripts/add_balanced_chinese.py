@@ -5,6 +5,7 @@ Add balanced Chinese grammar rules to fill gaps
 
 from config.database import SessionLocal
 from models.language_models import GrammarRule, RuleExample
+from romanization import example_fields
 from sqlalchemy import func
 
 def add_balanced_chinese():
@@ -227,7 +228,7 @@ def add_balanced_chinese():
             for example_text in rule_data['examples']:
                 example = RuleExample(
                     rule_id=rule_data['rule'].rule_id,
-                    example_sentence=example_text
+                    **example_fields(example_text)
                 )
                 db.add(example)
             
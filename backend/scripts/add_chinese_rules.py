@@ -5,6 +5,7 @@ Script to add 50 Chinese grammar rules with examples
 
 from ..config.database import SessionLocal
 from ..models.language_models import GrammarRule, RuleExample
+from ..romanization import example_fields
 
 def add_chinese_rules():
     db = SessionLocal()
@@ -681,7 +682,7 @@ def add_chinese_rules():
             for example_text in rule_data['examples']:
                 example = RuleExample(
                     rule_id=rule_data['rule'].rule_id,
-                    example_sentence=example_text
+                    **example_fields(example_text)
                 )
                 db.add(example)
             
@@ -5,6 +5,7 @@ Add intermediate-level Chinese grammar rules
 
 from config.database import SessionLocal
 from models.language_models import GrammarRule, RuleExample
+from romanization import example_fields
 from sqlalchemy import func  # Add this import
 
 def add_intermediate_chinese():
@@ -296,7 +297,7 @@ def add_intermediate_chinese():
             for example_text in rule_data['examples']:
                 example = RuleExample(
                     rule_id=rule_data['rule'].rule_id,
-                    example_sentence=example_text
+                    **example_fields(example_text)
                 )
                 db.add(example)
             
@@ -5,6 +5,7 @@ Add missing examples to Chinese rules and include advanced word order patterns
 
 from config.database import SessionLocal
 from models.language_models import GrammarRule, RuleExample
+from romanization import example_fields
 
 
 def add_missing_chinese_examples():
@@ -118,7 +119,7 @@ def add_missing_chinese_examples():
             if not current_examples:  # Only add if no examples exist
                 for example_text in rule_data["examples"]:
                     example = RuleExample(
-                        rule_id=rule_data["rule_id"], example_sentence=example_text
+                        rule_id=rule_data["rule_id"], **example_fields(example_text)
                     )
                     db.add(example)
                     added_examples_count += 1
@@ -237,7 +238,7 @@ def add_advanced_word_order_rules():
 
             for example_text in rule_data["examples"]:
                 example = RuleExample(
-                    rule_id=rule_data["rule"].rule_id, example_sentence=example_text
+                    rule_id=rule_data["rule"].rule_id, **example_fields(example_text)
                 )
                 db.add(example)
                 added_examples_count += 1
@@ -0,0 +1,14 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def conllu_lines(text):
+    """
+    CoNLL-U lines from an inline string whose columns are separated by runs of spaces
+    """
+    lines = []
+    for line in text.strip('\n').split('\n'):
+        line = line.strip()
+        lines.append((line if line.startswith('#') else '\t'.join(line.split())) + '\n')
+    return lines
@@ -0,0 +1,21 @@
+from cjk_ngrams import cjk_runs, text_ngrams, query_ngrams
+
+def test_cjk_runs_split_on_other_scripts_and_punctuation():
+    assert cjk_runs('我吃苹果。 (Wǒ chī píngguǒ.) - I eat apples.') == ['我吃苹果']
+    assert cjk_runs('私は学生です (watashi wa gakusei desu)') == ['私は学生です']
+    assert cjk_runs('no CJK here') == []
+    assert cjk_runs('한국어 문법') == []  # Hangul is left to full-text search
+    assert cjk_runs(None) == []
+
+def test_text_ngrams_are_distinct_unigrams_and_bigrams():
+    assert text_ngrams('我吃苹果') == {'我', '吃', '苹', '果', '我吃', '吃苹', '苹果'}
+    assert text_ngrams('哈哈哈') == {'哈', '哈哈'}
+
+def test_text_ngrams_do_not_span_runs():
+    assert '吃苹' not in text_ngrams('我吃 苹果')
+    assert text_ngrams('I eat apples') == set()
+
+def test_query_ngrams_use_bigrams_or_the_single_character():
+    assert query_ngrams(['苹果']) == ['苹果']
+    assert query_ngrams(['我吃苹果', '果']) == ['我吃', '吃苹', '苹果', '果']
+    assert query_ngrams(['哈哈哈']) == ['哈哈']
@@ -0,0 +1,54 @@
+from conftest import conllu_lines
+from conllu.reader import iter_sentences, parse_feats, get_head
+
+GERMAN = conllu_lines("""
+# sent_id = de-1
+# text = Er wohnt im Haus.
+# genre = fiction
+1    Er      er      PRON   PPER   Case=Nom                   2  nsubj  _  _
+2    wohnt   wohnen  VERB   VVFIN  Mood=Ind                   0  root   _  _
+3-4  im      _       _      _      _                          _  _      _  _
+3    in      in      ADP    APPR   _                          5  case   _  _
+4    dem     der     DET    ART    Case=Dat|Definite=Def      5  det    _  _
+5    Haus    Haus    NOUN   NN     Case=Dat                   2  obl    _  SpaceAfter=No
+5.1  wohnt   wohnen  VERB   _      _                          _  _      2:conj  _
+6    .       .       PUNCT  $.     _                          2  punct  _  _
+""")
+
+def test_multiword_tokens_and_empty_nodes_are_kept_apart():
+    sentence, = iter_sentences(GERMAN)
+    assert [token['id'] for token in sentence['tokens']] == ['1', '2', '3', '4', '5', '6']
+    mwt, = sentence['multiword_tokens']
+    assert (mwt['form'], mwt['start'], mwt['end']) == ('im', 3, 4)
+    assert [node['id'] for node in sentence['empty_nodes']] == ['5.1']
+
+def test_comments_become_sent_id_text_and_metadata():
+    sentence, = iter_sentences(GERMAN)
+    assert sentence['sent_id'] == 'de-1'
+    assert sentence['text'] == 'Er wohnt im Haus.'
+    assert sentence['metadata'] == {'genre': 'fiction'}
+
+def test_missing_text_is_rebuilt_from_forms_and_space_after():
+    lines = [line for line in GERMAN if not line.startswith('# text')]
+    sentence, = iter_sentences(lines)
+    assert sentence['text'] == 'Er wohnt im Haus.'
+
+def test_heads_and_children_are_indexes():
+    sentence, = iter_sentences(GERMAN)
+    assert sentence['heads'] == [1, -1, 4, 4, 1, 1]
+    assert sentence['children'][1] == [0, 4, 5]
+    assert get_head(sentence, 0)['form'] == 'wohnt'
+    assert get_head(sentence, 1) is None
+
+def test_sentences_split_on_blank_lines_and_last_needs_none():
+    lines = conllu_lines("""
+1  a  a  X  _  _  0  root  _  _
+
+1  b  b  X  _  _  0  root  _  _
+""")
+    assert [sentence['text'] for sentence in iter_sentences(lines)] == ['a', 'b']
+
+def test_parse_feats():
+    assert parse_feats('Case=Acc,Dat|Number=Sing') == {'Case': 'Acc,Dat', 'Number': 'Sing'}
+    assert parse_feats('_') == {}
+    assert parse_feats('') == {}
@@ -0,0 +1,55 @@
+from conftest import conllu_lines
+from conllu.reader import iter_sentences
+from grammar_patterns import SentenceFacts, extract_patterns
+
+GERMAN = conllu_lines("""
+# text = Der Hund sieht den alten Mann heute an.
+1  Der    der     DET    ART    Case=Nom|Definite=Def         2  det          _  _
+2  Hund   Hund    NOUN   NN     Case=Nom|Number=Sing          3  nsubj        _  _
+3  sieht  ansehen VERB   VVFIN  Mood=Ind|Tense=Pres           0  root         _  _
+4  den    der     DET    ART    Case=Acc|Definite=Def         6  det          _  _
+5  alten  alt     ADJ    ADJA   Case=Acc|Degree=Pos           6  amod         _  _
+6  Mann   Mann    NOUN   NN     Case=Acc|Number=Sing          3  obj          _  _
+7  heute  heute   ADV    ADV    _                             3  advmod       _  _
+8  an     an      ADP    PTKVZ  _                             3  compound:prt _  SpaceAfter=No
+9  .      .       PUNCT  $.     _                             3  punct        _  _
+""")
+
+def german_sentence():
+    sentence, = iter_sentences(GERMAN)
+    return sentence
+
+def test_sentence_facts_index_deprels_upos_and_cases():
+    facts = SentenceFacts(german_sentence())
+    assert facts.with_deprel('nsubj') == [1]
+    assert facts.with_deprel('advmod', 'obj') == [5, 6]  # sentence order across deprels
+    assert facts.with_deprel('iobj') == []
+    assert facts.with_upos('NOUN') == [1, 5]
+    assert facts.cases == {0: 'Nom', 1: 'Nom', 3: 'Acc', 4: 'Acc', 5: 'Acc'}
+
+def test_case_inside_another_feature_is_not_a_case():
+    # Regression: 'Case=' in PrepCase=Npr used to raise KeyError and abort extraction
+    sentence, = iter_sentences(conllu_lines("""
+1  él    él    PRON  _  Case=Nom|PrepCase=Npr            2  nsubj  _  _
+2  lo    él    PRON  _  PrepCase=Npr                     3  obj    _  _
+3  dice  decir VERB  _  Mood=Ind                         0  root   _  _
+4  a     a     ADP   _  _                                5  case   _  _
+5  ella  ella  PRON  _  Case=Acc|PrepCase=Pre            3  obl    _  _
+"""))
+    assert SentenceFacts(sentence).cases == {0: 'Nom', 4: 'Acc'}
+    assert extract_patterns([sentence], 'ru', ['enhanced'])['enhanced']['cases'].count == 2
+
+def test_one_pass_runs_every_pattern_set_for_the_language():
+    results = extract_patterns([german_sentence()], 'de', ['basic', 'german'])
+    assert results['basic']['subject_verb'].most_common('subject') == [('Hund', 1)]
+    assert results['basic']['verb_object'].most_common('object') == [('Mann', 1)]
+    assert results['german']['case_usage'].count == 5
+    assert results['german']['adjective_declension'].most_common('adjective') == [('alten', 1)]
+    assert results['german']['separable_verbs'].most_common('prefix') == [('an', 1)]
+    assert 'verb_second' not in results['german']  # root verb is the third token
+
+def test_patterns_are_filtered_by_language_and_length():
+    assert 'case_usage' not in extract_patterns([german_sentence()], 'fr', ['german'])['german']
+    short = german_sentence()
+    short = {**short, 'tokens': short['tokens'][:3], 'heads': short['heads'][:3], 'children': [[], [0], [1]]}
+    assert extract_patterns([short], 'de', ['german'])['german'] == {}
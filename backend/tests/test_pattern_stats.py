@@ -0,0 +1,56 @@
+from grammar_patterns import PatternStats, extract_patterns
+
+def sentence(position):
+    return {'sent_id': f's{position}', 'text': f'sentence {position}', 'tokens': []}
+
+def sampled(seed, sentence_count=200, example_size=5):
+    stats = PatternStats(example_size=example_size, seed=seed)
+    for position in range(sentence_count):
+        stats.add(position, sentence(position), {'word': f'w{position % 7}'})
+    return stats
+
+def test_reservoir_is_bounded_and_in_corpus_order():
+    stats = sampled(seed=1)
+    assert stats.count == stats.sentence_count == 200
+    ids = stats.example_ids()
+    assert len(ids) == 5
+    positions = [int(sent_id[1:]) for sent_id in ids]
+    assert positions == sorted(positions)
+    assert stats.examples(limit=2) == [f'sentence {position}' for position in positions[:2]]
+
+def test_same_seed_picks_the_same_examples():
+    # String seeds go through random.seed's SHA-512, not hash(), so this holds across processes
+    assert sampled(seed='0:basic:subject_verb').example_ids() == ['s100', 's110', 's116', 's139', 's171']
+
+def test_reservoir_keeps_early_sentences_until_full():
+    assert sampled(seed=3, sentence_count=4).example_ids() == ['s0', 's1', 's2', 's3']
+
+def test_sentences_are_sampled_once_however_many_matches():
+    stats = PatternStats(example_size=5)
+    for match in range(3):
+        stats.add(0, sentence(0), {'word': 'a'})
+    stats.add(1, sentence(1), {'word': 'b'})
+    assert (stats.count, stats.sentence_count) == (4, 2)
+    assert stats.example_ids() == ['s0', 's1']
+    assert stats.most_common('word') == [('a', 3), ('b', 1)]
+
+def test_histograms_are_pruned_past_their_limit():
+    stats = PatternStats(histogram_limit=10)
+    for position in range(30):
+        stats.add(position, sentence(position), {'word': 'common' if position % 2 else f'rare{position}'})
+    histogram = stats.histograms['word']
+    assert len(histogram) <= 10
+    assert histogram.most_common(1)[0][0] == 'common'
+
+def test_extraction_is_reproducible_for_a_seed():
+    sentences = [
+        {'sent_id': f's{i}', 'text': f't{i}', 'tokens': [
+            {'id': '1', 'form': f'n{i}', 'upos': 'NOUN', 'deprel': 'nsubj', 'feats': '_', 'head': '2'},
+            {'id': '2', 'form': 'v', 'upos': 'VERB', 'deprel': 'root', 'feats': '_', 'head': '0'},
+        ], 'heads': [1, -1], 'children': [[], [0]]}
+        for i in range(100)
+    ]
+    first = extract_patterns(sentences, 'de', ['basic'], seed=7)['basic']['subject_verb']
+    second = extract_patterns(sentences, 'de', ['basic'], seed=7)['basic']['subject_verb']
+    assert first.count == 100
+    assert first.example_ids() == second.example_ids()
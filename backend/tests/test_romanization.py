@@ -0,0 +1,35 @@
+from romanization import parse_example, example_fields, normalize_romanization, looks_romanized
+
+def test_normalize_folds_tones_spaces_and_case():
+    assert normalize_romanization('Wǒ chī píngguǒ.') == 'wochipingguo'
+    assert normalize_romanization('wo3 chi1 ping2guo3') == 'wochipingguo'
+    assert normalize_romanization('lǜsè') == 'luse'
+    assert normalize_romanization('Tōkyō') == 'tokyo'
+
+def test_normalize_returns_none_without_letters():
+    assert normalize_romanization('') is None
+    assert normalize_romanization(None) is None
+    assert normalize_romanization('123 ...') is None
+
+def test_looks_romanized_on_tone_numbers_and_marks():
+    assert looks_romanized('wo3 chi1')
+    assert looks_romanized('lü4')
+    assert looks_romanized('Wǒ chī')
+    assert looks_romanized('tōkyō')
+
+def test_looks_romanized_ignores_plain_and_european_text():
+    for text in ('she', 'pingguo', 'café', 'naïve', 'über', '2 times', '', None):
+        assert not looks_romanized(text), text
+
+def test_parse_example_splits_non_latin_sentences_only():
+    assert parse_example('我吃苹果。 (Wǒ chī píngguǒ.) - I eat apples.') == (
+        '我吃苹果。', 'Wǒ chī píngguǒ.', 'I eat apples.'
+    )
+    latin = 'Er kommt (morgen) - vielleicht.'
+    assert parse_example(latin) == (latin, None, None)
+
+def test_example_fields():
+    assert example_fields('一个人 (yī gè rén) - one person') == {
+        'example_sentence': '一个人', 'example_romanization': 'yī gè rén', 'example_translation': 'one person'
+    }
+    assert example_fields('Ich esse.') == {'example_sentence': 'Ich esse.'}
@@ -0,0 +1,76 @@
+import pytest
+
+from conftest import conllu_lines
+from conllu.reader import iter_sentences
+from tree_query import compile_query, node_facts, TreeQueryError
+
+# Die Frau hat dem Kind das Buch gegeben.
+SENTENCE, = iter_sentences(conllu_lines("""
+1  Die     der     DET   ART    Case=Nom|Definite=Def      2  det     _  _
+2  Frau    Frau    NOUN  NN     Case=Nom|Number=Sing       8  nsubj   _  _
+3  hat     haben   AUX   VAFIN  Mood=Ind|Tense=Pres        8  aux     _  _
+4  dem     der     DET   ART    Case=Dat|Definite=Def      5  det     _  _
+5  Kind    Kind    NOUN  NN     Case=Dat|Number=Sing       8  iobj    _  _
+6  das     der     DET   ART    Case=Acc|Definite=Def      7  det     _  _
+7  Buch    Buch    NOUN  NN     Case=Acc,Dat|Number=Sing   8  obj     _  _
+8  gegeben geben   VERB  VVPP   VerbForm=Part              0  root    _  SpaceAfter=No
+9  .       .       PUNCT $.     _                          8  punct   _  _
+"""))
+
+def forms(query, **names):
+    tokens = SENTENCE['tokens']
+    return [
+        {name: tokens[index]['form'] for name, index in match.items()}
+        for match in compile_query(query).matches(SENTENCE)
+    ]
+
+def test_dependents_and_named_nodes():
+    assert forms('VERB=verb >nsubj NOUN=subject >obj NOUN=object') == [
+        {'verb': 'gegeben', 'subject': 'Frau', 'object': 'Buch'}
+    ]
+
+def test_unnamed_nodes_are_numbered():
+    assert forms('NOUN <iobj _') == [{'node0': 'Kind', 'node1': 'gegeben'}]
+
+def test_alternative_deprels_and_any_relation():
+    assert [match['n'] for match in forms('NOUN=n <iobj|obj VERB')] == ['Kind', 'Buch']
+    assert len(forms('VERB > _')) == 5
+
+def test_attribute_tests_and_multivalued_features():
+    assert [match['n'] for match in forms('[upos=NOUN Case=Dat]=n')] == ['Kind', 'Buch']
+    assert [match['n'] for match in forms('[upos=NOUN Case!=Dat]=n')] == ['Frau']
+    assert [match['v'] for match in forms('[lemma=haben|sein]=v')] == ['hat']
+
+def test_negated_relation():
+    assert [match['n'] for match in forms('NOUN=n !>det _')] == []
+    assert [match['v'] for match in forms('VERB=v !>aux _')] == []
+    assert [match['a'] for match in forms('AUX=a !>obj _')] == ['hat']
+
+def test_precedence_and_nested_nodes():
+    assert forms('DET=d . (NOUN=n <nsubj _)') == [{'d': 'Die', 'n': 'Frau', 'node2': 'gegeben'}]
+    assert [match['n'] for match in forms('NOUN=n <obl|obj (VERB >aux AUX)')] == ['Buch']
+    assert len(forms('NOUN .. NOUN')) == 3
+
+def test_relations_attach_to_the_node_they_follow():
+    # Both nouns only have to follow a; the parenthesised chain orders all three
+    assert len(forms('NOUN=a .. NOUN=b .. NOUN=c')) == 2
+    assert forms('NOUN=a .. (NOUN=b .. NOUN=c)') == [{'a': 'Frau', 'b': 'Kind', 'c': 'Buch'}]
+
+def test_distinct_nodes_match_distinct_tokens():
+    assert all(match['b'] != match['c'] for match in forms('NOUN=a .. NOUN=b .. NOUN=c'))
+    assert len(forms('VERB >obj _ >obj _')) == 0
+
+def test_candidates_limit_the_first_node():
+    query = compile_query('NOUN=n')
+    assert [match['n'] for match in query.matches(SENTENCE, candidates=[4, 6])] == [4, 6]
+
+def test_node_facts_list_positive_tests_and_implied_deprels():
+    root = compile_query('[upos=NOUN Case!=Acc lemma=Kind|Buch] <obj VERB').root
+    assert dict(node_facts(root)) == {
+        'upos': frozenset({'NOUN'}), 'lemma': frozenset({'Kind', 'Buch'}), 'deprel': frozenset({'obj'})
+    }
+
+@pytest.mark.parametrize('query', ['', 'VERB >', 'VERB >nsubj', '[upos NOUN]', '(VERB', 'verb', 'VERB ?? NOUN'])
+def test_malformed_queries_raise(query):
+    with pytest.raises(TreeQueryError):
+        compile_query(query)
@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+import conllu.cache as cache
+from conllu.cache import cache_path_for, load_treebank, open_treebank_cache
+
+TREEBANK = """\
+# sent_id = a
+# text = Er schläft.
+1	Er	er	PRON	PPER	Case=Nom	2	nsubj	_	_
+2	schläft	schlafen	VERB	VVFIN	_	0	root	_	SpaceAfter=No
+3	.	.	PUNCT	$.	_	2	punct	_	_
+
+# sent_id = b
+# text = Sie liest.
+1	Sie	sie	PRON	PPER	Case=Nom	2	nsubj	_	_
+2	liest	lesen	VERB	VVFIN	_	0	root	_	SpaceAfter=No
+3	.	.	PUNCT	$.	_	2	punct	_	_
+"""
+
+@pytest.fixture
+def treebank_path(tmp_path):
+    path = tmp_path / 'de.conllu'
+    path.write_text(TREEBANK, encoding='utf-8')
+    return str(path)
+
+@pytest.fixture
+def hash_calls(monkeypatch):
+    calls = []
+    file_hash = cache.file_hash
+    monkeypatch.setattr(cache, 'file_hash', lambda *args, **kwargs: calls.append(args) or file_hash(*args, **kwargs))
+    return calls
+
+def set_mtime(path, mtime_ns):
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+def test_first_load_writes_a_cache_that_later_loads_map(treebank_path):
+    parsed = load_treebank(treebank_path)
+    assert os.path.exists(cache_path_for(treebank_path))
+    cached = open_treebank_cache(treebank_path)
+    assert len(cached) == len(parsed) == 2
+    assert cached.sentence_text(1) == 'Sie liest.'
+    assert [token['form'] for token in cached.sentence(0)['tokens']] == ['Er', 'schläft', '.']
+
+def test_unchanged_mtime_skips_the_hash(treebank_path, hash_calls):
+    load_treebank(treebank_path)
+    hash_calls.clear()
+    assert open_treebank_cache(treebank_path) is not None
+    assert hash_calls == []
+
+def test_touched_file_is_hashed_once_and_its_mtime_recorded(treebank_path, hash_calls):
+    load_treebank(treebank_path)
+    set_mtime(treebank_path, os.stat(treebank_path).st_mtime_ns + 10**9)
+    hash_calls.clear()
+
+    assert open_treebank_cache(treebank_path) is not None
+    assert open_treebank_cache(treebank_path) is not None
+    assert len(hash_calls) == 1
+    header, _ = cache._read_header(cache_path_for(treebank_path))
+    assert header['source']['mtime_ns'] == os.stat(treebank_path).st_mtime_ns
+
+def test_changed_content_makes_the_cache_stale(treebank_path):
+    load_treebank(treebank_path)
+    mtime_ns = os.stat(treebank_path).st_mtime_ns
+    with open(treebank_path, 'r+', encoding='utf-8') as f:
+        f.write(TREEBANK.replace('Er', 'Es'))  # same size, different content
+    set_mtime(treebank_path, mtime_ns + 10**9)
+
+    assert open_treebank_cache(treebank_path) is None
+    assert load_treebank(treebank_path).sentence(0)['tokens'][0]['form'] == 'Es'
+
+def test_changed_size_makes_the_cache_stale(treebank_path):
+    load_treebank(treebank_path)
+    with open(treebank_path, 'a', encoding='utf-8') as f:
+        f.write('\n')
+    assert open_treebank_cache(treebank_path) is None
+
+def test_garbage_cache_is_ignored(treebank_path):
+    load_treebank(treebank_path)
+    with open(cache_path_for(treebank_path), 'wb') as f:
+        f.write(b'not a cache')
+    assert open_treebank_cache(treebank_path) is None
+    assert len(load_treebank(treebank_path)) == 2
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Semgrex-style dependency tree queries
+
+A query describes a token and its neighbourhood in the dependency tree:
+
+    VERB >nsubj NOUN >obj NOUN          a verb with a noun subject and a noun object
+    VERB=verb >compound:prt _=prefix    separable verbs, with both tokens named
+    NOUN <obl|obj (VERB >aux AUX)       nouns attached to a verb that has an auxiliary
+    [lemma=haben] !>obj _               haben without an object
+    [upos=NOUN Case=Dat] <nsubj _       dative noun subjects
+
+Nodes:
+    VERB                 a UPOS tag
+    _                    any token
+    [key=v1|v2 key!=v]   attribute tests on form, lemma, upos, xpos or deprel;
+                         any other key is a FEATS feature, e.g. Case=Dat
+    node=name            names the node in the matches (otherwise node0, node1...)
+
+Relations, all attached to the node they follow (parenthesise a node to give
+it relations of its own):
+    A >rel B    B is a dependent of A with deprel rel (rel|rel2, or > for any)
+    A <rel B    A is a dependent of B with deprel rel (or < for any)
+    A . B       A immediately precedes B
+    A .. B      A precedes B
+    !           before a relation: no such B exists
+
+Distinct nodes always match distinct tokens. A compiled TreeQuery matches
+sentences in conllu.reader's format; api/treebank.py runs queries over the
+stored treebanks, narrowing the sentences to verify with the database's
+indexes first.
+"""
+
+import re
+from collections import namedtuple
+
+from conllu.reader import parse_feats
+
+TOKEN_FIELDS = ('form', 'lemma', 'upos', 'xpos', 'deprel')
+
+MAX_QUERY_NODES = 8
+
+Relation = namedtuple('Relation', ['op', 'deprels', 'negated', 'node'])
+
+class TreeQueryError(ValueError):
+    pass
+
+class QueryNode:
+    __slots__ = ('name', 'constraints', 'relations')
+
+    def __init__(self, name, constraints):
+        self.name = name
+        self.constraints = constraints  # [(key, frozenset of values, negated)]
+        self.relations = []
+
+    def accepts(self, token):
+        features = None
+        for key, values, negated in self.constraints:
+            if key in TOKEN_FIELDS:
+                found = token[key] in values
+            else:
+                if features is None:
+                    features = token_features(token)
+                found = not values.isdisjoint(features.get(key, ()))
+            if found == negated:
+                return False
+        return True
+
+def token_features(token):
+    """
+    {feature: set of values} of a token's FEATS, e.g. Case=Acc,Dat -> {'Case': {'Acc', 'Dat'}}
+    """
+    return {name: set(value.split(',')) for name, value in parse_feats(token['feats']).items()}
+
+_SPACE = re.compile(r'\s*')
+_UPOS = re.compile(r'[A-Z]+\b')
+_NAME = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+_KEY = re.compile(r'[A-Za-z][A-Za-z0-9_]*(?:\[[a-z0-9]+\])?')
+_VALUE = re.compile(r'[^\s\]&|]+')
+_DEPREL = re.compile(r'[a-z]+(?::[a-z]+)?')
+
+class _Parser:
+    def __init__(self, text):
+        self.text = text
+        self.pos = 0
+        self.nodes = []
+        self.named = []
+
+    def error(self, message):
+        raise TreeQueryError(f"{message} at position {self.pos} of {self.text!r}")
+
+    def skip_space(self):
+        self.pos = _SPACE.match(self.text, self.pos).end()
+
+    def accept(self, literal):
+        self.skip_space()
+        if self.text.startswith(literal, self.pos):
+            self.pos += len(literal)
+            return True
+        return False
+
+    def expect(self, literal):
+        if not self.accept(literal):
+            self.error(f"Expected {literal!r}")
+
+    def take(self, pattern):
+        match = pattern.match(self.text, self.pos)
+        if not match:
+            return None
+        self.pos = match.end()
+        return match.group()
+
+    def parse(self):
+        root = self.expression()
+        self.skip_space()
+        if self.pos < len(self.text):
+            self.error("Unexpected text")
+        return root
+
+    def expression(self):
+        node = self.term()
+        while True:
+            relation = self.relation()
+            if relation is None:
+                return node
+            node.relations.append(relation)
+
+    def relation(self):
+        negated = self.accept('!')
+        if self.accept('>'):
+            op = '>'
+        elif self.accept('<'):
+            op = '<'
+        elif self.accept('..'):
+            op = '..'
+        elif self.accept('.'):
+            op = '.'
+        elif negated:
+            self.error("Expected a relation after '!'")
+        else:
+            return None
+
+        deprels = None
+        if op in '<>' and _DEPREL.match(self.text, self.pos):
+            deprels = {self.take(_DEPREL)}
+            while self.text.startswith('|', self.pos):
+                self.pos += 1
+                deprel = self.take(_DEPREL) or self.error("Expected a deprel after '|'")
+                deprels.add(deprel)
+            deprels = frozenset(deprels)
+
+        return Relation(op, deprels, negated, self.term())
+
+    def term(self):
+        if self.accept('('):
+            node = self.expression()
+            self.expect(')')
+            return node
+        return self.node()
+
+    def node(self):
+        self.skip_space()
+        if self.accept('['):
+            constraints = self.attributes()
+        elif self.accept('_'):
+            constraints = []
+        else:
+            upos = self.take(_UPOS)
+            if upos is None:
+                self.error("Expected a UPOS tag, '_' or '[...]'")
+            constraints = [('upos', frozenset([upos]), False)]
+
+        name = f"node{len(self.nodes)}"
+        if self.text.startswith('=', self.pos):
+            self.pos += 1
+            name = self.take(_NAME) or self.error("Expected a node name after '='")
+            if any(node.name == name for node in self.nodes):
+                self.error(f"Node name {name!r} is used twice")
+            self.named.append(name)
+        node = QueryNode(name, constraints)
+        self.nodes.append(node)
+        if len(self.nodes) > MAX_QUERY_NODES:
+            self.error(f"More than {MAX_QUERY_NODES} nodes")
+        return node
+
+    def attributes(self):
+        constraints = []
+        while not self.accept(']'):
+            if constraints:
+                self.accept('&')
+            self.skip_space()
+            key = self.take(_KEY) or self.error("Expected an attribute name")
+            if key[0].islower() and key not in TOKEN_FIELDS:
+                self.error(f"Unknown attribute {key!r} (use one of {', '.join(TOKEN_FIELDS)} or a feature name)")
+            negated = self.text.startswith('!=', self.pos)
+            if negated:
+                self.pos += 2
+            elif self.text.startswith('=', self.pos):
+                self.pos += 1
+            else:
+                self.error("Expected '=' or '!='")
+            values = {self.take(_VALUE) or self.error("Expected a value")}
+            while self.text.startswith('|', self.pos):
+                self.pos += 1
+                values.add(self.take(_VALUE) or self.error("Expected a value after '|'"))
+            constraints.append((key, frozenset(values), negated))
+        return constraints
+
+class TreeQuery:
+    """
+    A compiled tree query
+
+    matches(sentence) and matches_at(sentence, index) yield one
+    {node name: token index} dict per way the query matches; sentences need the
+    `tokens`, `heads` and `children` of conllu.reader.
+    """
+
+    def __init__(self, text):
+        parser = _Parser(text)
+        self.text = text
+        self.root = parser.parse()
+        self.nodes = parser.nodes
+        self.named = parser.named  # names given in the query with =name
+
+    def matches(self, sentence, candidates=None):
+        """
+        Every match in the sentence, trying the query's first node on the
+        `candidates` token indexes (all tokens by default)
+        """
+        if candidates is None:
+            candidates = range(len(sentence['tokens']))
+        for index in candidates:
+            yield from self.matches_at(sentence, index)
+
+    def matches_at(self, sentence, index):
+        """
+        Matches with the query's first node on token `index`
+        """
+        return _bind(self.root, index, sentence, {})
+
+def compile_query(text):
+    """
+    Parse a tree query, raising TreeQueryError for malformed ones
+    """
+    return TreeQuery(text)
+
+def node_facts(node):
+    """
+    Values a token must have to match `node`, as [(column or feature, allowed values)]
+
+    The = tests are listed (!= tests are left to accepts()), plus the deprel
+    implied by the node's own <rel relations. A database can use them to
+    narrow the tokens to verify with its indexes.
+    """
+    facts = [(key, values) for key, values, negated in node.constraints if not negated]
+    for relation in node.relations:
+        if relation.op == '<' and relation.deprels and not relation.negated:
+            facts.append(('deprel', relation.deprels))
+    return facts
+
+def _related(op, deprels, sentence, index):
+    """
+    Indexes of the tokens in relation `op` to token `index`
+    """
+    if op == '>':
+        children = sentence['children'][index]
+        if deprels is None:
+            return children
+        tokens = sentence['tokens']
+        return [child for child in children if tokens[child]['deprel'] in deprels]
+    if op == '<':
+        head = sentence['heads'][index]
+        if head < 0 or (deprels is not None and sentence['tokens'][index]['deprel'] not in deprels):
+            return []
+        return [head]
+    if op == '.':
+        return [index + 1] if index + 1 < len(sentence['tokens']) else []
+    return range(index + 1, len(sentence['tokens']))
+
+def _bind(node, index, sentence, bound):
+    if index in bound.values() or not node.accepts(sentence['tokens'][index]):
+        return
+    yield from _bind_relations(node, 0, index, sentence, {**bound, node.name: index})
+
+def _bind_relations(node, position, index, sentence, bound):
+    if position == len(node.relations):
+        yield bound
+        return
+    relation = node.relations[position]
+    related = _related(relation.op, relation.deprels, sentence, index)
+    if relation.negated:
+        if not any(next(_bind(relation.node, other, sentence, bound), None) for other in related):
+            yield from _bind_relations(node, position + 1, index, sentence, bound)
+        return
+    for other in related:
+        for extended in _bind(relation.node, other, sentence, bound):
+            yield from _bind_relations(node, position + 1, index, sentence, extended)
+
+if __name__ == '__main__':
+    import sys
+    from conllu.cache import load_treebank
+
+    query = compile_query(sys.argv[1])
+    for path in sys.argv[2:]:
+        for sentence in load_treebank(path):
+            for match in query.matches(sentence):
+                print(sentence.get('sent_id'), ' '.join(
+                    f"{name}={sentence['tokens'][index]['form']}" for name, index in match.items()
+                ))
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+COPY-based bulk loader for ud_treebank_sentences and ud_token_analysis
+
+Inserting one ORM object per row, with a flush per sentence to learn its id,
+limits the UD tables to a handful of sample sentences. This loader instead
+reserves a block of sentence ids from the table's sequence, writes sentence
+and token rows into in-memory buffers in COPY text format, and streams each
+batch with `COPY ... FROM STDIN`. Token ids come from their column default.
+
+Token rows store forms, lemmas, tags and FEATS as ids into the dictionary
+tables (ud_lexicon, ud_tags, ud_feature_sets). UDVocabulary keeps their
+string -> id maps in memory: each batch's new strings get ids reserved from
+the dictionaries' sequences and are COPYed ahead of the tokens that use them.
+
+Both UD tables are partitioned by language. A load that replaces everything
+stored for its language COPYs into fresh staging tables without indexes or
+constraints, indexes and constrains them, and swaps them in for the
+language's partitions (DETACH, DROP and ATTACH PARTITION). A load that replaces only some of the
+language's sources deletes their rows within the partitions instead.
+"""
+
+import io
+import json
+import time
+
+from psycopg2 import sql
+
+from config.database import engine
+from conllu.reader import parse_feats
+from models.language_models import UDTreebankSentence, UDTokenAnalysis
+
+SENTENCE_COLUMNS = ('sentence_id', 'language_id', 'sentence_text', 'source', 'treebank_metadata')
+TOKEN_COLUMNS = ('sentence_id', 'language_id', 'token_id', 'form_id', 'lemma_id', 'upos_id', 'xpos_id', 'feats_id', 'head', 'deprel_id')
+
+TAG_KINDS = ('upos', 'xpos', 'deprel')
+
+# Referenced table first: partitions are attached in this order and dropped in reverse
+UD_TABLES = (UDTreebankSentence.__table__, UDTokenAnalysis.__table__)
+
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+def copy_value(value):
+    """
+    Render one value in PostgreSQL COPY text format
+    """
+    if value is None:
+        return '\\N'
+    return str(value).translate(_COPY_ESCAPES)
+
+def copy_row(values):
+    return '\t'.join(copy_value(value) for value in values) + '\n'
+
+def features_json(feats):
+    """
+    ud_feature_sets.features for a FEATS string: every value as a list, or None without features
+    """
+    features = parse_feats(feats)
+    if not features:
+        return None
+    return json.dumps({name: value.split(',') for name, value in features.items()}, ensure_ascii=False)
+
+def reserve_ids(cursor, table, column, count):
+    """
+    Take `count` ids from the sequence of `table`.`column` in one round trip
+    """
+    cursor.execute(
+        "SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)",
+        (table, column, count)
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+def partition_name(table_name, language_code, suffix=''):
+    """
+    Name of a language's partition (or of its indexes) of a UD table, e.g. ud_token_analysis_de
+    """
+    if not (language_code.isascii() and language_code.isalpha() and language_code.islower()):
+        raise ValueError(f"Unexpected language code {language_code!r}")
+    return f"{table_name}_{language_code}{suffix}"
+
+class UDVocabulary:
+    """
+    In-memory intern maps of the dictionary tables, for loading one language
+
+    Loads run one at a time (bulk_load_corpus holds an advisory lock), so
+    ids reserved here never race with another writer of the dictionaries.
+    """
+
+    def __init__(self, cursor, language_code):
+        self.language_code = language_code
+        cursor.execute("SELECT text, lexeme_id FROM ud_lexicon WHERE language_id = %s", (language_code,))
+        self.lexemes = dict(cursor.fetchall())
+        cursor.execute("SELECT kind, value, tag_id FROM ud_tags")
+        self.tags = {(kind, value): tag_id for kind, value, tag_id in cursor.fetchall()}
+        cursor.execute("SELECT feats, feats_id FROM ud_feature_sets")
+        self.feature_sets = dict(cursor.fetchall())
+
+    def intern(self, cursor, sentences):
+        """
+        Give ids to the strings of `sentences` not in the dictionaries yet, and COPY them
+        """
+        lexemes, tags, feature_sets = set(), set(), set()
+        for sentence in sentences:
+            for token in sentence['tokens']:
+                lexemes.add(token['form'])
+                lexemes.add(token['lemma'])
+                tags.update((kind, token[kind]) for kind in TAG_KINDS)
+                feature_sets.add(token['feats'])
+        lexemes = sorted(text for text in lexemes if text is not None and text not in self.lexemes)
+        tags = sorted(tag for tag in tags if tag[1] is not None and tag not in self.tags)
+        feature_sets = sorted(feats for feats in feature_sets if parse_feats(feats) and feats not in self.feature_sets)
+
+        if lexemes:
+            rows = io.StringIO()
+            for lexeme_id, text in zip(reserve_ids(cursor, 'ud_lexicon', 'lexeme_id', len(lexemes)), lexemes):
+                self.lexemes[text] = lexeme_id
+                rows.write(copy_row((lexeme_id, self.language_code, text)))
+            rows.seek(0)
+            cursor.copy_expert("COPY ud_lexicon (lexeme_id, language_id, text) FROM STDIN", rows)
+        if tags:
+            rows = io.StringIO()
+            for tag_id, (kind, value) in zip(reserve_ids(cursor, 'ud_tags', 'tag_id', len(tags)), tags):
+                self.tags[kind, value] = tag_id
+                rows.write(copy_row((tag_id, kind, value)))
+            rows.seek(0)
+            cursor.copy_expert("COPY ud_tags (tag_id, kind, value) FROM STDIN", rows)
+        if feature_sets:
+            rows = io.StringIO()
+            for feats_id, feats in zip(reserve_ids(cursor, 'ud_feature_sets', 'feats_id', len(feature_sets)), feature_sets):
+                self.feature_sets[feats] = feats_id
+                rows.write(copy_row((feats_id, feats, features_json(feats))))
+            rows.seek(0)
+            cursor.copy_expert("COPY ud_feature_sets (feats_id, feats, features) FROM STDIN", rows)
+
+    def token_ids(self, token):
+        """
+        (form_id, lemma_id, upos_id, xpos_id, feats_id) of an interned token
+        """
+        return (
+            self.lexemes.get(token['form']),
+            self.lexemes.get(token['lemma']),
+            self.tags.get(('upos', token['upos'])),
+            self.tags.get(('xpos', token['xpos'])),
+            self.feature_sets.get(token['feats']),
+        )
+
+class UDBulkLoader:
+    """
+    Stream parsed sentences into the UD tables through COPY, in batches
+    """
+
+    def __init__(self, connection, batch_size=5000):
+        self.connection = connection
+        self.batch_size = batch_size
+        self.sentence_count = 0
+        self.token_count = 0
+        self.vocabulary = None
+        # COPY targets: the partitioned tables, or staging tables for a whole language
+        self.sentence_table = UDTreebankSentence.__tablename__
+        self.token_table = UDTokenAnalysis.__tablename__
+
+    def replaces_language(self, language_code, sources):
+        """
+        Whether loading `sources` replaces every sentence stored for the language
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT DISTINCT source FROM ud_treebank_sentences WHERE language_id = %s", (language_code,)
+            )
+            return {row[0] for row in cursor.fetchall()} <= set(sources)
+
+    def clear_sources(self, language_code, sources):
+        """
+        Delete previously loaded sentences (and their tokens) for these sources
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM ud_token_analysis t USING ud_treebank_sentences s "
+                "WHERE t.language_id = %s AND s.language_id = %s AND t.sentence_id = s.sentence_id "
+                "AND s.source = ANY(%s)",
+                (language_code, language_code, list(sources))
+            )
+            cursor.execute(
+                "DELETE FROM ud_treebank_sentences WHERE language_id = %s AND source = ANY(%s)",
+                (language_code, list(sources))
+            )
+
+    def create_staging_tables(self, language_code):
+        """
+        Empty tables shaped like the UD tables, without indexes or foreign keys, to COPY a whole language into
+        """
+        with self.connection.cursor() as cursor:
+            for table in UD_TABLES:
+                cursor.execute(sql.SQL("CREATE TABLE {} (LIKE {} INCLUDING DEFAULTS)").format(
+                    sql.Identifier(partition_name(table.name, language_code, '_load')), sql.Identifier(table.name)
+                ))
+        self.sentence_table = partition_name(self.sentence_table, language_code, '_load')
+        self.token_table = partition_name(self.token_table, language_code, '_load')
+
+    def prepare_staging_tables(self, language_code):
+        """
+        Give the staging tables their partitions' indexes and constraints ahead of the swap
+
+        Indexes and foreign keys matching the parent tables', and a CHECK
+        matching the partition bound, let ATTACH PARTITION adopt them instead
+        of building indexes, scanning for rows outside the bound and
+        validating those foreign keys while it holds its locks. The tokens'
+        foreign key to the sentences can only be validated once the staging
+        sentences are attached.
+        """
+        with self.connection.cursor() as cursor:
+            for table in UD_TABLES:
+                staging = partition_name(table.name, language_code, '_load')
+                cursor.execute(sql.SQL("ALTER TABLE {} ADD CONSTRAINT {} PRIMARY KEY ({})").format(
+                    sql.Identifier(staging), sql.Identifier(f"{staging}_pkey"),
+                    sql.SQL(', ').join(sql.Identifier(column.name) for column in table.primary_key.columns),
+                ))
+                for index in table.indexes:
+                    cursor.execute(sql.SQL("CREATE INDEX {} ON {} ({})").format(
+                        sql.Identifier(partition_name(index.name, language_code, '_load')), sql.Identifier(staging),
+                        sql.SQL(', ').join(sql.Identifier(column.name) for column in index.columns),
+                    ))
+                cursor.execute(sql.SQL(
+                    "ALTER TABLE {} ADD CONSTRAINT {} CHECK (language_id IS NOT NULL AND language_id = {})"
+                ).format(sql.Identifier(staging), sql.Identifier(f"{staging}_bound"), sql.Literal(language_code)))
+                cursor.execute(
+                    "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+                    "WHERE conrelid = %s::regclass AND contype = 'f' AND conparentid = 0 "
+                    "AND confrelid::regclass::text <> ALL(%s)",
+                    (table.name, [ud_table.name for ud_table in UD_TABLES])
+                )
+                for name, definition in cursor.fetchall():
+                    cursor.execute(sql.SQL("ALTER TABLE {} ADD CONSTRAINT {} {}").format(
+                        sql.Identifier(staging), sql.Identifier(name), sql.SQL(definition)
+                    ))
+
+    def attach_staging_tables(self, language_code):
+        """
+        Swap the prepared staging tables in for the language's partitions
+
+        DETACH PARTITION locks the parent tables, so queries on the UD tables
+        wait from here to the commit; this runs only the catalog changes and
+        the validation of the tokens' foreign key to the sentences. ANALYZE
+        the new partitions after the commit (analyze_partitions).
+        """
+        with self.connection.cursor() as cursor:
+            for table in reversed(UD_TABLES):
+                partition = partition_name(table.name, language_code)
+                cursor.execute("SELECT to_regclass(%s)", (partition,))
+                if cursor.fetchone()[0] is not None:
+                    # Detached first: the tokens' foreign key depends on each sentence partition
+                    cursor.execute(sql.SQL("ALTER TABLE {} DETACH PARTITION {}").format(
+                        sql.Identifier(table.name), sql.Identifier(partition)
+                    ))
+                    cursor.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(partition)))
+            for table in UD_TABLES:
+                staging = partition_name(table.name, language_code, '_load')
+                partition = partition_name(table.name, language_code)
+                cursor.execute(sql.SQL("ALTER TABLE {} ATTACH PARTITION {} FOR VALUES IN ({})").format(
+                    sql.Identifier(table.name), sql.Identifier(staging), sql.Literal(language_code)
+                ))
+                # The partition bound now enforces the CHECK
+                cursor.execute(sql.SQL("ALTER TABLE {} DROP CONSTRAINT {}").format(
+                    sql.Identifier(staging), sql.Identifier(f"{staging}_bound")
+                ))
+                cursor.execute(sql.SQL("ALTER TABLE {} RENAME TO {}").format(
+                    sql.Identifier(staging), sql.Identifier(partition)
+                ))
+                cursor.execute(sql.SQL("ALTER INDEX {} RENAME TO {}").format(
+                    sql.Identifier(f"{staging}_pkey"), sql.Identifier(f"{partition}_pkey")
+                ))
+                for index in table.indexes:
+                    cursor.execute(sql.SQL("ALTER INDEX {} RENAME TO {}").format(
+                        sql.Identifier(partition_name(index.name, language_code, '_load')),
+                        sql.Identifier(partition_name(index.name, language_code)),
+                    ))
+        self.sentence_table = UDTreebankSentence.__tablename__
+        self.token_table = UDTokenAnalysis.__tablename__
+
+    def analyze_partitions(self, language_code):
+        with self.connection.cursor() as cursor:
+            for table in UD_TABLES:
+                cursor.execute(sql.SQL("ANALYZE {}").format(sql.Identifier(partition_name(table.name, language_code))))
+
+    def _copy_batch(self, cursor, language_code, batch, default_source):
+        if self.vocabulary is None:
+            self.vocabulary = UDVocabulary(cursor, language_code)
+        self.vocabulary.intern(cursor, batch)
+        sentence_ids = reserve_ids(cursor, 'ud_treebank_sentences', 'sentence_id', len(batch))
+        sentence_rows = io.StringIO()
+        token_rows = io.StringIO()
+
+        for sentence_id, sentence in zip(sentence_ids, batch):
+            metadata = dict(sentence.get('metadata') or {})
+            if sentence.get('sent_id'):
+                metadata['sent_id'] = sentence['sent_id']
+            sentence_rows.write(copy_row((
+                sentence_id,
+                language_code,
+                sentence['text'],
+                sentence.get('source') or default_source,
+                json.dumps(metadata, ensure_ascii=False)
+            )))
+            for token in sentence['tokens']:
+                token_rows.write(copy_row((
+                    sentence_id, language_code, token['id'], *self.vocabulary.token_ids(token),
+                    token['head'], self.vocabulary.tags.get(('deprel', token['deprel']))
+                )))
+                self.token_count += 1
+
+        sentence_rows.seek(0)
+        token_rows.seek(0)
+        cursor.copy_expert(
+            f"COPY {self.sentence_table} ({', '.join(SENTENCE_COLUMNS)}) FROM STDIN", sentence_rows
+        )
+        cursor.copy_expert(
+            f"COPY {self.token_table} ({', '.join(TOKEN_COLUMNS)}) FROM STDIN", token_rows
+        )
+        self.sentence_count += len(batch)
+
+    def load_sentences(self, language_code, sentences, default_source=None, max_sentences=None):
+        """
+        COPY sentences and their tokens in batches; the caller commits
+        """
+        batch = []
+        with self.connection.cursor() as cursor:
+            for loaded, sentence in enumerate(sentences):
+                if max_sentences is not None and loaded >= max_sentences:
+                    break
+                batch.append(sentence)
+                if len(batch) >= self.batch_size:
+                    self._copy_batch(cursor, language_code, batch, default_source)
+                    batch = []
+            if batch:
+                self._copy_batch(cursor, language_code, batch, default_source)
+        return self.sentence_count, self.token_count
+
+def bulk_load_corpus(language_code, corpus, sources, max_sentences=None, batch_size=5000):
+    """
+    Replace the stored sentences of `sources` with the sentences of `corpus`
+
+    Runs in one transaction on a raw DBAPI connection from the shared engine,
+    holding an advisory lock that makes concurrent loads wait their turn.
+    When `sources` cover everything stored for the language, its partitions
+    are rebuilt and swapped in whole, then analyzed after the commit;
+    otherwise the sources' rows are deleted and reloaded in place.
+    """
+    start = time.perf_counter()
+    connection = engine.raw_connection()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext('ud_bulk_loader'))")
+        loader = UDBulkLoader(connection, batch_size=batch_size)
+        if loader.replaces_language(language_code, sources):
+            loader.create_staging_tables(language_code)
+            loader.load_sentences(language_code, corpus, default_source=sources[0], max_sentences=max_sentences)
+            loader.prepare_staging_tables(language_code)
+            loader.attach_staging_tables(language_code)
+            connection.commit()
+            loader.analyze_partitions(language_code)
+        else:
+            loader.clear_sources(language_code, sources)
+            loader.load_sentences(language_code, corpus, default_source=sources[0], max_sentences=max_sentences)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"  📥 Loaded {loader.sentence_count} sentences and {loader.token_count} tokens for {language_code} "
+          f"in {elapsed:.1f}s ({loader.token_count / max(elapsed, 1e-9):,.0f} tokens/sec)")
+    return loader.sentence_count, loader.token_count
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Parallel UD treebank ingestion driver
+
+Treebanks are loaded and analyzed in worker processes, one job per language
+(a list of files; a single file unless the corpus manifest mode is on).
+Workers send back only rule dicts and counts. The parent process is the
+only one that talks to Postgres: as each result arrives, its `write`
+callback re-reads the language's sentences (memory-mapped from the
+treebank caches) and COPYs them into the UD tables before storing the
+rules. That sentence read and COPY run one language at a time in the
+writer, so extra workers shorten the analysis phase only; the load phase
+takes as long as it does with a single worker.
+"""
+
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from conllu.cache import load_treebank
+
+def add_ingestion_arguments(parser):
+    """
+    Add the shared --workers and --manifest options to an ingestion script's parser
+    """
+    parser.add_argument(
+        '--workers', type=int, default=os.cpu_count() or 1,
+        help='Worker processes used to parse and analyze treebanks (default: all cores)'
+    )
+    parser.add_argument(
+        '--manifest', action='store_true',
+        help='Ingest every treebank and split for each language, deduplicating sentences'
+    )
+
+def _describe(file_paths):
+    if len(file_paths) == 1:
+        return os.path.basename(file_paths[0])
+    return f"{len(file_paths)} files"
+
+def _run_job(analyze, language_code, file_paths):
+    start = time.perf_counter()
+    result = analyze(language_code, file_paths)
+    result['elapsed'] = time.perf_counter() - start
+    return result
+
+def _warm_cache(file_path):
+    return file_path, len(load_treebank(file_path))
+
+def warm_treebank_caches(file_paths, workers=1):
+    """
+    Parse files into their binary caches in parallel, one process per file
+
+    Language jobs then only memory-map the caches, so a language with many
+    treebanks does not parse them one after another in a single worker.
+    """
+    if workers <= 1:
+        for file_path in file_paths:
+            _warm_cache(file_path)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for file_path, sentence_count in pool.map(_warm_cache, file_paths):
+            print(f"  Cached {os.path.basename(file_path)} ({sentence_count} sentences)")
+
+def run_ingestion(jobs, analyze, write, workers=1):
+    """
+    Analyze `jobs` in parallel and write every result from this process
+
+    jobs    -- list of (language_code, file_paths)
+    analyze -- module-level function (language_code, file_paths) -> result dict
+               with at least 'sentence_count' and 'token_count'; it runs in a
+               worker process so it must be picklable
+    write   -- function (language_code, file_paths, result) -> rules added,
+               called in the parent process only
+    """
+    progress = defaultdict(lambda: {'files': 0, 'sentences': 0, 'tokens': 0, 'rules': 0, 'seconds': 0.0})
+    started = time.perf_counter()
+    total_rules = 0
+
+    def record(position, language_code, file_paths, result):
+        nonlocal total_rules
+        rules_added = write(language_code, file_paths, result)
+        total_rules += rules_added
+
+        stats = progress[language_code]
+        stats['files'] += len(file_paths)
+        stats['sentences'] += result['sentence_count']
+        stats['tokens'] += result['token_count']
+        stats['rules'] += rules_added
+        stats['seconds'] += result['elapsed']
+        print(f"[{position}/{len(jobs)}] {language_code}: {_describe(file_paths)} - "
+              f"{result['sentence_count']} sentences, {result['token_count']} tokens, "
+              f"{rules_added} rules ({result['elapsed']:.1f}s)")
+
+    if workers <= 1:
+        for position, (language_code, file_paths) in enumerate(jobs, start=1):
+            try:
+                result = _run_job(analyze, language_code, file_paths)
+            except Exception as e:
+                print(f"[{position}/{len(jobs)}] {language_code}: failed on {_describe(file_paths)}: {e}")
+                continue
+            record(position, language_code, file_paths, result)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(_run_job, analyze, language_code, file_paths): (language_code, file_paths)
+                for language_code, file_paths in jobs
+            }
+            for position, future in enumerate(as_completed(futures), start=1):
+                language_code, file_paths = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"[{position}/{len(jobs)}] {language_code}: failed on {_describe(file_paths)}: {e}")
+                    continue
+                record(position, language_code, file_paths, result)
+
+    print(f"\n📊 Ingestion by language ({workers} workers, {time.perf_counter() - started:.1f}s wall time):")
+    for language_code, stats in sorted(progress.items()):
+        print(f"  {language_code}: {stats['files']} files, {stats['sentences']} sentences, "
+              f"{stats['tokens']} tokens, {stats['rules']} rules ({stats['seconds']:.1f}s in workers)")
+
+    return total_rules